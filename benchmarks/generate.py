@@ -0,0 +1,92 @@
+import csv
+import os
+import random
+from datetime import datetime
+from modules.database_io import Headers
+from modules.validators import MIN_YEAR
+
+#Synthetic SIS data in the real schema, for the benchmarks.
+#
+#Colleges and programs scale gently with the student count (a 10^6-student
+#data set has a few dozen colleges and a few hundred programs) and every
+#record passes the validators, except that student IDs only have 4 sequence
+#digits per enrollment year: past that (~250k students) the sequence grows a
+#fifth digit, which the ID-format rule rejects but the data layer doesn't mind.
+
+FIRST_NAMES = ["Maria", "Jose", "Juan", "Ana", "Mark", "Angel", "Paul", "Grace", "John",
+               "Mary Joy", "Carlo", "Kristine", "Miguel", "Andrea", "Rafael", "Jasmine",
+               "Daniel", "Nicole", "Gabriel", "Patricia", "Christian", "Camille", "Joshua",
+               "Bea", "Adrian", "Sofia", "Elijah", "Isabel", "Nathan", "Leah"]
+LAST_NAMES  = ["Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza",
+               "Torres", "Tomas", "Andrada", "Castillo", "Flores", "Villanueva", "Ramos",
+               "Castro", "Rivera", "Aquino", "Navarro", "Salazar", "Mercado", "Dela Cruz",
+               "Del Rosario", "O'Neil", "Lim", "Tan", "Abanador", "Mejia", "Daquiz"]
+SUBJECTS    = ["Arts", "Science", "Engineering", "Business", "Education", "Nursing",
+               "Computing", "Law", "Agriculture", "Architecture", "Music", "Medicine"]
+
+
+def _letters(i, width):
+    """0 -> 'AAA', 1 -> 'AAB', ... (base-26 letter codes)."""
+    code = ""
+    for _ in range(width):
+        i, r = divmod(i, 26)
+        code = chr(ord('A') + r) + code
+    return code
+
+
+def sizes_for(students):
+    """Default (colleges, programs) for a given number of students."""
+    colleges = max(4, round(students ** 0.25))
+    return colleges, colleges * 8
+
+
+def student_ids(count):
+    years = list(range(MIN_YEAR, datetime.now().year + 1))
+    for i in range(count):
+        seq, year = divmod(i, len(years))
+        yield f"{years[year]}-{seq + 1:04d}"
+
+
+def generate(data_dir, students, colleges=None, programs=None, seed=0):
+    """Write students/programs/colleges CSVs into data_dir; returns their paths."""
+    rng = random.Random(seed)
+    default_colleges, default_programs = sizes_for(students)
+    colleges = colleges or default_colleges
+    programs = programs or default_programs
+    os.makedirs(data_dir, exist_ok=True)
+    files = {key: os.path.join(data_dir, f"{key}.csv") for key in Headers}
+
+    college_codes = [f"C{_letters(i, 3)}" for i in range(colleges)]
+    with open(files["colleges"], 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(Headers["colleges"])
+        for i, code in enumerate(college_codes):
+            writer.writerow([code, f"College of {SUBJECTS[i % len(SUBJECTS)]} {code}"])
+
+    program_codes = [f"BS-{_letters(i, 3)}" for i in range(programs)]
+    with open(files["programs"], 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(Headers["programs"])
+        for i, code in enumerate(program_codes):
+            writer.writerow([code, f"Bachelor of Science in {SUBJECTS[i % len(SUBJECTS)]} {code}",
+                             college_codes[i % colleges]])
+
+    with open(files["students"], 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(Headers["students"])
+        for sid in student_ids(students):
+            writer.writerow([sid, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                             rng.choice(program_codes), rng.randint(1, 4),
+                             rng.choice(("Male", "Female", "Other"))])
+    return files
+
+
+if __name__ == "__main__":
+    #python -m benchmarks.generate <dir> <students>
+    import sys
+
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m benchmarks.generate <data_dir> <students>")
+    paths = generate(sys.argv[1], int(sys.argv[2]))
+    for key, path in paths.items():
+        print(f"{key}: {path}")
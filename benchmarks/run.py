@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.generate import generate
+from modules import database_io as db, service
+from modules.storage import CsvBackend, SqliteBackend
+from modules.indexes import key_exists, program_college_map, sort_order, OrderedRows
+from modules.validators import validate_student, validate_rows, reference_sets
+from gui.virtual_table import VirtualTable, page_values
+
+#Timed scenarios for the data layer and the table refresh.
+#
+#  python -m benchmarks.run                        # 10^3, 10^4, 10^5 students
+#  python -m benchmarks.run --sizes 1000000 --repeat 3 --out bench.json
+#  python -m benchmarks.run --baseline bench.json  # exit 1 on regressions
+#
+#Every size gets a freshly generated data set (benchmarks/generate.py). A
+#scenario that writes starts each repeat from a pristine copy, and only the
+#operation itself is timed, never the reset or the setup. Results are JSON:
+#{"meta": {...}, "results": [{"scenario", "rows", "min", "median", ...}]}.
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+PAGE_SIZE     = 15       # rows on one page of the Treeview
+VALIDATE_ROWS = 1000     # rows pushed through the per-row validator
+
+
+class FakeTree:
+    """Just enough of ttk.Treeview for VirtualTable, counting the Tk calls it would make."""
+
+    def __init__(self):
+        self.calls = 0
+        self._next = 0
+
+    def selection(self):
+        return ()
+
+    def selection_remove(self, items):
+        self.calls += 1
+
+    def item(self, item_id, **options):
+        self.calls += 1
+
+    def insert(self, parent, index, **options):
+        self.calls += 1
+        self._next += 1
+        return f"I{self._next}"
+
+    def delete(self, *items):
+        self.calls += 1
+
+
+class Bench:
+    """One generated data set plus a scratch copy the scenarios run against."""
+
+    def __init__(self, rows, backend, root):
+        self.rows    = rows
+        self.backend = backend
+        self.pristine = os.path.join(root, f"pristine-{rows}")
+        self.work     = os.path.join(root, f"work-{rows}")
+        generate(self.pristine, rows)
+        self.reset()
+
+    def reset(self):
+        shutil.rmtree(self.work, ignore_errors=True)
+        shutil.copytree(self.pristine, self.work)
+        files = {key: os.path.join(self.work, f"{key}.csv") for key in db.Headers}
+        backend = CsvBackend(files, db.Headers, self.work)
+        if self.backend == "sqlite":
+            sqlite = SqliteBackend(os.path.join(self.work, "sis.db"), db.Headers)
+            sqlite.import_csv(backend)
+            backend = sqlite
+        db.set_backend(backend)
+
+    def some_student(self):
+        rows = db.get_rows("students")
+        return dict(rows[len(rows) // 2])
+
+    def some_program(self):
+        rows = db.get_rows("programs")
+        return dict(rows[len(rows) // 2])
+
+
+# ── Scenarios ──────────────────────────────────────────────────────────────
+#Each scenario gets the Bench, does its (untimed) setup and returns the
+#zero-argument operation to time. WRITES marks the ones that change the data.
+
+def read_csv_cold(bench):
+    db.invalidate()
+    return lambda: db.read_csv("students")
+
+
+def read_csv_warm(bench):
+    db.get_rows("students")
+    return lambda: db.read_csv("students")
+
+
+def first_page_cold(bench):
+    #what a view shows before the table is parsed: one page straight from storage
+    db.invalidate()
+    return lambda: db.page_rows("students", PAGE_SIZE)
+
+
+def deep_page_sorted(bench):
+    rows = db.get_rows("students")
+    cursor = db.page_rows("students", len(rows) // 2, order_by="lastname")[1]
+    return lambda: db.page_rows("students", PAGE_SIZE, cursor, order_by="lastname")
+
+
+def write_csv(bench):
+    rows = db.read_csv("students")
+    return lambda: db.write_csv("students", rows)
+
+
+def add_csv(bench):
+    row = dict(bench.some_student(), id="2000-0000")
+    return lambda: db.add_csv("students", row)
+
+
+def service_add_student(bench):
+    #the Add Student save: validation plus the append, inside the service's transaction
+    db.get_rows("students")
+    year = datetime.now().year
+    free = next(f"{year}-{seq:04d}" for seq in range(9999, 0, -1)
+                if not key_exists("students", f"{year}-{seq:04d}"))
+    student = dict(bench.some_student(), id=free)
+
+    def run():
+        ok, msg = service.add_student(student)
+        assert ok, msg
+    return run
+
+
+def search_csv(bench):
+    db.get_rows("students")
+    return lambda: db.search_csv("students", "an")
+
+
+def search_csv_column(bench):
+    db.get_rows("students")
+    return lambda: db.search_csv("students", "cruz", "lastname")
+
+
+def sort_csv(bench):
+    db.invalidate()
+    db.get_rows("students")
+    return lambda: db.sort_csv("students", "lastname")
+
+
+def update_csv(bench):
+    student = bench.some_student()
+    changed = dict(student, firstname="Benchmark")
+    return lambda: db.update_csv("students", student['id'], changed)
+
+
+def delete_csv(bench):
+    student = bench.some_student()
+    return lambda: db.delete_csv("students", student['id'])
+
+
+def validate_student_rows(bench):
+    rows = db.read_csv("students")[:VALIDATE_ROWS]
+    db.get_rows("programs")
+    return lambda: [validate_student(row, skip_id_check=True) for row in rows]
+
+
+def validate_rows_batch(bench):
+    rows = db.read_csv("students")
+    keys = reference_sets("students")
+    return lambda: validate_rows("students", rows, keys, is_edit=True)
+
+
+def cascade_delete_program(bench):
+    code = bench.some_program()['code']
+    db.get_rows("students")
+
+    def run():
+        with db.transaction():
+            db.delete_csv("programs", code)
+            db.reassign("students", "program_code", {code: f"__deleted__{code}"})
+    return run
+
+
+def cascade_delete_college(bench):
+    code = db.get_rows("colleges")[0]['code']
+    db.get_rows("students")
+
+    def run():
+        with db.transaction():
+            program_codes = [r['code'] for r in db.iter_rows("programs", columns=['code'],
+                                                            where={'college_code': code})]
+            db.delete_csv("colleges", code)
+            db.reassign("programs", "college_code", {code: f"__deleted__{code}"})
+            db.reassign("students", "program_code", {p: f"__deleted__{p}" for p in program_codes})
+    return run
+
+
+def refresh_table(bench):
+    #what MainWindow.refresh_table does for a sorted students view, minus Tk:
+    #the college join, one page of the ordered rows, and the pooled render
+    rows  = db.get_rows("students")
+    view  = OrderedRows(rows, sort_order("students", "lastname"))
+    table = VirtualTable(FakeTree())
+    keys  = ["id", "firstname", "lastname", "program_code", "year", "gender", "college"]
+    pages = [view[i:i + PAGE_SIZE] for i in range(0, min(len(view), PAGE_SIZE * 10), PAGE_SIZE)]
+
+    def run():
+        college_map = program_college_map()
+        for page in pages:
+            table.render(*page_values(page, keys, college_map))
+    return run
+
+
+SCENARIOS = [read_csv_cold, read_csv_warm, first_page_cold, deep_page_sorted, write_csv, add_csv,
+             service_add_student, search_csv, search_csv_column,
+             sort_csv, update_csv, delete_csv, validate_student_rows, validate_rows_batch,
+             cascade_delete_program, cascade_delete_college, refresh_table]
+WRITES = {write_csv, add_csv, service_add_student, update_csv, delete_csv, cascade_delete_program,
+          cascade_delete_college}
+
+
+def time_scenario(bench, scenario, repeat):
+    timings = []
+    for _ in range(repeat):
+        if scenario in WRITES:
+            bench.reset()
+        op = scenario(bench)
+        started = time.perf_counter()
+        op()
+        timings.append(time.perf_counter() - started)
+    return {"scenario": scenario.__name__, "rows": bench.rows, "repeat": repeat,
+            "min": min(timings), "median": statistics.median(timings), "max": max(timings)}
+
+
+def compare(results, baseline_path, tolerance):
+    """Scenarios whose median got slower than baseline * tolerance."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["rows"]): r for r in json.load(f)["results"]}
+    slower = []
+    for result in results:
+        before = baseline.get((result["scenario"], result["rows"]))
+        if before and result["median"] > before["median"] * tolerance:
+            slower.append((result, result["median"] / before["median"]))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated student counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--backend", choices=("csv", "sqlite"), default="csv")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON output to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown factor before --baseline fails")
+    args = parser.parse_args(argv)
+
+    scenarios = SCENARIOS
+    if args.only:
+        wanted = set(args.only.split(","))
+        scenarios = [s for s in SCENARIOS if s.__name__ in wanted]
+
+    results = []
+    root = tempfile.mkdtemp(prefix="sis-bench-")
+    try:
+        for rows in (int(size) for size in args.sizes.split(",")):
+            bench = Bench(rows, args.backend, root)
+            for scenario in scenarios:
+                result = time_scenario(bench, scenario, args.repeat)
+                results.append(result)
+                print(f"{result['scenario']:<24} {rows:>9,} rows  "
+                      f"median {result['median'] * 1000:10.2f} ms", file=sys.stderr)
+    finally:
+        db.invalidate()
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = {"meta": {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "cpus": os.cpu_count(),
+                       "backend": args.backend},
+              "results": results}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        slower = compare(results, args.baseline, args.tolerance)
+        for result, ratio in slower:
+            print(f"REGRESSION {result['scenario']} @ {result['rows']:,} rows: "
+                  f"{ratio:.2f}x slower", file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import os
+
+#Images shared by the main window and the forms. The logo PNG is decoded once,
+#on first use rather than at import, and the CTkImage for each size is built
+#once and reused, so opening a form no longer re-reads and re-decodes the file.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO_PATH    = os.path.join(PROJECT_ROOT, "assets", "logo.png")
+
+_decoded = {}   # path -> PIL image
+_images  = {}   # (path, size) -> CTkImage / PhotoImage
+
+
+def _decode(path):
+    image = _decoded.get(path)
+    if image is None:
+        from PIL import Image
+        with Image.open(path) as source:
+            image = source.copy()
+        _decoded[path] = image
+    return image
+
+
+def logo(size=48):
+    """The logo as a size x size CTkImage."""
+    key = (LOGO_PATH, size)
+    if key not in _images:
+        import customtkinter as ctk
+        _images[key] = ctk.CTkImage(_decode(LOGO_PATH), size=(size, size))
+    return _images[key]
+
+
+def logo_icon(size=64):
+    """The logo as a small PhotoImage for iconphoto (needs a Tk root to exist)."""
+    key = (LOGO_PATH, "icon", size)
+    if key not in _images:
+        from PIL import ImageTk
+        _images[key] = ImageTk.PhotoImage(_decode(LOGO_PATH).resize((size, size)))
+    return _images[key]
@@ -1,8 +1,6 @@
 import customtkinter as ctk
-from PIL import Image
-import os
-from modules.database_io import read_csv, write_csv
-from modules.validators import validate_college
+from modules import service
+from gui.assets import logo
 
 BG_BASE      = "#0d1117"
 BG_FORM      = "#1c2230"
@@ -13,10 +11,6 @@ TEXT_PRIMARY = "#e6edf3"
 TEXT_MUTED   = "#8b949e"
 BORDER       = "#30363d"
 
-# Get project root for asset paths
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-ASSET_LOGO_PATH = os.path.join(PROJECT_ROOT, "assets", "logo.png")
-
 def styled_label(parent, text):
     return ctk.CTkLabel(parent, text=text, font=ctk.CTkFont(size=12),
                         text_color=TEXT_MUTED)
@@ -30,11 +24,9 @@ def styled_entry(parent, placeholder, width=340):
 
 def handle_delete(app, edit_data):
     code = str(edit_data[0])
-    all_programs = read_csv("programs")
-    affected_programs = [p for p in all_programs if p.get('college_code') == code]
-    affected_codes = {p['code'] for p in affected_programs}
-    all_students = read_csv("students")
-    affected_students = [s for s in all_students if s.get('program_code') in affected_codes]
+    impact = service.delete_impact("colleges", code)
+    affected_programs, affected_students = impact["programs"], impact["students"]
+    version = service.record_version("colleges", code)
 
     confirm = ctk.CTkToplevel(app)
     confirm.title("Confirm Delete")
@@ -51,38 +43,23 @@ def handle_delete(app, edit_data):
                  font=ctk.CTkFont(size=15, weight="bold"),
                  text_color=TEXT_PRIMARY).pack(pady=(24, 4))
     if affected_programs:
-        msg = (f"⚠  {len(affected_programs)} program(s) → Unassigned\n"
-               f"⚠  {len(affected_students)} student(s) affected")
-        ctk.CTkLabel(confirm, text=msg, text_color="#f59e0b").pack()
+        msg = (f"⚠  {affected_programs} program(s) → Unassigned\n"
+               f"⚠  {affected_students} student(s) affected")
+        note = ctk.CTkLabel(confirm, text=msg, text_color="#f59e0b", wraplength=440)
     else:
-        ctk.CTkLabel(confirm, text="This cannot be undone.",
-                     text_color=TEXT_MUTED).pack()
+        note = ctk.CTkLabel(confirm, text="This cannot be undone.",
+                            text_color=TEXT_MUTED, wraplength=440)
+    note.pack()
 
     bf = ctk.CTkFrame(confirm, fg_color="transparent")
     bf.pack(pady=20)
 
     def confirm_delete():
-        all_c = read_csv("colleges")
-        updated_c = [c for c in all_c if c['code'] != code]
-        write_csv("colleges", updated_c)
-        if affected_programs:
-            all_p = read_csv("programs")
-            updated_p = []
-            for p in all_p:
-                if p.get('college_code') == code:
-                    p['college_code'] = f"__deleted__{code}"
-                updated_p.append(p)
-            write_csv("programs", updated_p)
-        if affected_students:
-            all_s = read_csv("students")
-            updated_s = []
-            for s in all_s:
-                if s.get('program_code') in affected_codes:
-                    s['program_code'] = f"__deleted__{s['program_code']}"
-                updated_s.append(s)
-            write_csv("students", updated_s)
-        app.current_data = read_csv(app.current_file_key)
-        app.refresh_table(app.current_display_keys)
+        ok, msg = service.delete_college(code, expected_version=version)
+        if not ok:
+            note.configure(text=msg, text_color=ACCENT_RED)
+            return
+        app.show_saved_changes()
         confirm.destroy()
 
     ctk.CTkButton(bf, text="Yes, Delete", fg_color=ACCENT_RED,
@@ -94,6 +71,7 @@ def handle_delete(app, edit_data):
 
 def open_college_form(app, edit_data=None):
     is_edit = edit_data is not None
+    version = service.record_version("colleges", str(edit_data[0])) if is_edit else None
 
     form = ctk.CTkToplevel(app)
     form.title("Edit College" if is_edit else "Add College")
@@ -112,8 +90,7 @@ def open_college_form(app, edit_data=None):
     header.pack_propagate(False)
     ctk.CTkFrame(header, width=4, fg_color=ACCENT_GREEN,
                  corner_radius=0).pack(side="left", fill="y")
-    logo_img = ctk.CTkImage(Image.open(ASSET_LOGO_PATH), size=(48, 48))
-    ctk.CTkLabel(header, image=logo_img, text="", width=48, height=48).pack(side="left", padx=(8, 4))
+    ctk.CTkLabel(header, image=logo(48), text="", width=48, height=48).pack(side="left", padx=(8, 4))
     ctk.CTkLabel(header,
                  text="Edit College" if is_edit else "Add College",
                  font=ctk.CTkFont(size=18, weight="bold"),
@@ -144,38 +121,16 @@ def open_college_form(app, edit_data=None):
         name = name_entry.get().strip()
         college_data = {"code": code, "name": name}
 
-        is_valid, msg = validate_college(college_data, is_edit=is_edit)
-        if not is_valid:
+        if is_edit:
+            ok, msg = service.update_college(code, college_data, expected_version=version)
+        else:
+            # also re-links the programs and students unassigned when it was deleted
+            ok, msg = service.add_college(college_data)
+        if not ok:
             error_label.configure(text=msg)
             return
 
-        all_colleges = read_csv("colleges")
-        if is_edit:
-            updated = [college_data if c['code'] == code else c for c in all_colleges]
-        else:
-            updated = all_colleges + [college_data]
-            # Re-link unassigned programs back to this college
-            all_programs = read_csv("programs")
-            relinked_programs = []
-            for p in all_programs:
-                if p.get('college_code') == f"__deleted__{code}":
-                  p['college_code'] = code
-                relinked_programs.append(p)
-            write_csv("programs", relinked_programs)
-
-            all_students = read_csv("students")
-            relinked_students = []
-            for s in all_students:
-                if s.get('program_code', '').startswith('__deleted__'):
-                    original = s['program_code'][len('__deleted__'):]
-                    if original in {p['code'] for p in relinked_programs if p.get('college_code') == code}:
-                        s['program_code'] = original
-                relinked_students.append(s)
-            write_csv("students", relinked_students)
-
-        write_csv("colleges", updated)
-        app.current_data = read_csv("colleges")
-        app.refresh_table(app.current_display_keys)
+        app.show_saved_changes()
         form.destroy()
 
 
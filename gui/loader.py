@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+#Tk isn't thread-safe, so the worker thread never touches a widget: it only
+#produces data, and the Tk thread polls the future with after() and hands the
+#result to the callback itself.
+
+
+class BackgroundLoader:
+    """Runs data loads on a worker thread and delivers results on the Tk thread.
+
+    Only the most recent submit() is ever delivered; starting a new load (or
+    calling cancel()) makes any load still in flight stale, so quickly
+    switching views never paints an old view's data over the new one.
+    """
+
+    POLL_MS = 20
+
+    def __init__(self, widget):
+        self.widget      = widget
+        self._executor   = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sis-loader")
+        self._generation = 0
+
+    def submit(self, load_fn, on_done, on_error=None):
+        self._generation += 1
+        token  = self._generation
+        future = self._executor.submit(load_fn)
+        self.widget.after(self.POLL_MS, lambda: self._poll(future, token, on_done, on_error))
+        return token
+
+    def cancel(self):
+        self._generation += 1
+
+    def is_current(self, token):
+        return token == self._generation
+
+    def _poll(self, future, token, on_done, on_error):
+        if token != self._generation:
+            future.cancel()
+            return
+        if not future.done():
+            self.widget.after(self.POLL_MS, lambda: self._poll(future, token, on_done, on_error))
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            return
+        on_done(future.result())
+
+    def shutdown(self):
+        self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,16 @@
 from tkinter import ttk
 import tkinter as tk
 import customtkinter as ctk
-import os
-from modules.database_io import read_csv
-from gui.student_forms import open_student_form
-from gui.programs_forms import open_program_form
-from gui.college_forms import open_college_form
-from PIL import Image
+from modules.database_io import read_csv, get_rows, table_version, is_cached, page_rows, estimate_count
+from modules.indexes import (find_row, program_college_map, prefix_search, students_in_college_matching,
+                             sort_order, sort_ranks, OrderedRows)
+from modules.search_engine import search_positions
+from gui.virtual_table import VirtualTable, page_values
+from gui.loader import BackgroundLoader
+from gui.assets import logo, logo_icon
+from gui import startup
+from modules import instrumentation
+from modules.instrumentation import count, timed
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
@@ -23,6 +27,9 @@ TEXT_PRIMARY = "#e6edf3"
 TEXT_MUTED   = "#8b949e"
 SELECTED_ROW = "#1d3a5f"
 
+SEARCH_DELAY_MS = 180   # live search waits this long after the last keystroke
+FUZZY_SEARCH_LABEL = "Any (fuzzy)"
+
 
 class MainWindow(ctk.CTk):
     def __init__(self):
@@ -30,13 +37,13 @@ class MainWindow(ctk.CTk):
         self.current_data  = []
         self.current_page  = 1
         self.sort_reverse  = False   # False = ascending, True = descending
+        self.loader        = BackgroundLoader(self)
+        self._view_positions = None   # table positions behind current_data, when known
+        self._view_of        = None
+        self._preview        = None   # cursor paging state while a table loads
+        self._first_frame_shown = False
         self.configure(fg_color=BG_BASE)
-        
-        # Get the project root directory
-        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.asset_logo_path = os.path.join(self.project_root, "assets", "logo.png")
 
-        self.iconphoto(True, tk.PhotoImage(file=self.asset_logo_path))
         self.title("Student Information System")
         self.geometry("1200x700")
         self.update_idletasks()
@@ -58,6 +65,10 @@ class MainWindow(ctk.CTk):
         self.show_students_view()
         self.tree.bind("<<TreeviewSelect>>", self.on_row_select)
 
+    def destroy(self):
+        self.loader.shutdown()
+        super().destroy()
+
     # ************************************Sidebar *************************************
     def _build_sidebar(self):
         self.sidebar_frame = ctk.CTkFrame(self, width=220, corner_radius=0,
@@ -67,8 +78,9 @@ class MainWindow(ctk.CTk):
 
         brand = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
         brand.pack(fill="x", padx=20, pady=(28, 24))
-        logo_img = ctk.CTkImage(Image.open(self.asset_logo_path), size=(48, 48))
-        ctk.CTkLabel(brand, image=logo_img, text="", width=48, height=48).pack(side="left", padx=(0, 8))
+        # the logo images are filled in after the first frame (_load_deferred_assets)
+        self._brand_logo = ctk.CTkLabel(brand, text="", width=48, height=48)
+        self._brand_logo.pack(side="left", padx=(0, 8))
         ctk.CTkLabel(brand, text="  SIS Admin",
                      font=ctk.CTkFont(family="Courier", size=18, weight="bold"),
                      text_color=TEXT_PRIMARY).pack(side="left")
@@ -97,13 +109,44 @@ class MainWindow(ctk.CTk):
             btn.pack(fill="x", padx=12, pady=3)
             self.nav_buttons.append((btn, color))
 
-        self._bottom_logo_img = ctk.CTkImage(
-            Image.open(self.asset_logo_path), size=(120, 120)
-        )
-        ctk.CTkLabel(
-            self.sidebar_frame, image=self._bottom_logo_img, text="",
-            width=120, height=120
-        ).pack(side="bottom", pady=16)
+        ctk.CTkButton(
+            self.sidebar_frame, text="🎓  Year End", anchor="w",
+            font=ctk.CTkFont(size=13), height=44,
+            corner_radius=10, border_width=0,
+            fg_color="transparent", hover_color="#21262d",
+            text_color=TEXT_MUTED, command=self.open_year_end_dialog
+        ).pack(fill="x", padx=12, pady=3)
+
+        if instrumentation.ENABLED:
+            # SIS_PROFILE=1: timers/counters for the hot paths
+            from gui.stats_panel import open_stats_panel
+            ctk.CTkButton(
+                self.sidebar_frame, text="📊  Stats", anchor="w",
+                font=ctk.CTkFont(size=13), height=44,
+                corner_radius=10, border_width=0,
+                fg_color="transparent", hover_color="#21262d",
+                text_color=TEXT_MUTED, command=lambda: open_stats_panel(self)
+            ).pack(fill="x", padx=12, pady=3)
+
+        self._bottom_logo = ctk.CTkLabel(self.sidebar_frame, text="",
+                                         width=120, height=120)
+        self._bottom_logo.pack(side="bottom", pady=16)
+
+    def _load_deferred_assets(self):
+        # Decoding the logo is the slowest part of building the window and none
+        # of it is needed to use the app, so it waits for the first frame.
+        self.iconphoto(True, logo_icon())
+        self._brand_logo.configure(image=logo(48))
+        self._bottom_logo.configure(image=logo(120))
+        startup.mark("deferred assets")
+        startup.report()
+
+    def _on_first_frame(self):
+        if self._first_frame_shown:
+            return
+        self._first_frame_shown = True
+        startup.mark("first frame")
+        self.after_idle(self._load_deferred_assets)
 
 
     def _set_active_nav(self, index):
@@ -129,6 +172,8 @@ class MainWindow(ctk.CTk):
 
     def clear_content(self):
         self.close_active_menu()
+        self.loader.cancel()
+        self._cancel_live_search()
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         self.content_frame.grid_columnconfigure(0, weight=1)
@@ -150,8 +195,9 @@ class MainWindow(ctk.CTk):
 
     # ************************************Common Controls ************************************
     def create_common_controls(self, title, accent, search_options, sort_options,
-                               file_key, display_keys, add_command=None):
+                               file_key, display_keys, add_command=None, import_command=None):
         self.clear_content()
+        search_options = dict(search_options, **{FUZZY_SEARCH_LABEL: "*"})
 
         # Row 0 — header
         header = ctk.CTkFrame(self.content_frame, fg_color="transparent")
@@ -191,6 +237,14 @@ class MainWindow(ctk.CTk):
             text_color="white", command=add_command
         ).pack(side="left", padx=(0, 12))
 
+        if import_command is not None:
+            ctk.CTkButton(
+                ctrl, text="⤓  Import", width=100, height=36,
+                corner_radius=8, font=ctk.CTkFont(size=13),
+                fg_color="#21262d", hover_color="#30363d",
+                text_color=TEXT_PRIMARY, command=import_command
+            ).pack(side="left", padx=(0, 12))
+
         self.search_entry = ctk.CTkEntry(
             ctrl, placeholder_text=f"Search {entity.lower()}s…",
             width=320, height=36, corner_radius=8,
@@ -198,6 +252,10 @@ class MainWindow(ctk.CTk):
             text_color=TEXT_PRIMARY, placeholder_text_color=TEXT_MUTED
         )
         self.search_entry.pack(side="left", padx=(0, 6))
+        self._last_search = None
+        self.search_entry.bind(
+            "<KeyRelease>",
+            lambda e: self._schedule_live_search(file_key, search_options, display_keys))
 
         self.search_var = ctk.StringVar(value=list(search_options.keys())[0])
         ctk.CTkOptionMenu(
@@ -206,7 +264,8 @@ class MainWindow(ctk.CTk):
             corner_radius=8, fg_color="#21262d",
             button_color=accent, button_hover_color=BG_CARD,
             text_color=TEXT_PRIMARY, dropdown_fg_color="#21262d",
-            dropdown_text_color=TEXT_PRIMARY
+            dropdown_text_color=TEXT_PRIMARY,
+            command=lambda _: self._schedule_live_search(file_key, search_options, display_keys)
         ).pack(side="left", padx=(0, 6))
 
         ctk.CTkButton(
@@ -265,7 +324,7 @@ class MainWindow(ctk.CTk):
                             display_keys)
 
     # ************************************Treeview ************************************
-    def setup_treeview(self, columns, accent=ACCENT_CYAN):
+    def setup_treeview(self, columns, accent=ACCENT_CYAN, selectmode="browse"):
         all_cols = columns + ("actions",)
 
         style = ttk.Style()
@@ -296,13 +355,14 @@ class MainWindow(ctk.CTk):
 
         self.tree = ttk.Treeview(container, columns=all_cols,
                                  show="headings", style="Modern.Treeview",
-                                 selectmode="browse")
+                                 selectmode=selectmode)
         v_scroll = ctk.CTkScrollbar(container, command=self.tree.yview,
                              button_color=accent, button_hover_color=BG_CARD)
         h_scroll = ctk.CTkScrollbar(container, orientation="horizontal",
                              command=self.tree.xview,
                              button_color=accent, button_hover_color=BG_CARD)
         self.tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        self.table = VirtualTable(self.tree)
         self.tree.grid(row=0, column=0, sticky="nsew")
         v_scroll.grid(row=0, column=1, sticky="ns")
         h_scroll.grid(row=1, column=0, sticky="ew")
@@ -330,83 +390,129 @@ class MainWindow(ctk.CTk):
 
     # ************************************ Pagination ************************************
 
+    @timed()
     def setup_pagination(self, display_keys):
         rows_per_page = self._get_rows_per_page()
-        
-        if hasattr(self, 'pagination_frame') and self.pagination_frame.winfo_exists():
-            self.pagination_frame.destroy()
+        self._pager_display_keys = display_keys
+
+        # The bar is built once per view; later refreshes only re-configure
+        # the widgets whose text/colour/visibility actually changed.
+        if not (hasattr(self, 'pagination_frame') and self.pagination_frame.winfo_exists()):
+            self._build_pagination()
+
+        if self._previewing():
+            # While loading: an estimated total, and only the pages whose
+            # cursor is known (the ones visited, plus the next one)
+            preview     = self._preview
+            total_pages = len(preview["cursors"])
+            shown       = preview["shown"]
+            start = (self.current_page - 1) * rows_per_page + 1 if shown else 0
+            end   = start + shown - 1 if shown else 0
+            of    = f"{'' if preview['exact'] else '≈'}{preview['total']}"
+        else:
+            total       = len(self.current_data)
+            total_pages = max(1, -(-total //  rows_per_page))
+            start = (self.current_page - 1) * rows_per_page + 1 if total else 0
+            end   = min(self.current_page * rows_per_page, total)
+            of    = total
+
+        self._pager_set(self._pager_label, text=f"Showing {start}–{end} of {of} records")
+
+        has_prev = self.current_page > 1
+        has_next = self.current_page < total_pages
+        self._pager_set(self._pager_prev,
+                        text_color=TEXT_PRIMARY if has_prev else TEXT_MUTED,
+                        state="normal" if has_prev else "disabled")
+        self._pager_set(self._pager_next,
+                        text_color=TEXT_PRIMARY if has_next else TEXT_MUTED,
+                        state="normal" if has_next else "disabled")
 
+        page_range_start = max(1, self.current_page - 2)
+        page_range_end   = min(total_pages, self.current_page + 2)
+
+        self._pager_show(self._pager_first, page_range_start > 1)
+        self._pager_show(self._pager_gap_left, page_range_start > 2)
+        self._pager_show(self._pager_gap_right, page_range_end < total_pages - 1)
+        self._pager_show(self._pager_last, page_range_end < total_pages)
+        self._pager_set(self._pager_last, text=str(total_pages))
+        self._pager_total = total_pages
+
+        pages = list(range(page_range_start, page_range_end + 1))
+        self._pager_pages = pages
+        for slot, btn in enumerate(self._pager_window):
+            if slot < len(pages):
+                is_current = pages[slot] == self.current_page
+                self._pager_set(btn, text=str(pages[slot]),
+                                fg_color=ACCENT_CYAN if is_current else "#21262d",
+                                text_color="#0d1117" if is_current else TEXT_PRIMARY,
+                                font=self._pager_fonts[is_current])
+            self._pager_show(btn, slot < len(pages))
+
+    def _build_pagination(self):
         self.pagination_frame = ctk.CTkFrame(self.content_frame,
                                              fg_color="transparent")
         self.pagination_frame.grid(row=4, column=0, sticky="ew",
                                    padx=24, pady=(0, 16))
+        self._pager_state = {}
+        self._pager_pages = []
+        self._pager_total = 1
+        self._pager_fonts = {False: ctk.CTkFont(size=12, weight="normal"),
+                             True:  ctk.CTkFont(size=12, weight="bold")}
 
-        total       = len(self.current_data)
-        total_pages = max(1, -(-total //  rows_per_page))
-        start = (self.current_page - 1) * rows_per_page + 1 if total else 0
-        end   = min(self.current_page * rows_per_page, total)
-
-        ctk.CTkLabel(
-            self.pagination_frame,
-            text=f"Showing {start}–{end} of {total} records",
-            font=ctk.CTkFont(size=12), text_color=TEXT_MUTED
-        ).pack(side="left")
+        self._pager_label = ctk.CTkLabel(self.pagination_frame, text="",
+                                         font=ctk.CTkFont(size=12), text_color=TEXT_MUTED)
+        self._pager_label.pack(side="left")
 
         nav = ctk.CTkFrame(self.pagination_frame, fg_color="transparent")
         nav.pack(side="right")
 
         def go_to(page):
             self.current_page = page
-            self.refresh_table(display_keys)
-
-        ctk.CTkButton(
-            nav, text="←", width=36, height=30, corner_radius=6,
-            fg_color="#21262d", hover_color="#30363d",
-            text_color=TEXT_PRIMARY if self.current_page > 1 else TEXT_MUTED,
-            state="normal" if self.current_page > 1 else "disabled",
-            command=lambda: go_to(self.current_page - 1)
-        ).pack(side="left", padx=2)
-
-        page_range_start = max(1, self.current_page - 2)
-        page_range_end   = min(total_pages, self.current_page + 2)
-
-        if page_range_start > 1:
-            ctk.CTkButton(nav, text="1", width=36, height=30, corner_radius=6,
-                          fg_color="#21262d", hover_color="#30363d",
-                          text_color=TEXT_PRIMARY,
-                          command=lambda: go_to(1)).pack(side="left", padx=2)
-            if page_range_start > 2:
-                ctk.CTkLabel(nav, text="…", text_color=TEXT_MUTED,
-                             font=ctk.CTkFont(size=12)).pack(side="left", padx=2)
-
-        for p in range(page_range_start, page_range_end + 1):
-            is_current = p == self.current_page
-            ctk.CTkButton(
-                nav, text=str(p), width=36, height=30, corner_radius=6,
-                fg_color=ACCENT_CYAN if is_current else "#21262d",
-                hover_color="#30363d",
-                text_color="#0d1117" if is_current else TEXT_PRIMARY,
-                font=ctk.CTkFont(size=12,
-                                 weight="bold" if is_current else "normal"),
-                command=lambda pg=p: go_to(pg)
-            ).pack(side="left", padx=2)
-
-        if page_range_end < total_pages:
-            if page_range_end < total_pages - 1:
-                ctk.CTkLabel(nav, text="…", text_color=TEXT_MUTED,
-                             font=ctk.CTkFont(size=12)).pack(side="left", padx=2)
-            ctk.CTkButton(nav, text=str(total_pages), width=36, height=30,
-                          corner_radius=6, fg_color="#21262d",
-                          hover_color="#30363d", text_color=TEXT_PRIMARY,
-                          command=lambda: go_to(total_pages)).pack(side="left", padx=2)
-
-        ctk.CTkButton(
-            nav, text="→", width=36, height=30, corner_radius=6,
-            fg_color="#21262d", hover_color="#30363d",
-            text_color=TEXT_PRIMARY if self.current_page < total_pages else TEXT_MUTED,
-            state="normal" if self.current_page < total_pages else "disabled",
-            command=lambda: go_to(self.current_page + 1)
-        ).pack(side="left", padx=2)
+            self.refresh_table(self._pager_display_keys)
+
+        def nav_button(text, command):
+            return ctk.CTkButton(nav, text=text, width=36, height=30, corner_radius=6,
+                                 fg_color="#21262d", hover_color="#30363d",
+                                 text_color=TEXT_PRIMARY, command=command)
+
+        def gap():
+            return ctk.CTkLabel(nav, text="…", text_color=TEXT_MUTED,
+                                font=ctk.CTkFont(size=12))
+
+        self._pager_prev      = nav_button("←", lambda: go_to(self.current_page - 1))
+        self._pager_first     = nav_button("1", lambda: go_to(1))
+        self._pager_gap_left  = gap()
+        self._pager_window    = [nav_button("", lambda slot=slot: go_to(self._pager_pages[slot]))
+                                 for slot in range(5)]
+        self._pager_gap_right = gap()
+        self._pager_last      = nav_button("", lambda: go_to(self._pager_total))
+        self._pager_next      = nav_button("→", lambda: go_to(self.current_page + 1))
+
+        order = ([self._pager_prev, self._pager_first, self._pager_gap_left]
+                 + self._pager_window
+                 + [self._pager_gap_right, self._pager_last, self._pager_next])
+        for column, widget in enumerate(order):
+            widget.grid(row=0, column=column, padx=2)
+            self._pager_state[(id(widget), "visible")] = True
+
+    def _pager_set(self, widget, **options):
+        # configure() only the options whose value differs from last time
+        changed = {k: v for k, v in options.items()
+                   if self._pager_state.get((id(widget), k)) != v}
+        if changed:
+            count("tk.pager.configure")
+            widget.configure(**changed)
+            for k, v in changed.items():
+                self._pager_state[(id(widget), k)] = v
+
+    def _pager_show(self, widget, visible):
+        key = (id(widget), "visible")
+        if self._pager_state.get(key) != visible:
+            if visible:
+                widget.grid()
+            else:
+                widget.grid_remove()
+            self._pager_state[key] = visible
        
     # ************************************ Views ************************************
     def show_students_view(self):
@@ -426,22 +532,19 @@ class MainWindow(ctk.CTk):
 
         self.create_common_controls("Student Records", ACCENT_CYAN,
                                     search_opts, sort_opts, "students",
-                                    display_keys, lambda: open_student_form(self))
+                                    display_keys, lambda: self.open_form("students"),
+                                    import_command=self.open_import_dialog)
         self.setup_treeview(("id", "firstname", "lastname",
                              "program_code", "year", "gender", "college"),
-                            accent=ACCENT_CYAN)
+                            accent=ACCENT_CYAN, selectmode="extended")   # Ctrl/Shift-click for batch actions
         self.tree.column("firstname", width=160)
-        self.current_data = read_csv("students")
-        self.update_idletasks() 
-        self.after(150, lambda: self.refresh_table(display_keys))
+        self.load_view_data("students", display_keys)
 
     def show_programs_view(self):
         self._set_active_nav(1)
         self.clear_content()
         self.current_page  = 1
         self.sort_reverse  = False
-        self.current_data  = read_csv("programs")
-        self.update_idletasks() 
         search_opts  = {"Code": "code", "Name": "name", "College": "college_code"}
         display_keys = ["code", "name", "college_code"]
 
@@ -450,117 +553,272 @@ class MainWindow(ctk.CTk):
 
         self.create_common_controls("Program Management", ACCENT_PURP,
                                     search_opts, search_opts, "programs",
-                                    display_keys, lambda: open_program_form(self))
+                                    display_keys, lambda: self.open_form("programs"))
         self.setup_treeview(("code", "name", "college_code"), accent=ACCENT_PURP)
         self.tree.column("name", width=420, anchor="w")
-        self.after(150, lambda: self.refresh_table(display_keys))
+        self.load_view_data("programs", display_keys)
 
     def show_colleges_view(self):
         self._set_active_nav(2)
         self.clear_content()
         self.current_page  = 1
         self.sort_reverse  = False
-        self.current_data  = read_csv("colleges")
         search_opts  = {"Code": "code", "Name": "name"}
         display_keys = ["code", "name"]
-        self.update_idletasks() 
         self.current_file_key     = "colleges"
         self.current_display_keys = display_keys[:]
 
         self.create_common_controls("College Management", ACCENT_GREEN,
                                     search_opts, search_opts, "colleges",
-                                    display_keys, lambda: open_college_form(self))
+                                    display_keys, lambda: self.open_form("colleges"))
         self.setup_treeview(("code", "name"), accent=ACCENT_GREEN)
         self.tree.column("name", width=520, anchor="w")
-        self.after(150, lambda: self.refresh_table(display_keys))
+        self.load_view_data("colleges", display_keys)
+
+    def load_view_data(self, file_key, display_keys):
+        # Parse the table on the loader thread; the view shows a loading row
+        # until the data (and the Treeview's real height) are available.
+        self.current_data = []
+        self._preview     = None
+        self.table.render([self._placeholder_row(display_keys, "Loading…")], [("empty",)])
+        self.count_label.configure(text="  Loading…  ")
+
+        def show():
+            self.refresh_table(display_keys)
+            self._on_first_frame()
+
+        def on_loaded(rows):
+            # same table order as the preview pages, so the current page stays put
+            self.current_data = rows
+            self._preview     = None
+            self._when_tree_ready(show)
+
+        def on_failed(error):
+            self._show_load_failed(display_keys)
+
+        if not is_cached(file_key):
+            self._show_preview(file_key, display_keys)
+
+        # a view over the shared cached rows (see _whole_table), not a copy of them
+        self.loader.submit(lambda: self._whole_table(get_rows(file_key)), on_loaded, on_failed)
+
+    def _show_load_failed(self, display_keys):
+        self._preview = None
+        self.table.render([self._placeholder_row(display_keys, "Could not load records")],
+                          [("empty",)])
+        self.count_label.configure(text="  0 records  ")
+        self._on_first_frame()
+
+    def _run_on_loader(self, file_key, work, on_done, display_keys, busy_text):
+        # Sort and search need the whole table. They run on the loader thread
+        # like the load itself: submitting supersedes a load still in flight
+        # (so it can't paint the whole table over the result later) and waits
+        # for its parse there instead of on the Tk thread.
+        if not is_cached(file_key):
+            self.count_label.configure(text=f"  {busy_text}  ")
+        self.loader.submit(work, on_done, lambda error: self._show_load_failed(display_keys))
+
+    def _show_preview(self, file_key, display_keys):
+        # Until the whole table is parsed, pages are read straight from storage
+        # through page_rows() cursors (each read stops after its page) and the
+        # count is an estimate. ← / → and the pages already visited work while
+        # it loads; sorting, search and jumping further ahead use the full table.
+        total, exact  = estimate_count(file_key)
+        self._preview = {"file_key": file_key, "total": total, "exact": exact,
+                         "per_page": None, "cursors": [None], "shown": 0}
+
+        def show():
+            if self._previewing() and self._preview["file_key"] == file_key:
+                self.refresh_table(display_keys)
+                self._on_first_frame()
+
+        self._when_tree_ready(show)
+
+    def _previewing(self):
+        return self._preview is not None and self._preview["file_key"] == self.current_file_key
+
+    def _refresh_preview(self, display_keys):
+        preview  = self._preview
+        per_page = self._get_rows_per_page()
+        if preview["per_page"] != per_page:
+            # cursors mark page boundaries, so a new page size starts over
+            preview.update(per_page=per_page, cursors=[None])
+            self.current_page = 1
+        cursors = preview["cursors"]   # cursors[n - 1] is where page n starts
+        self.current_page = max(1, min(self.current_page, len(cursors)))
+        rows, next_cursor = page_rows(preview["file_key"], per_page, cursors[self.current_page - 1])
+        if next_cursor is not None and self.current_page == len(cursors):
+            cursors.append(next_cursor)
+        preview["shown"] = len(rows)
+
+        if rows:
+            college_map = program_college_map() if preview["file_key"] == "students" else None
+            self.table.render(*page_values(rows, display_keys, college_map))
+        else:
+            self.table.render([self._placeholder_row(display_keys, "No records found")],
+                              [("empty",)])
+        self.count_label.configure(
+            text=f"  {'' if preview['exact'] else '≈'}{preview['total']} records  ")
+        self.setup_pagination(display_keys)
+
+    def _when_tree_ready(self, callback, attempts=20):
+        # Rows-per-page comes from the Treeview's height, which is only known
+        # once Tk has laid the view out.
+        if not self.tree.winfo_exists():
+            return
+        if self.tree.winfo_height() <= 1 and attempts > 0:
+            self.after(30, lambda: self._when_tree_ready(callback, attempts - 1))
+        else:
+            callback()
+
+    def _placeholder_row(self, display_keys, text):
+        num_cols   = len(display_keys) + 1
+        values     = [""] * num_cols
+        values[num_cols // 2] = text
+        return values
 
     # ************************************ Data Operations ************************************
     def sort_view_data(self, file_key, sort_col, display_keys):
-        if not hasattr(self, 'current_data') or not self.current_data:
-            self.current_data = read_csv(file_key)
-
-        if sort_col == "college" and file_key == "students":
-            programs_list = read_csv("programs")
-            prog_to_col   = {p['code']: p.get('college_code', '') for p in programs_list}
-            self.current_data.sort(
-                key=lambda x: str(prog_to_col.get(x.get('program_code'), "")).lower(),
-                reverse=self.sort_reverse
-            )
-        else:
-            self.current_data.sort(
-                key=lambda x: str(x.get(sort_col, "")).lower(),
-                reverse=self.sort_reverse
-            )
+        current   = self.current_data
+        positions = self._current_positions()
+        reverse   = self.sort_reverse
+
+        def work():
+            # Orderings are cached per table version, so after the first sort
+            # (and for every ASC/DESC toggle) this is only a lookup.
+            rows = get_rows(file_key)
+            data = current or self._whole_table(rows)
+            if positions is not None:
+                ranks = sort_ranks(file_key, sort_col)
+                return rows, sorted(positions, key=ranks.__getitem__, reverse=reverse)
+            if len(data) == len(rows):
+                return OrderedRows(rows, sort_order(file_key, sort_col), reverse), None
+            if sort_col == "college" and file_key == "students":
+                prog_to_col = program_college_map()
+                return sorted(data,
+                              key=lambda x: str(prog_to_col.get(x.get('program_code'), "")).lower(),
+                              reverse=reverse), None
+            return sorted(data, key=lambda x: str(x.get(sort_col, "")).lower(),
+                          reverse=reverse), None
+
+        def on_sorted(result):
+            data, sorted_positions = result
+            self._preview = None   # sorting needs the whole table
+            if sorted_positions is not None:
+                self._set_view(data, sorted_positions)
+            else:
+                self.current_data = data
+            self.current_page = 1
+            self.refresh_table(display_keys)
 
-        self.current_page = 1
-        self.refresh_table(display_keys)
+        self._run_on_loader(file_key, work, on_sorted, display_keys, "Sorting…")
+
+    def _whole_table(self, rows):
+        # Students are kept column-wise (modules/columnar.py); wrapping the
+        # table instead of list()-ing it means a row view only exists for the
+        # rows on the current page.
+        return OrderedRows(rows, range(len(rows)))
+
+    def _set_view(self, rows, positions):
+        # Remember which table rows the view holds so sorts can use the cached ranks
+        self.current_data    = OrderedRows(rows, positions)
+        self._view_positions = positions
+        self._view_of        = self.current_data
+
+    def _current_positions(self):
+        if self._view_positions is not None and self._view_of is self.current_data:
+            return self._view_positions
+        return None
 
     def search_view_data(self, file_key, search_map, display_keys):
+        self._cancel_live_search()
         query            = self.search_entry.get().strip().lower()
         column_to_search = search_map[self.search_var.get()]
-        all_data         = read_csv(file_key)
-
-        if not query:
-            self.current_data = all_data
-        else:
-            self.current_data = []
-            if column_to_search == "college" and file_key == "students":
-                progs   = read_csv("programs")
-                mapping = {p['code']: p.get('college_code', '').lower() for p in progs}
-                for row in all_data:
-                    if query in mapping.get(row.get('program_code', ''), ''):
-                        self.current_data.append(row)
+        last             = getattr(self, '_last_search', None)
+
+        def work():
+            rows    = get_rows(file_key)
+            version = table_version(file_key)
+            if not query:
+                positions = None
+            elif column_to_search == "*":
+                # ranked, typo-tolerant match over every field (best match first)
+                positions = search_positions(file_key, query)
+            elif column_to_search == "college" and file_key == "students":
+                positions = students_in_college_matching(query)
+            elif (last and last[:3] == (file_key, column_to_search, version)
+                    and query.startswith(last[3])):
+                # The query only got longer: narrow the previous matches
+                # instead of going back to the whole table.
+                positions = [pos for pos in last[4]
+                             if str(rows[pos].get(column_to_search, "")).lower().startswith(query)]
+            else:
+                positions = prefix_search(file_key, column_to_search, query)
+            return rows, version, positions
+
+        def on_found(result):
+            rows, version, positions = result
+            self._preview = None   # so does search
+            if positions is None:
+                self._last_search = None
+                self.current_data = self._whole_table(rows)
             else:
-                for row in all_data:
-                    cell_value = str(row.get(column_to_search, "")).lower()
-                    if cell_value.startswith(query):
-                        self.current_data.append(row)
+                self._last_search = (file_key, column_to_search, version, query, positions)
+                self._set_view(rows, positions)
+            self.current_page = 1
+            self.refresh_table(display_keys)
 
-        self.current_page = 1
-        self.refresh_table(display_keys)
+        self._run_on_loader(file_key, work, on_found, display_keys, "Searching…")
 
+    def _schedule_live_search(self, file_key, search_map, display_keys):
+        # Debounce: only search once typing pauses for SEARCH_DELAY_MS.
+        self._cancel_live_search()
+        self._search_after_id = self.after(
+            SEARCH_DELAY_MS,
+            lambda: self.search_view_data(file_key, search_map, display_keys))
+
+    def _cancel_live_search(self):
+        after_id = getattr(self, '_search_after_id', None)
+        if after_id is not None:
+            self.after_cancel(after_id)
+            self._search_after_id = None
+
+    @timed()
     def refresh_table(self, display_keys):
+        if self._previewing():
+            return self._refresh_preview(display_keys)
         rows_per_page = self._get_rows_per_page()
-        try:
-            programs_list = read_csv("programs")
-            prog_to_col   = {p['code']: p.get('college_code', 'N/A') for p in programs_list}
-        except:
-            prog_to_col = {}
+        college_map = program_college_map() if self.current_file_key == "students" else None
 
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         start_idx = (self.current_page - 1) * rows_per_page
         end_idx   = start_idx + rows_per_page
         page_data = self.current_data[start_idx:end_idx]
 
         if not page_data:
-            num_cols   = len(display_keys) + 1
-            empty_vals = [""] * num_cols
-            empty_vals[num_cols // 2] = "No records found"
-            self.tree.insert("", "end", values=empty_vals, tags=("empty",))
+            page_rows = [self._placeholder_row(display_keys, "No records found")]
+            page_tags = [("empty",)]
         else:
-            for i, s in enumerate(page_data):
-                row_values = []
-                for key in display_keys:
-                    if key == "college" and self.current_file_key == "students":
-                        val = prog_to_col.get(s.get('program_code'), "—")
-                    else:
-                        val = s.get(key, "—")
-                    if isinstance(val, str) and val.startswith("__deleted__"):
-                        val = f"[Deleted] {val[len('__deleted__'):]}"
-                    row_values.append(val)
-                row_values.append("⋯  Actions")
-                tag = "evenrow" if i % 2 == 0 else "oddrow"
-                self.tree.insert("", "end", values=row_values, tags=(tag,))
+            page_rows, page_tags = page_values(page_data, display_keys, college_map)
+        self.table.render(page_rows, page_tags)
 
         if hasattr(self, 'count_label'):
             total = len(self.current_data)
-            self.count_label.configure(text=f"  {total} record{'s' if total != 1 else ''}  ")
+            count_text = f"  {total} record{'s' if total != 1 else ''}  "
+            if self.count_label.cget("text") != count_text:
+                self.count_label.configure(text=count_text)
 
         self.setup_pagination(display_keys)
 
     # ************************************ Edit / Delete ************************************
+    def show_saved_changes(self):
+        # After a form saves: the write already updated the cached table, so
+        # view it as is (no copy of the rows) and stay on the same page.
+        self._preview     = None
+        self.current_data = self._whole_table(get_rows(self.current_file_key))
+        total_pages = max(1, -(-len(self.current_data) // self._get_rows_per_page()))
+        self.current_page = min(self.current_page, total_pages)
+        self.refresh_table(self.current_display_keys)
+
     def handle_delete(self, file_key, display_keys):
         rows_per_page=self._get_rows_per_page()
         selected_item = self.tree.selection()
@@ -587,19 +845,28 @@ class MainWindow(ctk.CTk):
             return
         item_values = self.tree.item(selected_item)['values']
 
-        pk = "id" if file_key == "students" else "code"
-        all_data = read_csv(file_key)
-        raw = next((row for row in all_data if str(row.get(pk)) == str(item_values[0])), None)
-        if raw is None:
+        if find_row(file_key, str(item_values[0])) is None:
             return
-        raw_values = [raw.get(k, "") for k in display_keys] + ["⋯  Actions"]
-        
+        self.open_form(file_key, edit_data=item_values)
+
+    # The form modules (and the bulk import / multiprocessing code behind the
+    # student form) are only imported the first time a form is opened.
+    def open_form(self, file_key, edit_data=None):
         if file_key == "students":
-            open_student_form(self, edit_data=item_values)
+            from gui.student_forms import open_student_form as open_form
         elif file_key == "programs":
-            open_program_form(self, edit_data=item_values)
-        elif file_key == "colleges":
-            open_college_form(self, edit_data=item_values)
+            from gui.programs_forms import open_program_form as open_form
+        else:
+            from gui.college_forms import open_college_form as open_form
+        open_form(self, edit_data=edit_data)
+
+    def open_import_dialog(self):
+        from gui.student_forms import open_import_dialog
+        open_import_dialog(self)
+
+    def open_year_end_dialog(self):
+        from gui.student_forms import open_year_end_dialog
+        open_year_end_dialog(self)
 
     def _open_delete_confirm(self):
         selected_item = self.tree.selection()
@@ -625,8 +892,11 @@ class MainWindow(ctk.CTk):
             action_col_index = f"#{len(columns)}"
             if column == action_col_index:
                 item_id = self.tree.identify_row(event.y)
-                self.tree.selection_set(item_id)
+                # clicking Actions on a row of a multi-selection acts on all of it
+                if item_id not in self.tree.selection():
+                    self.tree.selection_set(item_id)
                 self.show_action_menu(item_id)
+                return "break"   # keep the Treeview's own click from resetting the selection
 
     def show_action_menu(self, item_id):
         self.close_active_menu()
@@ -649,6 +919,11 @@ class MainWindow(ctk.CTk):
             activebackground=ACCENT_CYAN, activeforeground="#0d1117",
             bd=0, relief="flat", font=("Courier", 12)
         )
+        selected = self.tree.selection()
+        if self.current_file_key == "students" and len(selected) > 1:
+            self._add_batch_actions([str(self.tree.item(i)['values'][0]) for i in selected])
+            self.active_menu.post(menu_x, menu_y)
+            return
         self.active_menu.add_command(
             label="  ✎   Edit Record  ",
             command=lambda: self.handle_edit(self.current_file_key,
@@ -662,7 +937,27 @@ class MainWindow(ctk.CTk):
             command=lambda: self._open_delete_confirm()
         )
         self.active_menu.post(menu_x, menu_y) 
-        
+
+    def _add_batch_actions(self, student_ids):
+        # one set-based change and one write per action, whatever the count
+        from gui.student_forms import open_batch_delete, open_batch_move, open_batch_promote
+        n = len(student_ids)
+        self.active_menu.add_command(
+            label=f"  ⇪   Promote {n} Students  ",
+            command=lambda: open_batch_promote(self, student_ids)
+        )
+        self.active_menu.add_command(
+            label=f"  ⇄   Move {n} to Program…",
+            command=lambda: open_batch_move(self, student_ids)
+        )
+        self.active_menu.add_separator()
+        self.active_menu.add_command(
+            label=f"  🗑   Delete {n} Students",
+            foreground=ACCENT_RED,
+            activebackground=ACCENT_RED, activeforeground="white",
+            command=lambda: open_batch_delete(self, student_ids)
+        )
+
     def _get_rows_per_page(self):
             #Calculate how many rows fit in the current treeview height.
             try:
@@ -1,8 +1,7 @@
 import customtkinter as ctk
-from PIL import Image
-import os
-from modules.database_io import read_csv, write_csv
-from modules.validators import validate_program
+from modules.database_io import read_csv
+from modules import service
+from gui.assets import logo
 
 BG_BASE     = "#0d1117"
 BG_FORM     = "#1c2230"
@@ -14,10 +13,6 @@ TEXT_PRIMARY= "#e6edf3"
 TEXT_MUTED  = "#8b949e"
 BORDER      = "#30363d"
 
-# Get project root for asset paths
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-ASSET_LOGO_PATH = os.path.join(PROJECT_ROOT, "assets", "logo.png")
-
 def styled_label(parent, text):
     return ctk.CTkLabel(parent, text=text, font=ctk.CTkFont(size=12),
                         text_color=TEXT_MUTED)
@@ -40,8 +35,8 @@ def styled_option(parent, values, variable, width=340):
 
 def handle_delete(app, edit_data):
     code = str(edit_data[0])
-    all_students = read_csv("students")
-    affected = [s for s in all_students if s.get('program_code') == code]
+    affected = service.delete_impact("programs", code)["students"]
+    version  = service.record_version("programs", code)
 
     confirm = ctk.CTkToplevel(app)
     confirm.title("Confirm Delete")
@@ -57,28 +52,21 @@ def handle_delete(app, edit_data):
     ctk.CTkLabel(confirm, text=f"Delete program '{code}'?",
                  font=ctk.CTkFont(size=15, weight="bold"),
                  text_color=TEXT_PRIMARY).pack(pady=(24, 4))
-    msg = (f"⚠  {len(affected)} student(s) will be unassigned."
+    msg = (f"⚠  {affected} student(s) will be unassigned."
            if affected else "This cannot be undone.")
-    ctk.CTkLabel(confirm, text=msg,
-                 text_color="#f59e0b" if affected else TEXT_MUTED).pack()
+    note = ctk.CTkLabel(confirm, text=msg, wraplength=440,
+                        text_color="#f59e0b" if affected else TEXT_MUTED)
+    note.pack()
 
     bf = ctk.CTkFrame(confirm, fg_color="transparent")
     bf.pack(pady=20)
 
     def confirm_delete():
-        all_p = read_csv("programs")
-        updated_p = [p for p in all_p if p['code'] != code]
-        write_csv("programs", updated_p)
-        if affected:
-            all_s = read_csv("students")
-            updated_s = []
-            for s in all_s:
-                if s.get('program_code') == code:
-                    s['program_code'] = f"__deleted__{code}"
-                updated_s.append(s)
-            write_csv("students", updated_s)
-        app.current_data = read_csv(app.current_file_key)
-        app.refresh_table(app.current_display_keys)
+        ok, msg = service.delete_program(code, expected_version=version)
+        if not ok:
+            note.configure(text=msg, text_color=ACCENT_RED)
+            return
+        app.show_saved_changes()
         confirm.destroy()
 
     ctk.CTkButton(bf, text="Yes, Delete", fg_color=ACCENT_RED,
@@ -90,6 +78,7 @@ def handle_delete(app, edit_data):
     
 def open_program_form(app, edit_data=None):
     is_edit = edit_data is not None
+    version = service.record_version("programs", str(edit_data[0])) if is_edit else None
 
     form = ctk.CTkToplevel(app)
     form.title("Edit Program" if is_edit else "Add Program")
@@ -108,8 +97,7 @@ def open_program_form(app, edit_data=None):
     header.pack_propagate(False)
     ctk.CTkFrame(header, width=4, fg_color=ACCENT_PURP,
                  corner_radius=0).pack(side="left", fill="y")
-    logo_img = ctk.CTkImage(Image.open(ASSET_LOGO_PATH), size=(48, 48))
-    ctk.CTkLabel(header, image=logo_img, text="", width=48, height=48).pack(side="left", padx=(8, 4))
+    ctk.CTkLabel(header, image=logo(48), text="", width=48, height=48).pack(side="left", padx=(8, 4))
     ctk.CTkLabel(header,
                  text="Edit Program" if is_edit else "Add Program",
                  font=ctk.CTkFont(size=18, weight="bold"),
@@ -149,28 +137,16 @@ def open_program_form(app, edit_data=None):
         name = name_entry.get().strip()
         program_data = {"code": code, "name": name, "college_code": college_var.get()}
 
-        is_valid, msg = validate_program(program_data, is_edit=is_edit)
-        if not is_valid:
+        if is_edit:
+            ok, msg = service.update_program(code, program_data, expected_version=version)
+        else:
+            # also re-links students unassigned when the program was deleted
+            ok, msg = service.add_program(program_data)
+        if not ok:
             error_label.configure(text=msg)
             return
 
-        all_programs = read_csv("programs")
-        if is_edit:
-            updated = [program_data if p['code'] == code else p for p in all_programs]
-        else:
-            updated = all_programs + [program_data]
-            # Re-link unassigned students back to this program
-            all_students = read_csv("students")
-            relinked_students = []
-            for s in all_students:
-                if s.get('program_code') == f"__deleted__{code}":
-                    s['program_code'] = code
-                relinked_students.append(s)
-            write_csv("students", relinked_students)
-
-        write_csv("programs", updated)
-        app.current_data = read_csv("programs")
-        app.refresh_table(app.current_display_keys)
+        app.show_saved_changes()
         form.destroy()
 
 
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+from modules import instrumentation
+
+#Boot timing. main.py marks the end of each startup phase and MainWindow marks
+#the first usable frame (the first view's rows on screen) and the deferred
+#assets loaded after it. With SIS_STARTUP_REPORT=1 the phases are printed to
+#stderr; with SIS_PROFILE=1 they also show up as startup.* timers.
+
+REPORT = os.environ.get("SIS_STARTUP_REPORT", "").lower() not in ("", "0", "false", "no")
+
+_started = time.perf_counter()
+_marks   = []   # (phase, perf_counter at its end)
+
+
+def begin(started):
+    """Measure from `started` (a perf_counter() taken first thing in main.py)."""
+    global _started
+    _started = started
+
+
+def mark(phase):
+    _marks.append((phase, time.perf_counter()))
+
+
+def report(stream=None):
+    """Record the phases as timers and, if SIS_STARTUP_REPORT is set, print them."""
+    previous = _started
+    lines = []
+    for phase, at in _marks:
+        instrumentation.record(f"startup.{phase}", at - previous)
+        lines.append(f"  {phase:<18}{(at - previous) * 1000:9.1f} ms"
+                     f"{(at - _started) * 1000:10.1f} ms")
+        previous = at
+    if REPORT and lines:
+        print("startup             phase      total", file=stream or sys.stderr)
+        print("\n".join(lines), file=stream or sys.stderr)
+    _marks.clear()
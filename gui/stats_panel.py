@@ -0,0 +1,81 @@
+import customtkinter as ctk
+from modules.instrumentation import DUMP_PATH, dump, reset, snapshot
+
+# Palette
+BG_FORM     = "#1c2230"
+BG_INPUT    = "#21262d"
+ACCENT_CYAN = "#00d4ff"
+TEXT_PRIMARY= "#e6edf3"
+TEXT_MUTED  = "#8b949e"
+BORDER      = "#30363d"
+
+REFRESH_MS = 1000
+
+
+def _format(stats):
+    lines = [f"{'timer':<44}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}"]
+    for name, t in sorted(stats["timers"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:<44}{t['calls']:>8}{t['total_ms']:>12.1f}"
+                     f"{t['mean_ms']:>10.2f}{t['max_ms']:>10.1f}")
+    if stats["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<44}{'count':>8}")
+        for name, value in stats["counters"].items():
+            lines.append(f"{name:<44}{value:>8}")
+    return "\n".join(lines)
+
+
+def open_stats_panel(app):
+    existing = getattr(app, "_stats_panel", None)
+    if existing is not None and existing.winfo_exists():
+        existing.lift()
+        return
+
+    panel = ctk.CTkToplevel(app)
+    app._stats_panel = panel
+    panel.title("Performance Stats")
+    panel.configure(fg_color=BG_FORM)
+    _w, _h = 860, 520
+    _x = (panel.winfo_screenwidth()  - _w) // 2
+    _y = (panel.winfo_screenheight() - _h) // 2
+    panel.geometry(f"{_w}x{_h}+{_x}+{_y}")
+
+    ctk.CTkLabel(panel, text="Performance Stats",
+                 font=ctk.CTkFont(size=15, weight="bold"),
+                 text_color=TEXT_PRIMARY).pack(pady=(16, 2))
+    status = ctk.CTkLabel(panel, text=f"Dumped to {DUMP_PATH} periodically",
+                          font=ctk.CTkFont(size=11), text_color=TEXT_MUTED)
+    status.pack()
+
+    text = ctk.CTkTextbox(panel, corner_radius=8, fg_color=BG_INPUT,
+                          text_color=TEXT_PRIMARY,
+                          font=ctk.CTkFont(family="Courier", size=11))
+    text.pack(fill="both", expand=True, padx=16, pady=12)
+
+    shown = {"text": None}
+
+    def refresh():
+        if not panel.winfo_exists():
+            return
+        content = _format(snapshot())
+        if content != shown["text"]:
+            text.configure(state="normal")
+            text.delete("1.0", "end")
+            text.insert("1.0", content)
+            text.configure(state="disabled")
+            shown["text"] = content
+        panel.after(REFRESH_MS, refresh)
+
+    def dump_now():
+        status.configure(text=f"Written to {DUMP_PATH}" if dump() else f"Could not write {DUMP_PATH}")
+
+    bf = ctk.CTkFrame(panel, fg_color="transparent")
+    bf.pack(pady=(0, 14))
+    ctk.CTkButton(bf, text="Reset", fg_color=BG_INPUT, hover_color=BORDER,
+                  width=100, height=34, corner_radius=8,
+                  command=reset).pack(side="left", padx=6)
+    ctk.CTkButton(bf, text="Dump JSON", fg_color=ACCENT_CYAN, hover_color=BORDER,
+                  text_color="#0d1117", width=110, height=34, corner_radius=8,
+                  command=dump_now).pack(side="left", padx=6)
+
+    refresh()
@@ -1,8 +1,12 @@
 import customtkinter as ctk
-from PIL import Image
 import os
-from modules.database_io import read_csv, write_csv
-from modules.validators import validate_student
+from datetime import datetime
+from tkinter import filedialog
+from modules.database_io import read_csv
+from modules import service, year_end
+from gui.loader import BackgroundLoader
+from modules.indexes import program_codes_in_college, college_of_program
+from gui.assets import logo
 
 # Palette
 BG_BASE     = "#0d1117"
@@ -15,10 +19,6 @@ TEXT_PRIMARY= "#e6edf3"
 TEXT_MUTED  = "#8b949e"
 BORDER      = "#30363d"
 
-# Get project root for asset paths
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-ASSET_LOGO_PATH = os.path.join(PROJECT_ROOT, "assets", "logo.png")
-
 def styled_label(parent, text, size=12, color=TEXT_MUTED):
     return ctk.CTkLabel(parent, text=text,
                         font=ctk.CTkFont(size=size),
@@ -40,6 +40,9 @@ def styled_option(parent, values, variable, width=340, accent=ACCENT_CYAN):
                              dropdown_fg_color="#21262d",
                              dropdown_text_color=TEXT_PRIMARY)
 def handle_delete(app, edit_data):
+    # the row as it is now; the delete is refused if it changes meanwhile
+    version = service.record_version("students", str(edit_data[0]))
+
     confirm = ctk.CTkToplevel(app)
     confirm.title("Confirm Delete")
     confirm.resizable(False, False)
@@ -55,18 +58,19 @@ def handle_delete(app, edit_data):
                  text=f"Delete student {edit_data[0]}?",
                  font=ctk.CTkFont(size=15, weight="bold"),
                  text_color=TEXT_PRIMARY).pack(pady=(24, 4))
-    ctk.CTkLabel(confirm, text="This cannot be undone.",
-                 text_color=TEXT_MUTED).pack()
+    note = ctk.CTkLabel(confirm, text="This cannot be undone.",
+                        text_color=TEXT_MUTED, wraplength=440)
+    note.pack()
 
     bf = ctk.CTkFrame(confirm, fg_color="transparent")
     bf.pack(pady=20)
 
     def confirm_delete():
-        all_s = read_csv("students")
-        updated = [s for s in all_s if s['id'] != str(edit_data[0])]
-        write_csv("students", updated)
-        app.current_data = read_csv(app.current_file_key)
-        app.refresh_table(app.current_display_keys)
+        ok, msg = service.delete_student(str(edit_data[0]), expected_version=version)
+        if not ok:
+            note.configure(text=msg, text_color=ACCENT_RED)
+            return
+        app.show_saved_changes()
         confirm.destroy()
 
     ctk.CTkButton(bf, text="Yes, Delete", fg_color=ACCENT_RED,
@@ -78,6 +82,7 @@ def handle_delete(app, edit_data):
     
 def open_student_form(app, edit_data=None):
     is_edit = edit_data is not None
+    version = service.record_version("students", str(edit_data[0])) if is_edit else None
 
     form = ctk.CTkToplevel(app)
     form.title("Edit Student" if is_edit else "Add Student")
@@ -97,8 +102,7 @@ def open_student_form(app, edit_data=None):
     accent_bar = ctk.CTkFrame(header, width=4, fg_color=ACCENT_CYAN,
                                corner_radius=0)
     accent_bar.pack(side="left", fill="y")
-    logo_img = ctk.CTkImage(Image.open(ASSET_LOGO_PATH), size=(48, 48))
-    ctk.CTkLabel(header, image=logo_img, text="", width=48, height=48).pack(side="left", padx=(8, 4))
+    ctk.CTkLabel(header, image=logo(48), text="", width=48, height=48).pack(side="left", padx=(8, 4))
     ctk.CTkLabel(header,
                  text="Edit Student" if is_edit else "Add Student",
                  font=ctk.CTkFont(size=18, weight="bold"),
@@ -147,9 +151,7 @@ def open_student_form(app, edit_data=None):
     program_menu.pack(anchor="w")
 
     def update_programs(*_):
-        all_programs = read_csv("programs")
-        filtered = [p['code'] for p in all_programs
-                    if p.get('college_code') == college_var.get()]
+        filtered = program_codes_in_college(college_var.get())
         if not filtered:
             filtered = ["No programs available"]
         program_menu.configure(values=filtered)
@@ -171,7 +173,7 @@ def open_student_form(app, edit_data=None):
         lname_entry.insert(0, str(edit_data[2]))
         year_var.set(str(edit_data[4]))
         gender_var.set(str(edit_data[5]))
-        college_code = str(edit_data[6])
+        college_code = college_of_program(str(edit_data[3]), str(edit_data[6]))
         if college_code in college_codes:
             college_var.set(college_code)
             update_programs()
@@ -187,19 +189,15 @@ def open_student_form(app, edit_data=None):
             "year":         year_var.get(),
             "gender":       gender_var.get()
         }
-        is_valid, *msg = validate_student(student_data, skip_id_check=is_edit)
-        if not is_valid:
-            error_label.configure(text=msg[0] if msg else "Invalid input.")
-            return
-        all_students = read_csv("students")
         if is_edit:
-            updated = [student_data if s['id'] == student_data['id'] else s
-                       for s in all_students]
+            ok, msg = service.update_student(student_data['id'], student_data,
+                                             expected_version=version)
         else:
-            updated = all_students + [student_data]
-        write_csv("students", updated)
-        app.current_data = read_csv("students")
-        app.refresh_table(app.current_display_keys)
+            ok, msg = service.add_student(student_data)
+        if not ok:
+            error_label.configure(text=msg or "Invalid input.")
+            return
+        app.show_saved_changes()
         form.destroy()
 
 
@@ -224,4 +222,256 @@ def open_student_form(app, edit_data=None):
         font=ctk.CTkFont(size=13),
         text_color=TEXT_MUTED,
         command=form.destroy
-    ).pack(side="left")
\ No newline at end of file
+    ).pack(side="left")
+
+
+def _batch_dialog(app, title, message, action_text, action_color, action_hover, run,
+                  height=210, build=None):
+    """Confirm dialog for a batch action; run() returns (ok, msg) and closes it on success."""
+    confirm = ctk.CTkToplevel(app)
+    confirm.title(title)
+    confirm.resizable(False, False)
+    confirm.configure(fg_color=BG_FORM)
+    confirm.attributes("-topmost", True)
+    _cw, _ch = 500, height
+    _cx = (confirm.winfo_screenwidth()  - _cw) // 2
+    _cy = (confirm.winfo_screenheight() - _ch) // 2
+    confirm.geometry(f"{_cw}x{_ch}+{_cx}+{_cy}")
+    confirm.after(100, confirm.grab_set)
+
+    ctk.CTkLabel(confirm, text=title,
+                 font=ctk.CTkFont(size=15, weight="bold"),
+                 text_color=TEXT_PRIMARY).pack(pady=(24, 4))
+    note = ctk.CTkLabel(confirm, text=message, text_color=TEXT_MUTED, wraplength=440)
+    note.pack()
+    if build is not None:
+        build(confirm)
+
+    bf = ctk.CTkFrame(confirm, fg_color="transparent")
+    bf.pack(pady=20)
+
+    def confirm_action():
+        ok, msg = run()
+        if not ok:
+            note.configure(text=msg, text_color=ACCENT_RED)
+            return
+        app.show_saved_changes()
+        confirm.destroy()
+
+    ctk.CTkButton(bf, text=action_text, fg_color=action_color,
+                  hover_color=action_hover, width=120, height=36,
+                  corner_radius=8, command=confirm_action).pack(side="left", padx=8)
+    ctk.CTkButton(bf, text="Cancel", fg_color=BG_INPUT,
+                  hover_color=BORDER, width=100, height=36,
+                  corner_radius=8, command=confirm.destroy).pack(side="left", padx=8)
+
+
+def _versions(student_ids):
+    # the rows as they are now; the batch is refused if any of them changes meanwhile
+    return {sid: service.record_version("students", sid) for sid in student_ids}
+
+
+def open_batch_delete(app, student_ids):
+    versions = _versions(student_ids)
+    _batch_dialog(app, f"Delete {len(student_ids)} students?", "This cannot be undone.",
+                  "Yes, Delete", ACCENT_RED, "#b91c1c",
+                  lambda: service.delete_students(student_ids, versions))
+
+
+def open_batch_promote(app, student_ids):
+    versions = _versions(student_ids)
+    _batch_dialog(app, f"Promote {len(student_ids)} students?",
+                  f"Each moves up one year level; students already in year "
+                  f"{service.MAX_YEAR} are left as they are.",
+                  "Promote", ACCENT_GREEN, "#059669",
+                  lambda: service.promote_students(student_ids, versions))
+
+
+def open_batch_move(app, student_ids):
+    versions = _versions(student_ids)
+    program_codes = [p['code'] for p in read_csv("programs")] or ["No programs available"]
+    program_var = ctk.StringVar(value=program_codes[0])
+
+    def build(confirm):
+        styled_option(confirm, program_codes, program_var).pack(pady=(12, 0))
+
+    _batch_dialog(app, f"Move {len(student_ids)} students", "Reassign them to program:",
+                  "Move", ACCENT_CYAN, "#0891b2",
+                  lambda: service.move_students(student_ids, program_var.get(), versions),
+                  height=260, build=build)
+
+
+def open_import_dialog(app):
+    # imported here: it pulls in the multiprocessing validation pipeline
+    from modules.bulk_import import import_students, write_error_report
+
+    path = filedialog.askopenfilename(title="Import Students",
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
+        return
+
+    dialog = ctk.CTkToplevel(app)
+    dialog.title("Import Students")
+    dialog.resizable(False, False)
+    dialog.configure(fg_color=BG_FORM)
+    dialog.attributes("-topmost", True)
+    _w, _h = 560, 420
+    _x = (dialog.winfo_screenwidth()  - _w) // 2
+    _y = (dialog.winfo_screenheight() - _h) // 2
+    dialog.geometry(f"{_w}x{_h}+{_x}+{_y}")
+    dialog.after(100, dialog.grab_set)
+
+    ctk.CTkLabel(dialog, text=f"Importing {os.path.basename(path)}",
+                 font=ctk.CTkFont(size=15, weight="bold"),
+                 text_color=TEXT_PRIMARY).pack(pady=(20, 4))
+    status = styled_label(dialog, "Validating rows…")
+    status.pack()
+
+    report = ctk.CTkTextbox(dialog, width=500, height=240, corner_radius=8,
+                            fg_color=BG_INPUT, text_color=TEXT_PRIMARY,
+                            font=ctk.CTkFont(family="Courier", size=11))
+    report.pack(pady=12)
+    report.configure(state="disabled")
+
+    bf = ctk.CTkFrame(dialog, fg_color="transparent")
+    bf.pack()
+    save_btn = ctk.CTkButton(bf, text="Save Error Report", fg_color=BG_INPUT,
+                             hover_color=BORDER, width=150, height=36,
+                             corner_radius=8, state="disabled")
+    save_btn.pack(side="left", padx=8)
+    ctk.CTkButton(bf, text="Close", fg_color=ACCENT_GREEN, hover_color="#059669",
+                  width=100, height=36, corner_radius=8,
+                  command=dialog.destroy).pack(side="left", padx=8)
+
+    # The import runs off the Tk thread so a large intake file doesn't freeze the window
+    loader = BackgroundLoader(dialog)
+    dialog.bind("<Destroy>", lambda e: loader.shutdown() if e.widget is dialog else None)
+
+    def save_report(errors):
+        target = filedialog.asksaveasfilename(title="Save Error Report", defaultextension=".csv",
+                                              initialfile="import_errors.csv",
+                                              filetypes=[("CSV files", "*.csv")])
+        if target and not write_error_report(errors, target):
+            status.configure(text="Could not save the error report.", text_color=ACCENT_RED)
+
+    def on_done(result):
+        ok, msg, errors = result
+        status.configure(text=msg, text_color=ACCENT_GREEN if ok else ACCENT_RED)
+        lines = [f"line {line:>6}  {sid or '—':<12} {error}" for line, sid, error in errors[:500]]
+        if len(errors) > 500:
+            lines.append(f"… {len(errors) - 500} more (save the error report for the full list)")
+        report.configure(state="normal")
+        report.insert("end", "\n".join(lines) if lines else "No errors.")
+        report.configure(state="disabled")
+        if errors:
+            save_btn.configure(state="normal", command=lambda: save_report(errors))
+        if app.current_file_key == "students":
+            app.load_view_data("students", app.current_display_keys)
+
+    def on_failed(error):
+        status.configure(text=f"Import failed: {error}", text_color=ACCENT_RED)
+
+    loader.submit(lambda: import_students(path), on_done, on_failed)
+
+
+def open_year_end_dialog(app):
+    dialog = ctk.CTkToplevel(app)
+    dialog.title("Year-End Rollover")
+    dialog.resizable(False, False)
+    dialog.configure(fg_color=BG_FORM)
+    dialog.attributes("-topmost", True)
+    _w, _h = 640, 540
+    _x = (dialog.winfo_screenwidth()  - _w) // 2
+    _y = (dialog.winfo_screenheight() - _h) // 2
+    dialog.geometry(f"{_w}x{_h}+{_x}+{_y}")
+    dialog.after(100, dialog.grab_set)
+
+    ctk.CTkLabel(dialog, text="Year-End Rollover",
+                 font=ctk.CTkFont(size=15, weight="bold"),
+                 text_color=TEXT_PRIMARY).pack(pady=(20, 4))
+    styled_label(dialog, f"Every student moves up one year level; year {year_end.MAX_YEAR} "
+                         "students graduate and move to the graduates list.").pack()
+
+    row = ctk.CTkFrame(dialog, fg_color="transparent")
+    row.pack(pady=(12, 0))
+    program_var = ctk.StringVar(value="All programs")
+    styled_option(row, ["All programs"] + [p['code'] for p in read_csv("programs")],
+                  program_var, width=220).pack(side="left", padx=(0, 12))
+    styled_label(row, "Graduating year").pack(side="left", padx=(0, 6))
+    class_entry = styled_entry(row, "e.g.  2026", width=90)
+    class_entry.insert(0, str(datetime.now().year))
+    class_entry.pack(side="left")
+
+    status = styled_label(dialog, "")
+    status.pack(pady=(8, 0))
+    report = ctk.CTkTextbox(dialog, width=580, height=280, corner_radius=8,
+                            fg_color=BG_INPUT, text_color=TEXT_PRIMARY,
+                            font=ctk.CTkFont(family="Courier", size=11))
+    report.pack(pady=8)
+    report.configure(state="disabled")
+
+    bf = ctk.CTkFrame(dialog, fg_color="transparent")
+    bf.pack()
+    preview_btn = ctk.CTkButton(bf, text="Preview", fg_color=BG_INPUT,
+                                hover_color=BORDER, width=110, height=36, corner_radius=8)
+    preview_btn.pack(side="left", padx=8)
+    apply_btn = ctk.CTkButton(bf, text="Apply", fg_color=ACCENT_GREEN, hover_color="#059669",
+                              width=110, height=36, corner_radius=8, state="disabled")
+    apply_btn.pack(side="left", padx=8)
+    ctk.CTkButton(bf, text="Close", fg_color=BG_INPUT, hover_color=BORDER,
+                  width=100, height=36, corner_radius=8,
+                  command=dialog.destroy).pack(side="left", padx=8)
+
+    # A million-row roster takes a few seconds either way, so both run off the Tk thread
+    loader = BackgroundLoader(dialog)
+    dialog.bind("<Destroy>", lambda e: loader.shutdown() if e.widget is dialog else None)
+
+    def chosen():
+        program = program_var.get()
+        return ([] if program == "All programs" else [program]), class_entry.get().strip()
+
+    def show(lines):
+        report.configure(state="normal")
+        report.delete("1.0", "end")
+        report.insert("end", "\n".join(lines))
+        report.configure(state="disabled")
+
+    def on_previewed(result, options):
+        ok, plan = result
+        if not ok:
+            status.configure(text=plan, text_color=ACCENT_RED)
+            return
+        show(year_end.format_preview(plan))
+        status.configure(text="Dry run, nothing has been changed yet.", text_color=TEXT_MUTED)
+        # Apply runs exactly what was previewed
+        apply_btn.configure(state="normal", command=lambda: apply(options))
+
+    def preview():
+        options = chosen()
+        apply_btn.configure(state="disabled")
+        status.configure(text="Reading the roster…", text_color=TEXT_MUTED)
+        loader.submit(lambda: year_end.preview(*options),
+                      lambda result: on_previewed(result, options), on_failed)
+
+    def on_applied(result):
+        ok, msg = result
+        status.configure(text=msg, text_color=ACCENT_GREEN if ok else ACCENT_RED)
+        preview_btn.configure(state="normal")
+        if ok and app.current_file_key == "students":
+            app.load_view_data("students", app.current_display_keys)
+
+    def apply(options):
+        apply_btn.configure(state="disabled")
+        preview_btn.configure(state="disabled")
+        status.configure(text="Promoting and graduating…", text_color=TEXT_MUTED)
+        loader.submit(lambda: year_end.run(*options), on_applied, on_failed)
+
+    def on_failed(error):
+        preview_btn.configure(state="normal")
+        status.configure(text=f"Year-end rollover failed: {error}", text_color=ACCENT_RED)
+
+    preview_btn.configure(command=preview)
+    # a preview for other options than the one on screen can't be applied
+    program_var.trace_add("write", lambda *_: apply_btn.configure(state="disabled"))
+    class_entry.bind("<KeyRelease>", lambda e: apply_btn.configure(state="disabled"))
+    preview()
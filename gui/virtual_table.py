@@ -0,0 +1,70 @@
+#A Treeview only ever shows one page of records, so instead of deleting and
+#re-inserting every row on each refresh we keep a pool of row items and just
+#push new values into the ones whose contents changed. What each item shows is
+#remembered on the Python side, so unchanged rows cost no Tk calls at all.
+
+from modules.instrumentation import count
+
+
+class VirtualTable:
+    """Renders pages of values into a ttk.Treeview, reusing its row items."""
+
+    def __init__(self, tree):
+        self.tree   = tree
+        self._items = []   # Treeview item ids, top to bottom
+        self._shown = []   # (values, tags) currently displayed by each item
+
+    def render(self, rows, tags):
+        """Show `rows` (sequences of cell values) with one tags tuple per row."""
+        tree = self.tree
+        selected = tree.selection()
+        if selected:
+            tree.selection_remove(selected)
+
+        updated = inserted = 0
+        for i, (values, row_tags) in enumerate(zip(rows, tags)):
+            wanted = (tuple(values), tuple(row_tags))
+            if i < len(self._items):
+                if self._shown[i] != wanted:
+                    tree.item(self._items[i], values=wanted[0], tags=wanted[1])
+                    self._shown[i] = wanted
+                    updated += 1
+            else:
+                self._items.append(tree.insert("", "end", values=wanted[0], tags=wanted[1]))
+                self._shown.append(wanted)
+                inserted += 1
+        count("tk.treeview.item", updated)
+        count("tk.treeview.insert", inserted)
+
+        surplus = self._items[len(rows):]
+        if surplus:
+            count("tk.treeview.delete", len(surplus))
+            tree.delete(*surplus)
+            del self._items[len(rows):]
+            del self._shown[len(rows):]
+
+    def clear(self):
+        self.render([], [])
+
+
+def page_values(page_data, display_keys, college_map=None):
+    """Cell values and row tags for one page of records, as the views show them.
+
+    college_map ({program_code: college_code}) fills the joined "college"
+    column of the students view.
+    """
+    rows, tags = [], []
+    for i, record in enumerate(page_data):
+        values = []
+        for key in display_keys:
+            if key == "college" and college_map is not None:
+                val = college_map.get(record.get('program_code'), "—")
+            else:
+                val = record.get(key, "—")
+            if isinstance(val, str) and val.startswith("__deleted__"):
+                val = f"[Deleted] {val[len('__deleted__'):]}"
+            values.append(val)
+        values.append("⋯  Actions")
+        rows.append(values)
+        tags.append(("evenrow" if i % 2 == 0 else "oddrow",))
+    return rows, tags
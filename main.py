@@ -1,13 +1,29 @@
+import time
+BOOT_STARTED = time.perf_counter()   # taken before any other import, for the startup report
+
 import sys
 import os
 
 # This line tells Python to look in the current folder for our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from gui.main_window import MainWindow
-from modules.database_io import initialize_storage
+if __name__ == "__main__" and sys.argv[1:2] == ["serve"]:
+    # Headless: python main.py serve [host] [port] (no Tk needed)
+    from modules.api import main as serve
+    sys.exit(serve(sys.argv[2:]))
 
 if __name__ == "__main__":
+    # Kept under the guard: spawned validation workers re-import this module
+    # and must not load Tk
+    from gui import startup
+    startup.begin(BOOT_STARTED)
+
+    from gui.main_window import MainWindow
+    from modules.database_io import initialize_storage
+    startup.mark("imports")
+
     initialize_storage()
+    startup.mark("storage")
     app = MainWindow()
+    startup.mark("window")
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,203 @@
+import json
+import sys
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from modules import service
+from modules.database_io import Headers, initialize_storage
+
+#A small JSON API over modules/service.py, so several workstations can share
+#one running store (and its in-memory indexes) instead of each re-reading the
+#CSV files. One thread per request; the data layer serialises the writes.
+#
+#  GET    /api/<table>?page=1&per_page=50&sort=lastname&order=desc&q=cruz&column=lastname
+#  GET    /api/<table>?cursor=&per_page=50&sort=lastname   cursor paging: pass the
+#                                         returned next_cursor back as cursor
+#  GET    /api/<table>/<key>
+#  GET    /api/<table>/<key>/impact      what a delete would unassign
+#  POST   /api/<table>                   body: the record as a JSON object
+#  PUT    /api/<table>/<key>             body: the record as a JSON object
+#  DELETE /api/<table>/<key>
+#
+#<table> is students, programs or colleges. Leaving out `column` makes `q` a
+#ranked fuzzy search over every field. Failures come back as
+#{"ok": false, "error": msg} with a 4xx status.
+#
+#GET /api/<table>/<key> sends the record's version as an ETag. Send it back as
+#If-Match on PUT/DELETE and the change is refused with 409 Conflict if someone
+#else changed the record in between (also when the service notices it
+#inside its transaction). 503 means another SIS instance held the data lock
+#too long; try again.
+#
+#  python main.py serve [host] [port]    (default 127.0.0.1 8765)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY     = 1 << 20
+
+#service.Refusal kinds -> HTTP status; any other failed mutation is a 400
+FAILURE_STATUS = {service.CONFLICT: 409, service.BUSY: 503, service.STORAGE: 500}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _columns(file_key):
+    return Headers[file_key] + (["college"] if file_key == "students" else [])
+
+
+def _route(path):
+    """'/api/students/2024-0001/impact' -> ("students", "2024-0001", "impact")."""
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if len(parts) < 2 or len(parts) > 4 or parts[0] != "api" or parts[1] not in service.ADD:
+        raise ApiError(404, "Not found.")
+    parts += [None] * (4 - len(parts))
+    return parts[1], parts[2], parts[3]
+
+
+def _failure_status(msg):
+    return FAILURE_STATUS.get(getattr(msg, "kind", None), 400)
+
+
+def _list(file_key, params):
+    def param(name, default=None):
+        value = params.get(name, [default])[0]
+        return default if value == "" else value
+
+    sort, column = param("sort"), param("column")
+    for name, value in (("sort", sort), ("column", column)):
+        if value is not None and value not in _columns(file_key):
+            raise ApiError(400, f"Unknown {name} column: {value}.")
+    try:
+        page, per_page = int(param("page", 1)), int(param("per_page", 50))
+    except ValueError:
+        raise ApiError(400, "page and per_page must be integers.")
+    if "cursor" in params:
+        if param("q"):
+            raise ApiError(400, "q can't be combined with cursor paging.")
+        try:
+            return service.page_records(file_key, per_page, param("cursor") or None, sort=sort,
+                                        reverse=param("order", "asc") == "desc")
+        except ValueError:
+            raise ApiError(400, "Invalid cursor.")
+    return service.list_records(file_key, page, per_page, sort=sort,
+                                reverse=param("order", "asc") == "desc",
+                                query=param("q"), column=column)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "SIS/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, payload, etag=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", f'"{etag}"')
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # the body can't be skipped, so don't read the next request out of it
+            self.close_connection = True
+            raise ApiError(400, "Invalid Content-Length.")
+        if length > MAX_BODY:
+            raise ApiError(413, "Request body too large.")
+        try:
+            data = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            raise ApiError(400, "Body must be JSON.")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Body must be a JSON object.")
+        return data
+
+    def _handle(self, method):
+        try:
+            url = urlsplit(self.path)
+            file_key, key, extra = _route(url.path)
+            if method == "GET":
+                if key is None:
+                    return self._send(200, _list(file_key, parse_qs(url.query, keep_blank_values=True)))
+                if extra == "impact":
+                    return self._send(200, service.delete_impact(file_key, key))
+                if extra is None:
+                    record = service.get_record(file_key, key)
+                    if record is None:
+                        raise ApiError(404, f"{key} not found.")
+                    return self._send(200, record, service.record_version(file_key, key))
+            elif extra is None and method == "POST" and key is None:
+                ok, msg = service.ADD[file_key](self._body())
+                return self._send(201 if ok else _failure_status(msg),
+                                  {"ok": ok, "message" if ok else "error": msg})
+            elif extra is None and key is not None and method in ("PUT", "DELETE"):
+                version  = service.record_version(file_key, key)
+                expected = (self.headers.get("If-Match") or "").strip('"') or None
+                if version is None:
+                    raise ApiError(404, f"{key} not found.")
+                if expected is not None and expected != version:
+                    raise ApiError(409, f"{key} was changed by someone else.")
+                if method == "PUT":
+                    ok, msg = service.UPDATE[file_key](key, self._body(), expected)
+                else:
+                    ok, msg = service.DELETE[file_key](key, expected)
+                return self._send(200 if ok else _failure_status(msg),
+                                  {"ok": ok, "message" if ok else "error": msg})
+            raise ApiError(405, "Method not allowed.")
+        except ApiError as e:
+            self._send(e.status, {"ok": False, "error": str(e)})
+        except Exception:
+            # still answer, so the client isn't left with a dropped connection
+            self.log_error("%s %s failed:\n%s", method, self.path, traceback.format_exc())
+            self._send(500, {"ok": False, "error": "Internal server error."})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.address_string()} {format % args}\n")
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    initialize_storage()
+    server = make_server(host, port)
+    print(f"SIS API on http://{host}:{server.server_port}/api/students", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv):
+    host = argv[0] if argv else DEFAULT_HOST
+    port = int(argv[1]) if len(argv) > 1 else DEFAULT_PORT
+    serve(host, port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+import csv
+from collections import deque
+from modules.database_io import Headers, add_rows, transaction
+from modules.indexes import normalise_key
+from modules.locking import LockTimeout
+from modules.validators import key_set, reference_sets
+from modules.validation_pipeline import SHARD_SIZE, iter_validate
+
+#Bulk student import (e.g. a semester intake file).
+#
+#The incoming CSV is streamed and validated in batches with the same rules as
+#the student form, but against key sets built once up front instead of a
+#lookup per row; big files are validated across several processes (see
+#modules/validation_pipeline.py). IDs repeated inside the file are reported
+#too, and every row that passes is added with a single write.
+#
+#Validation runs without holding any lock, so just before the write the IDs
+#and program codes are checked once more inside a transaction, against key
+#sets read once there: anything added or deleted meanwhile (by the form, the
+#API or another SIS instance) can't slip a duplicate ID or a dangling program
+#into the table.
+
+
+def import_students(path, batch_size=SHARD_SIZE, workers=None):
+    """Import the students in a CSV file.
+
+    Returns (ok, msg, errors); errors holds (line, id, message) for every
+    rejected row, in file order. Valid rows are imported even if others are
+    rejected; ok is False only when nothing could be imported.
+    """
+    try:
+        f = open(path, 'r', newline='', encoding='utf-8-sig')
+    except OSError as e:
+        return False, f"Could not open {path}: {e.strerror}.", []
+
+    with f:
+        reader = csv.DictReader(f)
+        missing = [h for h in Headers["students"] if h not in (reader.fieldnames or [])]
+        if missing:
+            return False, f"Missing column(s): {', '.join(missing)}.", []
+
+        lines = deque()   # file line of each row handed to the pipeline, in order
+
+        def cleaned_rows():
+            for row in reader:
+                lines.append(reader.line_num)
+                yield {k: str(row.get(k) or '').strip() for k in Headers["students"]}
+
+        seen   = {}   # normalised id -> line it was first seen on
+        valid  = []
+        errors = []
+        results = iter_validate("students", cleaned_rows(), reference_sets("students"),
+                                workers=workers, shard_size=batch_size)
+        for row, ok, msg in results:
+            line = lines.popleft()
+            key = normalise_key(row['id'])
+            if ok and key in seen:
+                ok, msg = False, f"ID '{row['id']}' appears more than once (first on line {seen[key]})."
+            if not ok:
+                errors.append((line, row['id'], msg))
+                continue
+            seen[key] = line
+            valid.append((line, row))
+
+    if not valid:
+        return False, f"No students imported; {len(errors)} row(s) rejected.", errors
+    try:
+        with transaction():
+            student_ids, program_codes = key_set("students"), key_set("programs")
+            imported = []
+            for line, row in valid:
+                if normalise_key(row['id']) in student_ids:
+                    errors.append((line, row['id'], f"ID '{row['id']}' already exists."))
+                elif normalise_key(row['program_code']) not in program_codes:
+                    errors.append((line, row['id'],
+                                   f"Program code '{row['program_code']}' does not exist."))
+                else:
+                    imported.append(row)
+            errors.sort(key=lambda error: error[0])
+            if imported:
+                add_rows("students", imported)
+    except LockTimeout:
+        return False, "The records are busy (another SIS instance is saving). Try again.", errors
+    except OSError:
+        return False, "Could not write the imported students.", errors
+    if not imported:
+        return False, f"No students imported; {len(errors)} row(s) rejected.", errors
+    return True, f"Imported {len(imported)} student(s); {len(errors)} row(s) rejected.", errors
+
+
+def write_error_report(errors, path):
+    """Save the (line, id, message) list from import_students as a CSV file."""
+    try:
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'id', 'error'])
+            writer.writerows(errors)
+        return True
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    #python -m modules.bulk_import intake.csv [errors.csv]
+    import sys
+    from modules.database_io import initialize_storage
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m modules.bulk_import <students.csv> [error_report.csv]")
+    initialize_storage()
+    ok, msg, errors = import_students(sys.argv[1])
+    print(msg)
+    for line, sid, error in errors[:20]:
+        print(f"  line {line} ({sid or 'no id'}): {error}")
+    if len(errors) > 20:
+        print(f"  … {len(errors) - 20} more")
+    if len(sys.argv) > 2 and errors:
+        write_error_report(errors, sys.argv[2])
+        print(f"Error report written to {sys.argv[2]}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,189 @@
+import sys
+from array import array
+from collections.abc import Mapping
+
+#A column-oriented table for big tables (students). Instead of one dict per
+#row, each column is a single list, and low-cardinality columns (program_code,
+#year, gender) are dictionary-encoded: the distinct values are stored once and
+#every row only keeps a small integer code in an array. Rows are handed out as
+#lightweight RowView objects that read straight from the columns.
+#
+#A ColumnarTable behaves like the list of dicts it replaces as far as the
+#rest of the app is concerned: len(), indexing/slicing, iteration, append()
+#and assigning a whole row by position.
+
+
+class _Category:
+    """One dictionary-encoded column: distinct values + an array of codes."""
+
+    __slots__ = ("values", "lookup", "codes")
+
+    def __init__(self):
+        self.values = []
+        self.lookup = {}
+        self.codes  = array('B')
+
+    def encode(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.lookup[value] = code
+            #widen the code array when it runs out of room (B -> H -> I)
+            if code > 0xFF and self.codes.typecode == 'B':
+                self.codes = array('H', self.codes)
+            elif code > 0xFFFF and self.codes.typecode == 'H':
+                self.codes = array('I', self.codes)
+        return code
+
+    def append(self, value):
+        #encode first: it may swap in a wider array that the code must go into
+        code = self.encode(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __setitem__(self, i, value):
+        self.codes[i] = self.encode(value)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def nbytes(self):
+        return (self.codes.itemsize * len(self.codes) + sys.getsizeof(self.values)
+                + sum(sys.getsizeof(v) for v in self.values))
+
+
+class RowView(Mapping):
+    """A read-only, dict-like view of one row of a ColumnarTable."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        column = self._table._columns.get(key)
+        if column is None:
+            raise KeyError(key)
+        return column[self._index]
+
+    def __iter__(self):
+        return iter(self._table.headers)
+
+    def __len__(self):
+        return len(self._table.headers)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnarTable:
+    """Rows stored column by column; see the module comment."""
+
+    def __init__(self, headers, categorical=(), interned=()):
+        self.headers  = list(headers)
+        self.interned = set(interned)
+        self._columns = {h: _Category() if h in categorical else [] for h in self.headers}
+
+    @classmethod
+    def from_rows(cls, headers, rows, categorical=(), interned=()):
+        table = cls(headers, categorical, interned)
+        for row in rows:
+            table.append(row)
+        return table
+
+    def _value(self, column, row):
+        value = row.get(column)
+        value = '' if value is None else str(value)
+        return sys.intern(value) if column in self.interned else value
+
+    def append(self, row):
+        for name, column in self._columns.items():
+            column.append(self._value(name, row))
+
+    def column(self, name):
+        """Every value of one column, in row order (a cheap way to scan a column)."""
+        column = self._columns[name]
+        if isinstance(column, _Category):
+            return [column.values[code] for code in column.codes]
+        return column
+
+    def positions_where(self, name, accepted):
+        """Positions whose value in column `name` is one of `accepted`.
+
+        A dictionary-encoded column is filtered by comparing the integer
+        codes, so no value (or row view) is touched for rows that don't match.
+        """
+        column = self._columns[name]
+        if isinstance(column, _Category):
+            codes = {column.lookup[v] for v in accepted if v in column.lookup}
+            return (pos for pos, code in enumerate(column.codes) if code in codes)
+        return (pos for pos, value in enumerate(column) if value in accepted)
+
+    def __len__(self):
+        return len(self._columns[self.headers[0]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [RowView(self, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return RowView(self, i)
+
+    def __setitem__(self, i, row):
+        for name, column in self._columns.items():
+            column[i] = self._value(name, row)
+
+    def __iter__(self):
+        return (RowView(self, i) for i in range(len(self)))
+
+    def nbytes(self):
+        """Approximate memory held by the table (columns plus their values)."""
+        total = 0
+        for column in self._columns.values():
+            if isinstance(column, _Category):
+                total += column.nbytes()
+            else:
+                total += sys.getsizeof(column)
+                seen = set()
+                for value in column:
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        total += sys.getsizeof(value)
+        return total
+
+
+def dict_rows_nbytes(rows):
+    """Approximate memory of the same rows as a list of csv.DictReader dicts."""
+    total = sys.getsizeof(list(range(len(rows))))
+    for row in rows:
+        row = dict(row)
+        total += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+    return total
+
+
+def memory_report(table):
+    """{"rows", "columnar_bytes", "dict_bytes", "saved_pct"} for a ColumnarTable."""
+    columnar = table.nbytes()
+    as_dicts = dict_rows_nbytes(table)
+    return {"rows": len(table),
+            "columnar_bytes": columnar,
+            "dict_bytes": as_dicts,
+            "saved_pct": round(100 * (1 - columnar / as_dicts), 1) if as_dicts else 0.0}
+
+
+if __name__ == "__main__":
+    #python -m modules.columnar  -> how much memory the students table saves
+    from modules.database_io import USE_COLUMNAR, get_rows
+
+    if USE_COLUMNAR:
+        report = memory_report(get_rows("students"))
+        print(f"{report['rows']} students: {report['columnar_bytes']:,} bytes columnar vs "
+              f"{report['dict_bytes']:,} bytes as dicts ({report['saved_pct']}% saved)")
+    else:
+        print("students are not stored column-wise (SIS_COLUMNAR=0)")
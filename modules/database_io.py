@@ -1,5 +1,9 @@
 import os
-import csv
+import threading
+from contextlib import contextmanager
+from modules.storage import CsvBackend, SqliteBackend
+from modules.columnar import ColumnarTable
+from modules.instrumentation import count, timed, timer
 
 #So users don't have to worry about file paths, we can set up a base directory for our data files. 
 #This way, we can easily read from and write to our CSV files without hardcoding the paths every time.
@@ -11,95 +15,603 @@ data_dir = os.path.join(project_root, 'data')
 #for easy access to the file paths
 FILES ={"students": os.path.join(data_dir, 'students.csv'),
         "colleges": os.path.join(data_dir, 'colleges.csv'),
-        "programs": os.path.join(data_dir, 'programs.csv')}
+        "programs": os.path.join(data_dir, 'programs.csv'),
+        "graduates": os.path.join(data_dir, 'graduates.csv')}
 
 #Schema headers for each CSV file, which will be useful when reading and writing data to ensure consistency.
 Headers = {"students": ['id', 'firstname', 'lastname', 'program_code', 'year', 'gender'],
            "colleges": ['code', 'name'],
-           "programs": ['code', 'name', 'college_code']}
+           "programs": ['code', 'name', 'college_code'],
+           #students who finished their last year (modules/year_end.py), and when
+           "graduates": ['id', 'firstname', 'lastname', 'program_code', 'year', 'gender', 'graduated']}
+
+
+#Where the rows actually live. CSV is the default; set SIS_STORAGE=sqlite to
+#keep everything in data/sis.db instead (see modules/storage.py).
+SQLITE_PATH = os.environ.get("SIS_SQLITE_PATH", os.path.join(data_dir, 'sis.db'))
+
+
+def _make_backend(name):
+    if name == "sqlite":
+        return SqliteBackend(SQLITE_PATH, Headers)
+    return CsvBackend(FILES, Headers, data_dir)
+
+
+_backend = _make_backend(os.environ.get("SIS_STORAGE", "csv").lower())
+
+
+#Big tables are cached column-wise instead of as one dict per row (see
+#modules/columnar.py); SIS_COLUMNAR=0 turns that off.
+COLUMNAR = {"students": {"categorical": ('program_code', 'year', 'gender'),
+                         "interned":    ('firstname', 'lastname')}}
+USE_COLUMNAR = os.environ.get("SIS_COLUMNAR", "1") != "0"
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
+    """Switch storage backends (e.g. SqliteBackend) and drop the cached tables."""
+    global _backend
+    with _lock:
+        _backend = backend
+        invalidate()
 
 
 def initialize_storage():
-    #if the data directory doesn't exist, create it
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    #for each file in our FILES mapping, check if it exists. If not, create it and write the header row.
-    for key, file_path in FILES.items():
-        if not os.path.exists(file_path):
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(Headers[key])
+    with _backend.lock:   # recovery must not race another instance's commit
+        _backend.initialize()
+        #a brand new SQLite database starts out as a copy of the CSV files
+        if _backend.name == "sqlite" and _backend.is_empty():
+            _backend.import_csv(CsvBackend(FILES, Headers, data_dir))
+
+# ── In-memory table store ──────────────────────────────────────────────────
+#Each table is parsed once and then served from memory. Every write goes
+#straight through to the storage backend and updates the cached copy, and the
+#cache drops itself whenever the backend's stamp (the CSV file's mtime/size)
+#changes underneath it, e.g. the file was edited by hand or by another SIS
+#instance.
+
+_lock      = threading.RLock()
+_tables    = {}   # file_key -> {"rows": list or ColumnarTable, "stamp": backend stamp, "version": int}
+_versions  = {}   # file_key -> last version handed out; survives invalidate()
+_listeners = []   # callables notified after every change to a cached table
+_writes    = 0    # bumped whenever a write or transaction starts (see _load_table)
+
+
+def add_listener(callback):
+    """Register callback(file_key, event, payload, version) for table changes.
+
+    event is "replace" (the whole table was reloaded or rewritten; payload is
+    None), "append" (payload is the list of new row positions), "update"
+    (payload is a list of (position, old_row, new_row) tuples) or "delete"
+    (payload is a list of (old position, old_row) pairs, in position order;
+    the rows after each one moved up). Listeners are called with the store
+    lock held and must not write to the store.
+    """
+    _listeners.append(callback)
+    return callback
+
+
+def _notify(file_key, event, payload=None):
+    version = _tables[file_key]["version"]
+    for callback in _listeners:
+        callback(file_key, event, payload, version)
+
+
+def _next_version(file_key):
+    #versions only ever grow, even across invalidate(), so a cache keyed on
+    #one (sort orders, search indexes) can't mistake a reload for its table
+    version = _versions.get(file_key, 0) + 1
+    _versions[file_key] = version
+    return version
+
+
+def _file_stamp(file_key):
+    return _backend.stamp(file_key)
+
+
+def _normalise_row(file_key, row):
+    """Copy a row down to the schema columns, as strings (what the file holds)."""
+    return {k: '' if row.get(k) is None else str(row.get(k)) for k in Headers[file_key]}
+
+
+def _make_table(file_key, rows):
+    """The in-memory form of a table's rows: a ColumnarTable or a plain list."""
+    layout = COLUMNAR.get(file_key)
+    if layout is None or not USE_COLUMNAR:
+        return rows
+    return ColumnarTable.from_rows(Headers[file_key], rows, **layout)
+
+
+def _load_table(file_key, attempts=3):
+    """Return the cache entry for a table, (re)parsing the file if it changed.
+
+    The parse runs without the store lock, so the Tk thread's quick checks
+    (is_cached(), the join maps) aren't stuck behind a worker thread's load.
+    A parse that overlapped a write, or a file that changed meanwhile, is
+    thrown away and redone; after a few tries it is done under the lock.
+    """
+    with _lock:
+        stamp = _file_stamp(file_key)
+        entry = _tables.get(file_key)
+        if entry is not None and entry["stamp"] == stamp:
+            return entry
+        writes = _writes
+        locked = attempts <= 1
+        if locked:
+            rows = _parse(file_key)
+    if not locked:
+        rows = _parse(file_key)
+    with _lock:
+        entry = _tables.get(file_key)
+        if entry is not None and entry["stamp"] == _file_stamp(file_key):
+            return entry       # another thread (or a write) got there first
+        if not locked and (writes != _writes or _file_stamp(file_key) != stamp):
+            return _load_table(file_key, attempts - 1)
+        entry = {"rows": rows, "stamp": stamp, "version": _next_version(file_key)}
+        _tables[file_key] = entry
+        _notify(file_key, "replace")
+        return entry
+
+
+def _parse(file_key):
+    count(f"database_io.load.{file_key}")
+    with timer("database_io.parse"):
+        return _make_table(file_key, _backend.load(file_key))
+
+
+def _store_table(file_key, rows, event="replace", payload=None):
+    """Install rows as the cached table after a successful write."""
+    with _lock:
+        _tables[file_key] = {"rows": _make_table(file_key, rows), "stamp": _file_stamp(file_key),
+                             "version": _next_version(file_key)}
+        _notify(file_key, event, payload)
+
+
+def get_rows(file_key):
+    """Return the cached rows of a table without copying them.
+
+    The rows (a list of dicts, or a ColumnarTable of read-only row views) are
+    shared by every caller, so treat them as read-only; use read_csv() when
+    you need rows you can modify.
+    """
+    return _load_table(file_key)["rows"]
+
+
+def _cached_rows(file_key):
+    """The cached rows if the table is loaded and still current, else None."""
+    with _lock:
+        entry = _tables.get(file_key)
+        if entry is not None and entry["stamp"] == _file_stamp(file_key):
+            return entry["rows"]
+        return None
+
+
+def is_cached(file_key):
+    return _cached_rows(file_key) is not None
+
+
+def _where_sets(where):
+    """{column: value or collection of values} -> {column: frozenset of strings}."""
+    sets = {}
+    for column, value in where.items():
+        values = value if isinstance(value, (set, frozenset, list, tuple)) else (value,)
+        sets[column] = frozenset(str(v) for v in values)
+    return sets
+
+
+def _matching_positions(rows, equals):
+    """Positions of cached rows whose columns hold one of the accepted values."""
+    if not equals:
+        return range(len(rows))
+    tests = list(equals.items())
+    if hasattr(rows, "positions_where"):
+        column, accepted = tests.pop(0)
+        positions = rows.positions_where(column, accepted)
+    else:
+        positions = range(len(rows))
+    return (pos for pos in positions
+            if all(rows[pos].get(column, '') in accepted for column, accepted in tests))
+
+
+def iter_rows(file_key, columns=None, where=None):
+    """Yield a table's rows one at a time, as fresh dicts.
+
+    columns limits each row to those keys. where filters the rows: a dict of
+    column -> value (or a set/list of accepted values) is pushed down to the
+    cache or the storage backend, a callable row -> bool is applied to each
+    row. A loaded, current table is served from the cache; otherwise rows are
+    streamed from storage without loading the table, so memory stays flat.
+    Rows are produced lazily, so stopping early stops the reading too.
+    """
+    if callable(where):
+        equals, predicate = {}, where
+    else:
+        equals, predicate = _where_sets(where or {}), None
+    rows = _cached_rows(file_key)
+    if rows is not None:
+        source = (rows[pos] for pos in _matching_positions(rows, equals))
+    else:
+        source = _backend.iter_rows(file_key, None if predicate else columns, equals)
+    for row in source:
+        if predicate is not None and not predicate(row):
+            continue
+        yield {c: row.get(c, '') for c in columns} if columns else dict(row)
+
+
+def exists(file_key, where):
+    """True as soon as one row matches where (see iter_rows)."""
+    for _row in iter_rows(file_key, columns=[get_pk(file_key)], where=where):
+        return True
+    return False
+
+
+@timed()
+def count_rows(file_key, where=None):
+    return sum(1 for _row in iter_rows(file_key, columns=[get_pk(file_key)], where=where))
+
+
+def estimate_count(file_key):
+    """(number of rows, exact?) without loading a table that isn't cached yet."""
+    rows = _cached_rows(file_key)
+    if rows is not None:
+        return len(rows), True
+    if hasattr(_backend, "estimate"):
+        return _backend.estimate(file_key)
+    return count_rows(file_key), True
+
+
+def _stream_page(file_key, limit, after, pk):
+    """page_rows() in table order for a table that isn't loaded: read only this far."""
+    page = _backend.page(file_key, limit + 1, after)
+    start = after[0] + 1 if after else 0
+    more = len(page) > limit
+    page = page[:limit]
+    if not more:
+        return [row for _mark, row in page], None
+    mark, last = page[-1]
+    return [row for _mark, row in page], f"{start + len(page) - 1}:{mark}:{last[pk]}"
+
+
+def page_rows(file_key, limit, cursor=None, order_by=None, reverse=False):
+    """Cursor pagination: (rows, next_cursor) for the `limit` rows after `cursor`.
+
+    Pass next_cursor back in for the following page; it is None after the last
+    one. Rows come in table order, or sorted by order_by like sort_order()
+    (optionally reversed). A cursor holds the place and the primary key of the
+    last row sent, so rows added or deleted elsewhere don't make the next page
+    skip or repeat rows (if that last row itself is deleted, the next page
+    starts at its old place). On the cached table a page costs O(limit) however
+    deep it is.
+
+    The pages of an unsorted table that isn't loaded yet are read straight
+    from storage, so they don't wait for the whole table to be parsed. Their
+    cursors also carry the backend's mark for the last row (a byte offset in
+    the CSV file, a rowid in SQLite), so the next page starts reading there
+    instead of from the top; only if the table changed in between does it
+    have to look the row up again.
+    """
+    pk = get_pk(file_key)
+    after = None
+    if cursor:
+        index, _sep, rest = cursor.partition(":")
+        mark, _sep, key = rest.partition(":")
+        after = (int(index), int(mark) if mark else None, key)
+    if order_by is None and not reverse and _cached_rows(file_key) is None:
+        return _stream_page(file_key, limit, after, pk)
+
+    from modules.indexes import row_position, sort_order, sort_ranks   # indexes imports this module
+    with _lock:
+        rows  = get_rows(file_key)
+        order = sort_order(file_key, order_by) if order_by else None
+        n     = len(rows)
+
+        def at(i):   # table position of the i-th row in the requested order
+            j = n - 1 - i if reverse else i
+            return order[j] if order is not None else j
+
+        start = 0
+        if after is not None:
+            index, _mark, key = after
+            if index < n and rows[at(index)][pk] == key:
+                start = index + 1
+            else:
+                #the table changed since: find that row again
+                pos = row_position(file_key, key)
+                if pos is None:
+                    start = min(index, n)   # it was deleted; go on from where it was
+                else:
+                    rank  = sort_ranks(file_key, order_by)[pos] if order_by else pos
+                    start = (n - 1 - rank if reverse else rank) + 1
+        end  = min(start + limit, n)
+        page = [dict(rows[at(i)]) for i in range(start, end)]
+        return page, (f"{end - 1}::{page[-1][pk]}" if page and end < n else None)
+
+
+def table_version(file_key):
+    """Return a counter that changes every time the table's contents change."""
+    return _load_table(file_key)["version"]
+
+
+def invalidate(file_key=None):
+    """Drop one cached table (or all of them) so the next read reparses it."""
+    with _lock:
+        if file_key is None:
+            _tables.clear()
+        else:
+            _tables.pop(file_key, None)
+
+_txn_depth   = 0
+_txn_touched = set()
+_txn_failed  = False
+
+
+@contextmanager
+def _writing():
+    """Hold the store lock and the backend's cross-process lock for one write.
+
+    Taken before the write reads anything, so a table another process changed
+    is reloaded (its stamp no longer matches) and the write lands on top of it.
+    """
+    global _writes
+    with _lock, _backend.lock:
+        _writes += 1
+        yield
+
+
+@contextmanager
+def transaction():
+    """Group several writes (e.g. a delete cascade) so they all land or none do.
+
+    Writes inside the block update the cache straight away but only reach
+    disk when the block exits cleanly; if it raises, or the commit fails,
+    every table it touched is reloaded from storage. Nested blocks join the
+    outermost one.
+    """
+    global _txn_depth, _txn_failed, _writes
+    with _lock:
+        if _txn_depth:
+            _txn_depth += 1
+            try:
+                yield
+            finally:
+                _txn_depth -= 1
+            return
+        #the cross-process lock covers the whole block, reads included
+        with _backend.lock:
+            _txn_depth = 1
+            _writes += 1
+            _txn_touched.clear()
+            _txn_failed = False
+            _backend.begin()
+            try:
+                yield
+            except BaseException:
+                _backend.rollback()
+                for file_key in _txn_touched:
+                    invalidate(file_key)
+                raise
+            finally:
+                _txn_depth = 0
+            if _txn_failed:
+                _backend.rollback()
+            if not _txn_failed and _backend.commit():
+                #the committed files now match the cache; just pick up their new stamps
+                for file_key in _txn_touched:
+                    if file_key in _tables:
+                        _tables[file_key]["stamp"] = _file_stamp(file_key)
+            else:
+                for file_key in _txn_touched:
+                    invalidate(file_key)
+                raise OSError("transaction could not be committed")
+
+
+def _touch(file_key):
+    if _txn_depth:
+        _txn_touched.add(file_key)
+
+
+def _write_failed(file_key):
+    """A backend write failed: forget the cached copy and doom any open transaction."""
+    global _txn_failed
+    invalidate(file_key)
+    if _txn_depth:
+        _txn_failed = True
 
 #CRUD functions
  
+@timed()
 def read_csv(file_key):
-    file_path = FILES[file_key]
-    data = []
-    try:
-        with open(file_path, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                data.append(row)
-    except (FileNotFoundError, OSError):
-        pass
-    return data
+    return [dict(row) for row in get_rows(file_key)]
 
+@timed()
 def write_csv(file_key, data):
-    file_path = FILES[file_key]
-    try:
-        with open(file_path, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=Headers[file_key])
-            writer.writeheader()
-            for row in data:
-                writer.writerow(row)
+    rows = [_normalise_row(file_key, row) for row in data]
+    with _writing():
+        _touch(file_key)
+        if not _backend.save(file_key, rows):
+            _write_failed(file_key)
+            return False
+        _store_table(file_key, rows)
         return True
-    except OSError:
-        return False
 
 
 def get_pk(file_key):
     """Return the primary key column name for a given file key."""
-    return 'id' if file_key == 'students' else 'code'
+    return 'id' if file_key in ('students', 'graduates') else 'code'
 
 
 def add_csv(file_key, row):
-    """Append a single new row to a CSV file."""
-    data = read_csv(file_key)
-    data.append(row)
-    write_csv(file_key, data)
-    return data
+    """Append a single new row to a CSV file.
+
+    Only the new row is written (O(1) disk bytes for CSV, one INSERT for
+    SQLite); a CSV file is rewritten in full only if its header doesn't match
+    the schema.
+    """
+    return add_rows(file_key, [row])
+
 
+@timed()
+def add_rows(file_key, rows):
+    """Append many new rows with a single write (one append / one INSERT batch)."""
+    new_rows = [_normalise_row(file_key, row) for row in rows]
+    if not new_rows:
+        return True
+    with _writing():
+        entry = _load_table(file_key)
+        if not _backend.appendable(file_key):
+            return write_csv(file_key, list(entry["rows"]) + new_rows)
+        _touch(file_key)
+        if not _backend.append(file_key, new_rows):
+            _write_failed(file_key)
+            return False
+        start = len(entry["rows"])
+        for new_row in new_rows:
+            entry["rows"].append(new_row)
+        entry["stamp"] = _file_stamp(file_key)
+        entry["version"] = _next_version(file_key)
+        _notify(file_key, "append", list(range(start, start + len(new_rows))))
+        return True
+
+
+@timed()
+def replace_rows(file_key, changes):
+    """Replace rows by position ({position: new_row}) with a single write.
+
+    The cached rows are swapped in place, so positions (and any index built
+    on them) stay valid; listeners get one "update" event for the batch.
+    """
+    with _writing():
+        entry = _load_table(file_key)
+        rows = entry["rows"]
+        new_rows = list(rows)
+        updates = []
+        for pos, row in changes.items():
+            new_row = _normalise_row(file_key, row)
+            #copy the old row: a columnar row view would show the new values
+            updates.append((pos, dict(rows[pos]), new_row))
+            new_rows[pos] = new_row
+        _touch(file_key)
+        if not _backend.update(file_key, new_rows, updates):
+            _write_failed(file_key)
+            return False
+        for pos, _old, new_row in updates:
+            rows[pos] = new_row
+        entry["stamp"] = _file_stamp(file_key)
+        entry["version"] = _next_version(file_key)
+        _notify(file_key, "update", updates)
+        return True
 
+
+@timed()
+def reassign(file_key, column, mapping):
+    """Rewrite a column's values old -> new ({old: new}) across a table in one write.
+
+    Used by the delete/re-add cascades to detach and re-link child rows.
+    """
+    with _writing():
+        rows = get_rows(file_key)
+        changes = {}
+        for pos in _matching_positions(rows, _where_sets({column: list(mapping)})):
+            row = dict(rows[pos])
+            row[column] = mapping[row[column]]
+            changes[pos] = row
+        return replace_rows(file_key, changes) if changes else True
+
+
+@timed()
+def rewrite_rows(file_key, column, mapping, where=None, archive=None):
+    """Remap a column and move rows to another table in one streaming pass.
+
+    Rows matching where (column -> value or values, as in iter_rows) get
+    column rewritten old -> new through mapping; those whose column is one
+    of archive's values are moved instead: archive is (table, values, extra)
+    and extra fills the destination's additional columns. The table is never
+    loaded, so this scales to files far bigger than the cache is happy with.
+    Both tables are dropped from the cache and reparsed on their next read,
+    so make it the last write to them inside a transaction.
+
+    Returns (changed, archived) row counts, or None if the write failed.
+    """
+    if archive is not None:
+        dest_key, values, extra = archive
+        archive = (dest_key, _where_sets({column: values})[column], dict(extra))
+    touched = [file_key] + ([archive[0]] if archive else [])
+    with _writing():
+        for key in touched:
+            _touch(key)
+        result = _backend.rewrite(file_key, column, {str(k): str(v) for k, v in mapping.items()},
+                                  _where_sets(where or {}), archive)
+        for key in touched:
+            if result is None:
+                _write_failed(key)
+            else:
+                invalidate(key)
+        return result
+
+
+@timed()
 def search_csv(file_key, search_query, column=None):
-    data = read_csv(file_key)
+    if hasattr(_backend, "search"):
+        with _lock:
+            return _backend.search(file_key, search_query, column)
     search_query = search_query.lower()
-    results = []
-    for row in data:
-        if column:
-            if search_query in str(row[column]).lower():
-                results.append(row)
-        else:
-            if any(search_query in str(val).lower() for val in row.values()):
-                results.append(row)
-    return results
+    if column:
+        matches = lambda row: search_query in str(row.get(column, '')).lower()
+    else:
+        matches = lambda row: any(search_query in str(val).lower() for val in row.values())
+    return list(iter_rows(file_key, where=matches))
 
+@timed()
 def delete_csv(file_key, id_value, id_column=None):
+    """Delete the row(s) with this id; True/False like write_csv."""
+    return delete_rows(file_key, [id_value], id_column)
+
+@timed()
+def delete_rows(file_key, id_values, id_column=None):
+    """Delete every row whose id_column is one of id_values, with a single write."""
     if id_column is None:
         id_column = get_pk(file_key)
-    data = read_csv(file_key)
-    updated_data = [row for row in data if row[id_column] != id_value]
-    write_csv(file_key, updated_data)
-    return updated_data
+    doomed = set(id_values)
+    with _writing():
+        data = get_rows(file_key)
+        updated_data = [row for row in data if row[id_column] not in doomed]
+        #copy the old rows: the indexes still need their keys once the table is swapped
+        removed = [(pos, dict(row)) for pos, row in enumerate(data) if row[id_column] in doomed]
+        if not removed:
+            return True
+        _touch(file_key)
+        if not _backend.delete(file_key, updated_data, [row for _pos, row in removed]):
+            _write_failed(file_key)
+            return False
+        _store_table(file_key, updated_data, "delete", removed)
+        return True
 
+@timed()
 def update_csv(file_key, id_value, updated_row, id_column=None):
+    """Replace the row(s) with this id; True/False like write_csv."""
     if id_column is None:
         id_column = get_pk(file_key)
-    data = read_csv(file_key)
-    new_list = [updated_row if row[id_column] == id_value else row for row in data]
-    write_csv(file_key, new_list)
-    return new_list
+    with _writing():
+        data = get_rows(file_key)
+        if id_column == get_pk(file_key):
+            from modules.indexes import row_position   # indexes imports this module
+            pos = row_position(file_key, id_value)
+            positions = [pos] if pos is not None and data[pos][id_column] == id_value else []
+        else:
+            positions = [pos for pos, row in enumerate(data) if row[id_column] == id_value]
+        if not positions:
+            return True
+        return replace_rows(file_key, {pos: updated_row for pos in positions})
 
+@timed()
 def sort_csv(file_key, sort_by_column, reverse=False):
-    data = read_csv(file_key)
-    return sorted(data, key=lambda x: x[sort_by_column].lower(), reverse=reverse)
-    
\ No newline at end of file
+    if hasattr(_backend, "sort"):
+        with _lock:
+            return _backend.sort(file_key, sort_by_column, reverse)
+    from modules.indexes import sort_order   # indexes imports this module
+    rows  = get_rows(file_key)
+    order = sort_order(file_key, sort_by_column)
+    return [dict(rows[pos]) for pos in (reversed(order) if reverse else order)]
@@ -0,0 +1,309 @@
+from bisect import bisect_left, bisect_right
+from modules.database_io import (_lock, add_listener, exists, get_pk, get_rows, is_cached,
+                                 table_version)
+from modules.instrumentation import count, timed
+
+#Hash indexes over the cached tables, so lookups like "does this ID exist?"
+#don't have to scan (or reparse) the whole table. Each index remembers the
+#table version it was built against; appends, in-place updates and deletes
+#are applied incrementally, anything else (full rewrites, the file changing on
+#disk) just drops the index and it is rebuilt on the next lookup.
+
+_indexes = {}   # (file_key, name) -> {"version": int, "map": dict}
+_specs   = {}   # (file_key, name) -> (key_fn, unique)
+
+
+def normalise_key(value):
+    """Keys are compared case-insensitively, like the validators always have."""
+    return str(value).upper()
+
+
+def _define(file_key, name, key_fn, unique):
+    _specs[(file_key, name)] = (key_fn, unique)
+
+
+def _add(index_map, key, pos, unique):
+    if unique:
+        index_map[key] = pos
+    else:
+        index_map.setdefault(key, set()).add(pos)
+
+
+def _remove(index_map, key, pos, unique):
+    if unique:
+        if index_map.get(key) == pos:
+            del index_map[key]
+    else:
+        positions = index_map.get(key)
+        if positions is not None:
+            positions.discard(pos)
+            if not positions:
+                del index_map[key]
+
+
+def _shift(index_map, gone, unique):
+    """Renumber positions after the rows at `gone` (sorted) were deleted."""
+    def moved(pos):
+        return pos - bisect_right(gone, pos)
+    first = gone[0]
+    if unique:
+        for key, pos in index_map.items():
+            if pos > first:
+                index_map[key] = moved(pos)
+    else:
+        for key, positions in index_map.items():
+            if max(positions) > first:
+                index_map[key] = {moved(pos) for pos in positions}
+
+
+def _build(file_key, name):
+    key_fn, unique = _specs[(file_key, name)]
+    index_map = {}
+    for pos, row in enumerate(get_rows(file_key)):
+        _add(index_map, key_fn(row), pos, unique)
+    return index_map
+
+
+def _get_index(file_key, name):
+    with _lock:
+        version = table_version(file_key)
+        index = _indexes.get((file_key, name))
+        if index is None or index["version"] != version:
+            index = {"version": version, "map": _build(file_key, name)}
+            _indexes[(file_key, name)] = index
+        return index["map"]
+
+
+@add_listener
+def _on_table_change(file_key, event, payload, version):
+    rows = None
+    for (key, name), index in list(_indexes.items()):
+        if key != file_key:
+            continue
+        if event == "replace" or index["version"] != version - 1:
+            del _indexes[(key, name)]
+            continue
+        key_fn, unique = _specs[(key, name)]
+        index_map = index["map"]
+        if event == "append":
+            rows = rows if rows is not None else get_rows(file_key)
+            for pos in payload:
+                _add(index_map, key_fn(rows[pos]), pos, unique)
+        elif event == "update":
+            for pos, old_row, new_row in payload:
+                _remove(index_map, key_fn(old_row), pos, unique)
+                _add(index_map, key_fn(new_row), pos, unique)
+        elif event == "delete":
+            for pos, old_row in payload:
+                _remove(index_map, key_fn(old_row), pos, unique)
+            _shift(index_map, [pos for pos, _old_row in payload], unique)
+        index["version"] = version
+
+
+# ── Primary keys ───────────────────────────────────────────────────────────
+
+for _file_key in ("students", "programs", "colleges"):
+    _define(_file_key, "pk",
+            lambda row, _pk=get_pk(_file_key): normalise_key(row.get(_pk, '')),
+            unique=True)
+
+
+def key_exists(file_key, value):
+    """Check for a primary key (student id / program or college code).
+
+    O(1) on the hash index once the table is loaded; until then the file is
+    streamed and the scan stops at the first match, rather than loading the
+    whole table just to answer one question.
+    """
+    key = normalise_key(value)
+    if (file_key, "pk") not in _indexes and not is_cached(file_key):
+        pk = get_pk(file_key)
+        return exists(file_key, lambda row: normalise_key(row.get(pk, '')) == key)
+    return key in _get_index(file_key, "pk")
+
+
+def row_position(file_key, value):
+    """Position (in get_rows(file_key)) of the row with this primary key, or None."""
+    return _get_index(file_key, "pk").get(normalise_key(value))
+
+
+def find_row(file_key, value):
+    """Return the cached row with this primary key, or None."""
+    pos = _get_index(file_key, "pk").get(normalise_key(value))
+    return None if pos is None else get_rows(file_key)[pos]
+
+
+# ── Foreign keys (used by the delete / re-add cascades) ────────────────────
+
+_define("students", "program_code", lambda row: row.get('program_code', ''), unique=False)
+_define("programs", "college_code", lambda row: row.get('college_code', ''), unique=False)
+
+
+def students_in_program(program_code):
+    """Positions (in get_rows("students")) of students with this exact program_code."""
+    return sorted(_get_index("students", "program_code").get(program_code, ()))
+
+
+def programs_in_college(college_code):
+    """Positions (in get_rows("programs")) of programs with this exact college_code."""
+    return sorted(_get_index("programs", "college_code").get(college_code, ()))
+
+
+def program_codes_in_college(college_code):
+    """Codes of the programs that belong to this exact college_code."""
+    programs = get_rows("programs")
+    return [programs[pos]['code'] for pos in programs_in_college(college_code)]
+
+
+# ── Program → college join ─────────────────────────────────────────────────
+
+_joins = {}   # name -> (programs version, value)
+
+
+@timed()
+def program_college_map():
+    """{program code: college code}, rebuilt only when programs.csv changes.
+
+    Shared by every caller; don't modify it.
+    """
+    with _lock:
+        version = table_version("programs")
+        cached = _joins.get("program_college")
+        if cached is None or cached[0] != version:
+            count("indexes.program_college_map.rebuild")
+            mapping = {p['code']: p.get('college_code', '') for p in get_rows("programs")}
+            cached = (version, mapping)
+            _joins["program_college"] = cached
+        return cached[1]
+
+
+def college_of_program(program_code, default=""):
+    return program_college_map().get(program_code, default)
+
+
+# ── Prefix (starts-with) search ────────────────────────────────────────────
+
+_prefix = {}   # (file_key, column) -> {"version": stamp, "keys": [...], "positions": [...]}
+
+
+def _prefix_index(file_key, column):
+    with _lock:
+        version = table_version(file_key)
+        index = _prefix.get((file_key, column))
+        if index is None or index["version"] != version:
+            rows = get_rows(file_key)
+            #a columnar table hands over the whole column at once
+            values = (rows.column(column) if hasattr(rows, "column")
+                      else [row.get(column, "") for row in rows])
+            pairs = sorted((str(value).lower(), pos) for pos, value in enumerate(values))
+            index = {"version": version,
+                     "keys": [key for key, _pos in pairs],
+                     "positions": [pos for _key, pos in pairs]}
+            _prefix[(file_key, column)] = index
+        return index
+
+
+def prefix_search(file_key, column, prefix):
+    """Positions of rows whose column starts with prefix (case-insensitive), in table order.
+
+    Uses a per-column sorted key list, so a lookup is a bisect plus the
+    matches rather than a scan of the whole table.
+    """
+    prefix = prefix.lower()
+    index = _prefix_index(file_key, column)
+    keys = index["keys"]
+    lo = bisect_left(keys, prefix)
+    hi = bisect_left(keys, prefix + "\U0010ffff", lo)
+    return sorted(index["positions"][lo:hi])
+
+
+def students_in_college_matching(query):
+    """Positions of students whose (joined) college code contains query."""
+    query = query.lower()
+    positions = []
+    for program_code, college_code in program_college_map().items():
+        if query in college_code.lower():
+            positions.extend(students_in_program(program_code))
+    return sorted(positions)
+
+
+# ── Cached sort orders ─────────────────────────────────────────────────────
+
+_ranks = {}   # (file_key, column) -> (version stamp, ranks)
+
+
+def _college_order():
+    """Student positions ordered by their (joined) college code."""
+    with _lock:
+        stamp = (table_version("students"), table_version("programs"))
+        cached = _prefix.get(("students", "college"))
+        if cached is None or cached["version"] != stamp:
+            mapping = program_college_map()
+            pairs = sorted((str(mapping.get(row.get('program_code'), "")).lower(), pos)
+                           for pos, row in enumerate(get_rows("students")))
+            cached = {"version": stamp,
+                      "keys": [key for key, _pos in pairs],
+                      "positions": [pos for _key, pos in pairs]}
+            _prefix[("students", "college")] = cached
+        return cached["positions"]
+
+
+def sort_order(file_key, column):
+    """Row positions sorted ascending by the lower-cased column value.
+
+    Computed once per table version (it's the same ordering the prefix
+    search index keeps) and shared by both directions: descending is the
+    same list read backwards. "college" on students sorts by the joined
+    college code.
+    """
+    if file_key == "students" and column == "college":
+        return _college_order()
+    return _prefix_index(file_key, column)["positions"]
+
+
+def sort_ranks(file_key, column):
+    """rank[position] = place of that row in sort_order(); for sorting subsets."""
+    with _lock:
+        order = sort_order(file_key, column)
+        cached = _ranks.get((file_key, column))
+        if cached is None or cached[0] is not order:
+            ranks = [0] * len(order)
+            for rank, pos in enumerate(order):
+                ranks[pos] = rank
+            cached = (order, ranks)
+            _ranks[(file_key, column)] = cached
+        return cached[1]
+
+
+class OrderedRows:
+    """A read-only sequence of rows in a precomputed order, optionally reversed.
+
+    Indexing or slicing only touches the rows asked for, so showing one page
+    of a sorted table costs O(page size), not O(table size).
+    """
+
+    __slots__ = ("rows", "order", "reverse")
+
+    def __init__(self, rows, order, reverse=False):
+        self.rows    = rows
+        self.order   = order
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.order)
+
+    def _position(self, i):
+        return self.order[-1 - i] if self.reverse else self.order[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.rows[self._position(j)] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.rows[self._position(i)]
+
+    def __iter__(self):
+        order = reversed(self.order) if self.reverse else self.order
+        return (self.rows[pos] for pos in order)
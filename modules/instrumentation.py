@@ -0,0 +1,137 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+#Timers and counters for the hot paths (CSV parsing, validation, the
+#program -> college join, Treeview updates), switched on with SIS_PROFILE=1.
+#
+#When profiling is off, timed() hands back the undecorated function and
+#count()/timer() are no-ops, so instrumented code runs exactly as before.
+#When it is on, the numbers can be read with snapshot(), shown in the app's
+#stats panel, and written as JSON every SIS_PROFILE_INTERVAL seconds (default
+#10) to SIS_PROFILE_DUMP (default: sis_profile.json in the working
+#directory), plus once more at exit. Only the main process dumps: spawned
+#validation workers import this module too, and their numbers stay their own.
+
+ENABLED  = os.environ.get("SIS_PROFILE", "").lower() not in ("", "0", "false", "no")
+DUMP_PATH = os.environ.get("SIS_PROFILE_DUMP", "sis_profile.json")
+DUMP_INTERVAL = float(os.environ.get("SIS_PROFILE_INTERVAL", "10"))
+
+_lock     = threading.Lock()
+_timers   = {}   # name -> [calls, total seconds, max seconds]
+_counters = {}   # name -> count
+
+
+def _record(name, elapsed):
+    with _lock:
+        entry = _timers.get(name)
+        if entry is None:
+            _timers[name] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+
+def record(name, seconds):
+    """Add one externally measured call of `seconds` to the `name` timer."""
+    if ENABLED:
+        _record(name, seconds)
+
+
+def timed(name=None):
+    """Decorator that times every call under `name` (default: module.qualname)."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(label, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _timer(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - started)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """Context manager that times a block: with timer("database_io.parse"): ..."""
+    return _timer(name) if ENABLED else _NULL_TIMER
+
+
+def count(name, n=1):
+    """Add n to a counter (a no-op unless profiling is enabled)."""
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """{"timers": {name: {calls, total_ms, mean_ms, max_ms}}, "counters": {name: n}}."""
+    with _lock:
+        timers = {name: {"calls": calls,
+                         "total_ms": round(total * 1000, 3),
+                         "mean_ms": round(total * 1000 / calls, 3),
+                         "max_ms": round(peak * 1000, 3)}
+                  for name, (calls, total, peak) in sorted(_timers.items())}
+        return {"timers": timers, "counters": dict(sorted(_counters.items()))}
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def dump(path=None):
+    """Write snapshot() as JSON (atomically); returns True/False."""
+    path = path or DUMP_PATH
+    data = dict(snapshot(), written=time.strftime("%Y-%m-%dT%H:%M:%S"), pid=os.getpid())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        return False
+
+
+def _dump_periodically():
+    while True:
+        time.sleep(DUMP_INTERVAL)
+        dump()
+
+
+if ENABLED and multiprocessing.parent_process() is None:
+    threading.Thread(target=_dump_periodically, name="sis-profile-dump", daemon=True).start()
+    atexit.register(dump)
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+#Cross-process write lock for the data directory.
+#
+#Several SIS instances (or an instance and the API server) may share one
+#data/ folder. Every mutation takes an exclusive advisory lock on a small lock
+#file for as long as the write (or transaction) takes, and no longer: never
+#while a dialog is open. Under the lock the data layer re-checks each table's
+#stamp, so it always writes on top of the latest version on disk.
+#
+#fcntl.flock on POSIX, msvcrt.locking on Windows, and a plain in-process lock
+#where neither exists. The lock is re-entrant within a process, so nested
+#writes (a cascade inside a transaction) don't deadlock on themselves.
+
+LOCK_TIMEOUT = float(os.environ.get("SIS_LOCK_TIMEOUT", "10"))
+_POLL        = 0.01
+
+
+class LockTimeout(OSError):
+    """Another process held the data lock for longer than the timeout."""
+
+
+class FileLock:
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path    = path
+        self.timeout = timeout
+        self._guard  = threading.RLock()
+        self._depth  = 0
+        self._fd     = None
+
+    def _try_lock(self, fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(self, fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+
+    def _lock_file(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"{self.path} is locked by another process")
+            time.sleep(_POLL)
+        return fd
+
+    def acquire(self):
+        self._guard.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file()
+            except BaseException:
+                self._guard.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            self._unlock(fd)
+            os.close(fd)
+        self._guard.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
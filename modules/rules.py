@@ -0,0 +1,187 @@
+import re
+from modules.indexes import key_exists, normalise_key
+
+#A small declarative rule engine for the validators.
+#
+#An entity's checks are written as a Schema: an ordered list of Rules, each
+#bound to one field. The rule factories below compile what they need (regexes
+#included) once, when the schema is declared. Before a row or a batch is
+#checked the schema is bound to a context, which resolves the rules that
+#depend on it into plain one-argument tests:
+#
+#   ctx["is_edit"]   editing an existing record (drops the uniqueness rules)
+#   ctx["keys"]      optional {table: set of normalised keys}; exists/unique
+#                    rules test against these instead of an index lookup
+#
+#so checking a value is a single call, often straight into a builtin such as
+#a compiled pattern's match() or a set's __contains__.
+
+VALID = "Valid."
+
+
+class Rule:
+    """One check on one field.
+
+    test(value) -> bool is called with the field's value as a stripped
+    string; msg is the error text, or a callable value -> text for messages
+    that quote the value. bind(ctx) can be overridden by rules that need the
+    context; it returns the (test, msg) pair to use, or None to skip the rule.
+    """
+
+    __slots__ = ("field", "test", "msg")
+
+    def __init__(self, field, test, msg):
+        self.field = field
+        self.test  = test
+        self.msg   = msg
+
+    def bind(self, ctx):
+        return self.test, self.msg
+
+
+class _KeyRule(Rule):
+    __slots__ = ("table", "present", "skip_on_edit")
+
+    def __init__(self, field, table, msg, present, skip_on_edit):
+        super().__init__(field, None, msg)
+        self.table        = table
+        self.present      = present
+        self.skip_on_edit = skip_on_edit
+
+    def bind(self, ctx):
+        if self.skip_on_edit and ctx.get("is_edit"):
+            return None
+        keys = (ctx.get("keys") or {}).get(self.table)
+        if keys is not None:
+            found = lambda v: normalise_key(v) in keys
+        else:
+            found = lambda v, table=self.table: key_exists(table, v)
+        return (found if self.present else lambda v: not found(v)), self.msg
+
+
+def _text(msg, value):
+    return msg(value) if callable(msg) else msg
+
+
+class Schema:
+    """The ordered rules for one entity."""
+
+    def __init__(self, rules):
+        self.rules  = list(rules)
+        self.fields = list(dict.fromkeys(rule.field for rule in self.rules))
+        self._bound = {}   # context signature -> (bound rules, the key sets they close over)
+
+    def bind(self, ctx=None):
+        """[(field, test, msg)] for a context, in declaration order.
+
+        Bindings are cached per (is_edit, key set objects), so validating row
+        after row with the same context only binds once.
+        """
+        ctx  = ctx or {}
+        keys = ctx.get("keys") or {}
+        signature = (bool(ctx.get("is_edit")), tuple(keys), tuple(map(id, keys.values())))
+        cached = self._bound.get(signature)
+        if cached is not None:
+            return cached[0]
+        bound = []
+        for rule in self.rules:
+            pair = rule.bind(ctx)
+            if pair is not None:
+                bound.append((rule.field, pair[0], pair[1]))
+        if len(self._bound) > 16:
+            self._bound.clear()
+        #keeping the key sets referenced stops their ids from being reused
+        self._bound[signature] = (bound, tuple(keys.values()))
+        return bound
+
+    def validate(self, row, ctx=None, collect=False):
+        """Check one row.
+
+        Fail-fast (the default) returns (ok, msg) with the first broken rule,
+        in declaration order. With collect=True it returns (ok, problems),
+        problems being (field, msg) for every field that breaks a rule (one
+        message per field).
+        """
+        values = {field: str(row.get(field, '')).strip() for field in self.fields}
+        bound  = self.bind(ctx)
+        if not collect:
+            for field, test, msg in bound:
+                if not test(values[field]):
+                    return False, _text(msg, values[field])
+            return True, VALID
+
+        problems = []
+        failed = set()
+        for field, test, msg in bound:
+            if field in failed:
+                continue
+            value = values[field]
+            if not test(value):
+                failed.add(field)
+                problems.append((field, _text(msg, value)))
+        return not problems, problems
+
+    def validate_batch(self, rows, ctx=None):
+        """Fail-fast (ok, msg) for each of many rows, evaluated column by column.
+
+        Each rule runs over its whole column in one pass, only for the rows
+        that are still passing, which gives the same answers as validate()
+        row by row without paying the per-row setup every time.
+        """
+        errors  = [None] * len(rows)
+        pending = list(range(len(rows)))
+        columns = {}
+        for field, test, msg in self.bind(ctx):
+            if not pending:
+                break
+            column = columns.get(field)
+            if column is None:
+                column = columns[field] = [str(row.get(field, '')).strip() for row in rows]
+            bad = [i for i in pending if not test(column[i])]
+            if bad:
+                for i in bad:
+                    errors[i] = _text(msg, column[i])
+                pending = [i for i in pending if errors[i] is None]
+        return [(False, msg) if msg else (True, VALID) for msg in errors]
+
+
+# ── Rule factories ─────────────────────────────────────────────────────────
+
+def check(field, test, msg):
+    """Generic rule: test(value) must be true."""
+    return Rule(field, test, msg)
+
+
+def required(field, msg):
+    return Rule(field, bool, msg)
+
+
+def min_length(field, n, msg):
+    return Rule(field, lambda v: len(v) >= n, msg)
+
+
+def max_length(field, n, msg):
+    return Rule(field, lambda v: len(v) <= n, msg)
+
+
+def matches(field, pattern, msg):
+    return Rule(field, re.compile(pattern).match, msg)
+
+
+def rejects(field, pattern, msg):
+    match = re.compile(pattern).match
+    return Rule(field, lambda v: not match(v), msg)
+
+
+def one_of(field, allowed, msg):
+    return Rule(field, frozenset(allowed).__contains__, msg)
+
+
+def exists(field, table, msg):
+    """The value must be a primary key of `table`."""
+    return _KeyRule(field, table, msg, present=True, skip_on_edit=False)
+
+
+def unique(field, table, msg):
+    """The value must not be a key of `table` yet (not checked when editing)."""
+    return _KeyRule(field, table, msg, present=False, skip_on_edit=True)
@@ -0,0 +1,236 @@
+import re
+from bisect import bisect_right
+from modules.database_io import _lock, add_listener, get_rows, table_version
+
+#Ranked, typo-tolerant search over students, programs and colleges.
+#
+#Every record becomes a small "document" of words (names, codes, and for
+#students the joined program and college names). Words are indexed twice:
+#word -> records that contain it, and trigram -> words that contain it. A
+#query word is matched against the vocabulary by trigram overlap (so
+#"jonh" still finds "john") and by prefix (so "mar" finds "maria"), and
+#records are ranked by how well they match all of the query's words.
+#
+#The index is kept up to date from database_io's change events: appended and
+#edited records are re-indexed on the spot and deleted ones dropped (the later
+#documents renumbered, like the table's rows); anything bigger (rewrites, or
+#the programs/colleges that student documents join against changing) rebuilds
+#that table's index on the next search.
+
+MIN_SIMILARITY = 0.45   # below this a vocabulary word doesn't count as a match
+PREFIX_SCORE   = 0.9    # score for a query word that is a prefix of a word
+TYPO_WEIGHT    = 0.8    # edit-distance matches rank below comparable trigram matches
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_engines = {}        # file_key -> index dict (see _build)
+_last_query = {}     # file_key -> (stamp, query, ranked positions)
+
+
+def tokenize(text):
+    return _WORD.findall(str(text).lower())
+
+
+def trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """Levenshtein distance that also counts a swap of neighbours as one edit."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[len(b)]
+
+
+def similarity(query_word, word, query_grams=None):
+    """0..1 score: exact 1.0, prefix PREFIX_SCORE, else trigram overlap or edit distance."""
+    if word == query_word:
+        return 1.0
+    if word.startswith(query_word):
+        return PREFIX_SCORE
+    query_grams = query_grams or trigrams(query_word)
+    grams = trigrams(word)
+    score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+    longest = max(len(word), len(query_word))
+    allowed = 1 if longest <= 5 else 2   # typos tolerated per word
+    if score < MIN_SIMILARITY and abs(len(word) - len(query_word)) <= allowed:
+        #trigrams punish typos in short words (and swapped letters) hard
+        distance = edit_distance(query_word, word)
+        if distance <= allowed:
+            score = max(score, TYPO_WEIGHT * (1 - distance / longest))
+    return score
+
+
+# ── Documents ──────────────────────────────────────────────────────────────
+
+def _stamp(file_key):
+    if file_key == "students":
+        return (table_version("students"), table_version("programs"), table_version("colleges"))
+    if file_key == "programs":
+        return (table_version("programs"), table_version("colleges"))
+    return (table_version("colleges"),)
+
+
+def _joins(file_key):
+    """Lookups a table's documents pull names from."""
+    colleges = {c['code']: c.get('name', '') for c in get_rows("colleges")}
+    if file_key == "students":
+        programs = {p['code']: (p.get('name', ''), p.get('college_code', ''))
+                    for p in get_rows("programs")}
+        return programs, colleges
+    return None, colleges
+
+
+def _document(file_key, row, joins):
+    programs, colleges = joins
+    if file_key == "students":
+        program_code = row.get('program_code', '')
+        program_name, college_code = programs.get(program_code, ('', ''))
+        text = " ".join((row.get('id', ''), row.get('firstname', ''), row.get('lastname', ''),
+                         program_code, program_name, college_code,
+                         colleges.get(college_code, '')))
+    elif file_key == "programs":
+        college_code = row.get('college_code', '')
+        text = " ".join((row.get('code', ''), row.get('name', ''), college_code,
+                         colleges.get(college_code, '')))
+    else:
+        text = " ".join((row.get('code', ''), row.get('name', '')))
+    return tuple(set(tokenize(text)))
+
+
+# ── Index maintenance ──────────────────────────────────────────────────────
+
+def _add_doc(engine, pos, words):
+    engine["doc_words"][pos] = words
+    for word in words:
+        docs = engine["word_docs"].get(word)
+        if docs is None:
+            docs = engine["word_docs"][word] = set()
+            for gram in trigrams(word):
+                engine["gram_words"].setdefault(gram, set()).add(word)
+        docs.add(pos)
+
+
+def _remove_doc(engine, pos):
+    for word in engine["doc_words"].pop(pos, ()):
+        docs = engine["word_docs"].get(word)
+        if docs is None:
+            continue
+        docs.discard(pos)
+        if not docs:
+            del engine["word_docs"][word]
+            for gram in trigrams(word):
+                words = engine["gram_words"].get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del engine["gram_words"][gram]
+
+
+def _renumber(engine, gone):
+    """Shift positions down past the deleted rows at `gone` (sorted), as the table did."""
+    first = gone[0]
+
+    def moved(pos):
+        return pos - bisect_right(gone, pos) if pos > first else pos
+
+    engine["doc_words"] = {moved(pos): words for pos, words in engine["doc_words"].items()}
+    word_docs = engine["word_docs"]
+    for word, docs in word_docs.items():
+        word_docs[word] = {moved(pos) for pos in docs}
+
+
+def _build(file_key):
+    engine = {"stamp": _stamp(file_key), "doc_words": {}, "word_docs": {}, "gram_words": {}}
+    joins = _joins(file_key)
+    for pos, row in enumerate(get_rows(file_key)):
+        _add_doc(engine, pos, _document(file_key, row, joins))
+    return engine
+
+
+def _engine(file_key):
+    with _lock:
+        engine = _engines.get(file_key)
+        if engine is None or engine["stamp"] != _stamp(file_key):
+            engine = _engines[file_key] = _build(file_key)
+        return engine
+
+
+@add_listener
+def _on_table_change(file_key, event, payload, version):
+    #Changes to programs/colleges show up as a stale stamp on the tables that
+    #join against them, so only the changed table's own index is touched here.
+    engine = _engines.get(file_key)
+    if engine is None:
+        return
+    if event == "replace" or engine["stamp"][0] != version - 1:
+        del _engines[file_key]
+        return
+    joins = _joins(file_key)
+    rows = get_rows(file_key)
+    if event == "append":
+        for pos in payload:
+            _add_doc(engine, pos, _document(file_key, rows[pos], joins))
+    elif event == "update":
+        for pos, _old_row, new_row in payload:
+            _remove_doc(engine, pos)
+            _add_doc(engine, pos, _document(file_key, new_row, joins))
+    elif event == "delete":
+        for pos, _old_row in payload:
+            _remove_doc(engine, pos)
+        _renumber(engine, [pos for pos, _old_row in payload])
+    engine["stamp"] = (version,) + engine["stamp"][1:]
+
+
+# ── Queries ────────────────────────────────────────────────────────────────
+
+def _matching_words(engine, query_word):
+    """{vocabulary word: similarity} for words close enough to query_word."""
+    query_grams = trigrams(query_word)
+    candidates = set()
+    for gram in query_grams:
+        candidates |= engine["gram_words"].get(gram, set())
+    if query_word in engine["word_docs"]:
+        candidates.add(query_word)
+    matches = {}
+    for word in candidates:
+        score = similarity(query_word, word, query_grams)
+        if score >= MIN_SIMILARITY:
+            matches[word] = score
+    return matches
+
+
+def search_positions(file_key, query):
+    """Row positions matching query, best match first."""
+    query_words = tokenize(query)
+    if not query_words:
+        return []
+    with _lock:
+        engine = _engine(file_key)
+        cached = _last_query.get(file_key)
+        if cached and cached[0] == engine["stamp"] and cached[1] == query_words:
+            return cached[2]
+
+        scores  = {}   # position -> summed best score per query word
+        matched = {}   # position -> number of query words it matched
+        for query_word in query_words:
+            best = {}
+            for word, score in _matching_words(engine, query_word).items():
+                for pos in engine["word_docs"][word]:
+                    if score > best.get(pos, 0):
+                        best[pos] = score
+            for pos, score in best.items():
+                scores[pos]  = scores.get(pos, 0) + score
+                matched[pos] = matched.get(pos, 0) + 1
+
+        ranked = sorted(scores, key=lambda pos: (-matched[pos], -scores[pos], pos))
+        _last_query[file_key] = (engine["stamp"], query_words, ranked)
+        return ranked
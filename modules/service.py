@@ -0,0 +1,400 @@
+import hashlib
+from functools import wraps
+from modules.database_io import (Headers, _lock, add_csv, delete_csv, delete_rows, estimate_count,
+                                 get_pk, get_rows, page_rows, reassign, replace_rows,
+                                 table_version, transaction, update_csv)
+from modules.indexes import (find_row, prefix_search, row_position, program_codes_in_college,
+                             program_college_map, sort_ranks, students_in_college_matching,
+                             students_in_program)
+from modules.locking import LockTimeout
+from modules.search_engine import search_positions
+from modules.validators import validate_college, validate_program, validate_student
+
+#The SIS business rules without any UI: add/edit/delete for every record type,
+#the soft-delete cascades and re-linking, and paginated list/search/sort.
+#The Tk forms and the HTTP API (modules/api.py) both go through here.
+#
+#Every mutation validates and writes inside one transaction(), which also holds
+#the data-layer lock, so concurrent callers can't interleave a check with
+#someone else's write. Mutations return (ok, msg) like the validators do.
+#
+#Edits are optimistic: a form (or API client) remembers record_version() when
+#it opens a record and passes it back as expected_version; if the stored row
+#has changed since, from this process or another SIS instance sharing the
+#files, the update or delete is refused instead of silently overwriting it.
+#
+#A failure that isn't about the input itself comes back as a Refusal: still
+#just the message for the forms, but with a kind the API turns into a status.
+#
+#Batch jobs built on the same rules (modules/year_end.py) use mutation(),
+#stored_key() and plural() from here too.
+
+DELETED_PREFIX = "__deleted__"
+MAX_PAGE_SIZE  = 500
+
+CONFLICT = "conflict"   # the record changed since the caller read it
+BUSY     = "busy"       # another process held the data lock too long
+STORAGE  = "storage"    # the write itself failed
+
+
+class Refusal(str):
+    """A failure message that also says what kind of failure it was."""
+
+    def __new__(cls, text, kind):
+        refusal = super().__new__(cls, text)
+        refusal.kind = kind
+        return refusal
+
+
+def _deleted(code):
+    return f"{DELETED_PREFIX}{code}"
+
+
+def mutation(fn):
+    """Run fn in one transaction; a failed commit becomes (False, msg)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            with transaction():
+                return fn(*args, **kwargs)
+        except LockTimeout:
+            return False, Refusal("The records are busy (another SIS instance is saving). "
+                                  "Try again.", BUSY)
+        except OSError:
+            return False, Refusal("Could not save the changes to storage.", STORAGE)
+    return wrapper
+
+
+def row_version(row):
+    """A short fingerprint of a stored row; it changes whenever any value does."""
+    text = "\x1f".join(str(value) for value in row.values())
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def record_version(file_key, key):
+    """row_version() of the stored record with this key, or None if it doesn't exist."""
+    with _lock:
+        row = find_row(file_key, key)
+        return None if row is None else row_version(row)
+
+
+def _conflict(file_key, stored, expected_version):
+    """An error message if the stored row no longer matches expected_version."""
+    if expected_version is None or record_version(file_key, stored) == expected_version:
+        return None
+    return Refusal(f"{stored} was changed by someone else after you opened it. "
+                   "Close it and open it again to see the latest version.", CONFLICT)
+
+
+def stored_key(file_key, key):
+    """The primary key as stored (keys match case-insensitively), or None."""
+    row = find_row(file_key, key)
+    return None if row is None else row[get_pk(file_key)]
+
+
+def _clean(file_key, data):
+    """Only the schema's columns, as stripped strings."""
+    return {h: str(data.get(h, "")).strip() for h in Headers[file_key]}
+
+
+# ── Students ───────────────────────────────────────────────────────────────
+
+@mutation
+def add_student(data):
+    student = _clean("students", data)
+    ok, msg = validate_student(student)
+    if not ok:
+        return False, msg
+    add_csv("students", student)
+    return True, f"Student {student['id']} added."
+
+
+@mutation
+def update_student(student_id, data, expected_version=None):
+    stored = stored_key("students", student_id)
+    if stored is None:
+        return False, f"Student {student_id} does not exist."
+    conflict = _conflict("students", stored, expected_version)
+    if conflict:
+        return False, conflict
+    student = dict(_clean("students", data), id=stored)
+    ok, msg = validate_student(student, skip_id_check=True)
+    if not ok:
+        return False, msg
+    update_csv("students", stored, student)
+    return True, f"Student {stored} updated."
+
+
+@mutation
+def delete_student(student_id, expected_version=None):
+    stored = stored_key("students", student_id)
+    if stored is None:
+        return False, f"Student {student_id} does not exist."
+    conflict = _conflict("students", stored, expected_version)
+    if conflict:
+        return False, conflict
+    delete_csv("students", stored)
+    return True, f"Student {stored} deleted."
+
+
+# ── Students in bulk ───────────────────────────────────────────────────────
+#Each batch is checked as a whole and applied as one set-based change with a
+#single write, however many students are selected.
+
+MAX_YEAR = 4
+
+
+def _selected_students(student_ids, expected_versions):
+    """({position: row} for the ids, None) or (None, error message)."""
+    rows = get_rows("students")
+    selected = {}
+    for sid in dict.fromkeys(str(s) for s in student_ids):
+        pos = row_position("students", sid)
+        if pos is None:
+            return None, f"Student {sid} no longer exists."
+        if expected_versions and sid in expected_versions \
+                and row_version(rows[pos]) != expected_versions[sid]:
+            return None, Refusal(f"Student {sid} was changed by someone else after you "
+                                 "selected it. Nothing was changed.", CONFLICT)
+        selected[pos] = rows[pos]
+    if not selected:
+        return None, "No students selected."
+    return selected, None
+
+
+def plural(n, word):
+    """'1 student', '2 students'."""
+    return f"{n} {word}{'' if n == 1 else 's'}"
+
+
+@mutation
+def delete_students(student_ids, expected_versions=None):
+    selected, error = _selected_students(student_ids, expected_versions)
+    if error:
+        return False, error
+    delete_rows("students", [row['id'] for row in selected.values()])
+    return True, f"Deleted {plural(len(selected), 'student')}."
+
+
+@mutation
+def move_students(student_ids, program_code, expected_versions=None):
+    """Reassign the students to another program."""
+    selected, error = _selected_students(student_ids, expected_versions)
+    if error:
+        return False, error
+    code = stored_key("programs", program_code)
+    if code is None:
+        return False, f"Program '{program_code}' does not exist."
+    replace_rows("students", {pos: dict(row, program_code=code)
+                              for pos, row in selected.items()})
+    return True, f"Moved {plural(len(selected), 'student')} to {code}."
+
+
+@mutation
+def promote_students(student_ids, expected_versions=None):
+    """Move the students up one year level; students already in 4th year stay put."""
+    selected, error = _selected_students(student_ids, expected_versions)
+    if error:
+        return False, error
+    changes = {pos: dict(row, year=str(int(row['year']) + 1))
+               for pos, row in selected.items()
+               if row['year'].isdigit() and int(row['year']) < MAX_YEAR}
+    if changes:
+        replace_rows("students", changes)
+    msg = f"Promoted {plural(len(changes), 'student')}."
+    skipped = len(selected) - len(changes)
+    if skipped:
+        msg += f" {plural(skipped, 'student')} already in year {MAX_YEAR} left as is."
+    return True, msg
+
+
+# ── Programs ───────────────────────────────────────────────────────────────
+
+@mutation
+def add_program(data):
+    program = _clean("programs", data)
+    program['code'] = program['code'].upper()
+    ok, msg = validate_program(program)
+    if not ok:
+        return False, msg
+    code = program['code']
+    add_csv("programs", program)
+    # Re-link students left unassigned when this program was deleted
+    reassign("students", "program_code", {_deleted(code): code})
+    return True, f"Program {code} added."
+
+
+@mutation
+def update_program(code, data, expected_version=None):
+    stored = stored_key("programs", code)
+    if stored is None:
+        return False, f"Program {code} does not exist."
+    conflict = _conflict("programs", stored, expected_version)
+    if conflict:
+        return False, conflict
+    program = dict(_clean("programs", data), code=stored)
+    ok, msg = validate_program(program, is_edit=True)
+    if not ok:
+        return False, msg
+    update_csv("programs", stored, program)
+    return True, f"Program {stored} updated."
+
+
+@mutation
+def delete_program(code, expected_version=None):
+    stored = stored_key("programs", code)
+    if stored is None:
+        return False, f"Program {code} does not exist."
+    conflict = _conflict("programs", stored, expected_version)
+    if conflict:
+        return False, conflict
+    code = stored
+    delete_csv("programs", code)
+    reassign("students", "program_code", {code: _deleted(code)})
+    return True, f"Program {code} deleted."
+
+
+# ── Colleges ───────────────────────────────────────────────────────────────
+
+@mutation
+def add_college(data):
+    college = _clean("colleges", data)
+    college['code'] = college['code'].upper()
+    ok, msg = validate_college(college)
+    if not ok:
+        return False, msg
+    code = college['code']
+    add_csv("colleges", college)
+    # Re-link the programs (and their students) unassigned when it was deleted
+    reassign("programs", "college_code", {_deleted(code): code})
+    reassign("students", "program_code",
+             {_deleted(p): p for p in program_codes_in_college(code)})
+    return True, f"College {code} added."
+
+
+@mutation
+def update_college(code, data, expected_version=None):
+    stored = stored_key("colleges", code)
+    if stored is None:
+        return False, f"College {code} does not exist."
+    conflict = _conflict("colleges", stored, expected_version)
+    if conflict:
+        return False, conflict
+    college = dict(_clean("colleges", data), code=stored)
+    ok, msg = validate_college(college, is_edit=True)
+    if not ok:
+        return False, msg
+    update_csv("colleges", stored, college)
+    return True, f"College {stored} updated."
+
+
+@mutation
+def delete_college(code, expected_version=None):
+    stored = stored_key("colleges", code)
+    if stored is None:
+        return False, f"College {code} does not exist."
+    conflict = _conflict("colleges", stored, expected_version)
+    if conflict:
+        return False, conflict
+    code = stored
+    program_codes = program_codes_in_college(code)
+    delete_csv("colleges", code)
+    reassign("programs", "college_code", {code: _deleted(code)})
+    reassign("students", "program_code", {p: _deleted(p) for p in program_codes})
+    return True, f"College {code} deleted."
+
+
+ADD    = {"students": add_student, "programs": add_program, "colleges": add_college}
+UPDATE = {"students": update_student, "programs": update_program, "colleges": update_college}
+DELETE = {"students": delete_student, "programs": delete_program, "colleges": delete_college}
+
+
+def delete_impact(file_key, key):
+    """What deleting a record would unassign: {"programs": n, "students": n}."""
+    if file_key == "programs":
+        return {"programs": 0, "students": len(students_in_program(str(key)))}
+    if file_key == "colleges":
+        program_codes = program_codes_in_college(str(key))
+        return {"programs": len(program_codes),
+                "students": sum(len(students_in_program(p)) for p in program_codes)}
+    return {"programs": 0, "students": 0}
+
+
+# ── Queries ────────────────────────────────────────────────────────────────
+
+def _with_college(file_key, row, college_map):
+    record = dict(row)
+    if file_key == "students":
+        record['college'] = college_map.get(record.get('program_code'), "")
+    return record
+
+
+def get_record(file_key, key):
+    """One record by primary key (students carry their joined college), or None."""
+    with _lock:
+        row = find_row(file_key, key)
+        if row is None:
+            return None
+        return _with_college(file_key, row,
+                             program_college_map() if file_key == "students" else {})
+
+
+def find_positions(file_key, query, column=None):
+    """Positions matching query, the same way the table views search.
+
+    column=None ranks across every field (typo-tolerant, best match first);
+    "college" on students matches the joined college code; any other column
+    is a starts-with match.
+    """
+    query = query.strip().lower()
+    if not query:
+        return None
+    if column is None:
+        return search_positions(file_key, query)
+    if column == "college" and file_key == "students":
+        return students_in_college_matching(query)
+    return prefix_search(file_key, column, query)
+
+
+def list_records(file_key, page=1, per_page=50, sort=None, reverse=False,
+                 query=None, column=None):
+    """One page of a table, optionally searched and sorted.
+
+    Returns {"total", "page", "per_page", "pages", "version", "rows"}. Only the
+    rows on the requested page are copied out of the cache.
+    """
+    per_page = max(1, min(int(per_page), MAX_PAGE_SIZE))
+    with _lock:   # positions must not go stale between the search and the page
+        rows = get_rows(file_key)
+        positions = find_positions(file_key, query, column) if query else None
+        if sort:
+            ranks = sort_ranks(file_key, sort)
+            if positions is None:
+                positions = range(len(rows))
+            positions = sorted(positions, key=ranks.__getitem__, reverse=reverse)
+        elif positions is None:
+            positions = range(len(rows) - 1, -1, -1) if reverse else range(len(rows))
+
+        total = len(positions)
+        pages = max(1, -(-total // per_page))
+        page  = max(1, min(int(page), pages))
+        start = (page - 1) * per_page
+        college_map = program_college_map() if file_key == "students" else {}
+        return {"total": total, "page": page, "per_page": per_page, "pages": pages,
+                "version": table_version(file_key),
+                "rows": [_with_college(file_key, rows[pos], college_map)
+                         for pos in positions[start:start + per_page]]}
+
+
+def page_records(file_key, limit=50, cursor=None, sort=None, reverse=False):
+    """One cursor-paginated page (see database_io.page_rows).
+
+    Returns {"rows", "next_cursor", "total", "exact"}; total is only an
+    estimate ("exact": false) while a big CSV table hasn't been loaded yet.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    rows, next_cursor = page_rows(file_key, limit, cursor, order_by=sort, reverse=reverse)
+    total, exact = estimate_count(file_key)
+    college_map = program_college_map() if file_key == "students" else {}
+    return {"rows": [_with_college(file_key, row, college_map) for row in rows],
+            "next_cursor": next_cursor, "total": total, "exact": exact}
@@ -0,0 +1,945 @@
+import os
+import csv
+import shutil
+import json
+import locale
+import sqlite3
+from itertools import chain
+from modules.locking import FileLock
+
+#Storage backends for database_io. database_io keeps the in-memory table
+#store and indexes; a backend only has to persist rows. Every backend
+#implements the same methods:
+#
+#   initialize()                      create whatever files/tables are missing
+#   stamp(file_key)                   cheap token that changes when the data changes
+#   load(file_key)                    all rows, in insertion order, as dicts of strings
+#   iter_rows(file_key, columns, where)
+#                                     the same rows streamed one at a time; where
+#                                     maps column -> set of accepted values
+#   save(file_key, rows)              replace the whole table
+#   appendable(file_key)              whether append() can add to the table as it
+#                                     stands (if not, the caller save()s instead)
+#   append(file_key, rows)            add rows at the end
+#   update(file_key, rows, updates)   rows is the full new table, updates the
+#                                     (position, old_row, new_row) that changed
+#   delete(file_key, rows, removed)   rows is the table after removing `removed`
+#   page(file_key, limit, after)      up to limit (mark, row) pairs in table order,
+#                                     after the row `after` = (index, mark, key)
+#                                     describes (or from the start); a mark lets
+#                                     the next page find its place without a scan
+#   rewrite(file_key, column, mapping, where, archive)
+#                                     one streaming pass over a table: rows that pass
+#                                     where get column mapped old -> new, and rows
+#                                     whose column is in archive's values move to
+#                                     another table; returns (changed, archived)
+#                                     or None if the write failed
+#   begin() / commit() / rollback()   group the writes in between into one
+#                                     all-or-nothing transaction
+#
+#and has a `lock` (modules/locking.FileLock) that database_io holds around
+#every write, so SIS instances sharing the same files take turns.
+#
+#Optional hooks database_io uses when a backend has them: search() and sort()
+#(answered by the database instead of the cache) and estimate(file_key) ((row
+#count, exact?) without loading the table).
+#
+#All methods return True/False like write_csv always has.
+
+
+def _fsync_dir(path):
+    """Make a rename inside `path` durable (not supported on Windows)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _append_file(source, target):
+    """Add source's bytes to the end of target (on a new line), durably."""
+    with open(target, 'r+b') as dst, open(source, 'rb') as src:
+        size = dst.seek(0, os.SEEK_END)
+        if size:
+            dst.seek(-1, os.SEEK_END)
+            if dst.read(1) != b'\n':
+                dst.write(b'\r\n')
+        shutil.copyfileobj(src, dst)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+
+def _records(f, offset):
+    """(start offset, cells) for each CSV record of binary file f from offset on.
+
+    csv.reader only pulls the lines of one record at a time, so the bytes
+    counted so far are always where the next record starts.
+    """
+    encoding = locale.getpreferredencoding(False)
+    f.seek(offset)
+    where = offset
+
+    def lines():
+        nonlocal where
+        for raw in iter(f.readline, b''):
+            where += len(raw)
+            yield raw.decode(encoding)
+
+    start = offset
+    for cells in csv.reader(lines()):
+        yield start, cells
+        start = where
+
+
+def _cell(cells, i):
+    return cells[i] if i is not None and i < len(cells) else ''
+
+
+class CsvBackend:
+    """Plain CSV files, one per table (the original storage format).
+
+    Files are never rewritten in place: a new copy is written next to the
+    original, fsynced and swapped in with os.replace(), so a crash or a full
+    disk leaves either the old file or the new one. Inside a transaction the
+    new copies are only staged, and commit() records them in a small journal
+    before swapping any of them, so a multi-table cascade can't be left half
+    applied; initialize() finishes (or discards) whatever a crash interrupted.
+    Rows appended inside a transaction are staged on their own (a ".txn.add"
+    tail) and the journal notes the file's size, so a commit still only
+    appends to the file and replaying it can't add them twice.
+    """
+
+    name = "csv"
+
+    def __init__(self, files, headers, data_dir):
+        self.files   = files
+        self.headers = headers
+        self.data_dir = data_dir
+        self.journal_path = os.path.join(data_dir, '.journal.json')
+        self.lock    = FileLock(os.path.join(data_dir, '.sis.lock'))
+        self._staged = None   # file_key -> staged path while a transaction is open
+        self._tails  = {}     # file_key -> staged ".txn.add" path of rows appended in it
+
+    def initialize(self):
+        #if the data directory doesn't exist, create it
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+        self.recover()
+        #for each file in our FILES mapping, check if it exists. If not, create it and write the header row.
+        for key, file_path in self.files.items():
+            if not os.path.exists(file_path):
+                with open(file_path, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(self.headers[key])
+
+    def stamp(self, file_key):
+        try:
+            st = os.stat(self.files[file_key])
+            #every os.replace() brings a new inode, so a same-size rewrite
+            #within one mtime tick still changes the stamp
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def load(self, file_key):
+        data = []
+        try:
+            with open(self.files[file_key], 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    data.append(row)
+        except (FileNotFoundError, OSError):
+            pass
+        return data
+
+    def iter_rows(self, file_key, columns=None, where=None):
+        #csv.reader instead of DictReader: the where test runs on the raw
+        #cells, so a dict is only built for rows that pass it
+        try:
+            f = open(self.files[file_key], 'r', newline='')
+        except OSError:
+            return
+        with f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            index = {name: i for i, name in enumerate(header)}
+            tests = [(index.get(col), accepted) for col, accepted in (where or {}).items()]
+            picks = [(name, index.get(name)) for name in (columns or header)]
+            for cells in reader:
+                if not cells:
+                    continue
+                if any(_cell(cells, i) not in accepted for i, accepted in tests):
+                    continue
+                yield {name: _cell(cells, i) for name, i in picks}
+
+    def _write_copy(self, file_key, rows, path):
+        try:
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.headers[file_key])
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+        except OSError:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+
+    def save(self, file_key, rows):
+        file_path = self.files[file_key]
+        if self._staged is not None:
+            staged_path = file_path + '.txn'
+            if not self._write_copy(file_key, rows, staged_path):
+                return False
+            self._staged[file_key] = staged_path
+            #the whole table is in the copy, appended rows included
+            self._discard([self._tails.pop(file_key, None) or staged_path + '.add'])
+            return True
+        tmp_path = file_path + '.tmp'
+        if not self._write_copy(file_key, rows, tmp_path):
+            return False
+        try:
+            os.replace(tmp_path, file_path)
+        except OSError:
+            return False
+        _fsync_dir(os.path.dirname(file_path))
+        return True
+
+    def _header_matches(self, file_key):
+        """True when the file on disk starts with this table's schema header."""
+        try:
+            with open(self.files[file_key], 'r', newline='') as f:
+                header = next(csv.reader(f), None)
+        except OSError:
+            return False
+        return header == self.headers[file_key]
+
+    def appendable(self, file_key):
+        """False when the file is missing, empty or has an unexpected header."""
+        return (self._staged is not None and file_key in self._staged) \
+            or self._header_matches(file_key)
+
+    def append(self, file_key, rows):
+        """Append rows to the end of the file without rewriting what is there.
+
+        Returns False when the file can't safely be appended to (see
+        appendable()). Inside a transaction the rows go to the staged copy, or
+        to a staged tail that commit() appends.
+        """
+        file_path = self.files[file_key]
+        if self._staged is not None:
+            if file_key in self._staged:
+                file_path = self._staged[file_key]
+            elif self._header_matches(file_key):
+                file_path = self._tails.setdefault(file_key, file_path + '.txn.add')
+                if not os.path.exists(file_path):
+                    open(file_path, 'w').close()
+            else:
+                return False
+        elif not self._header_matches(file_key):
+            return False
+        try:
+            with self._open_for_append(file_path) as f:
+                writer = csv.DictWriter(f, fieldnames=self.headers[file_key])
+                for row in rows:
+                    writer.writerow(row)
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+        except OSError:
+            return False
+
+    def _open_for_append(self, path):
+        with open(path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(-1, os.SEEK_END)
+            needs_newline = size > 0 and f.read(1) != b'\n'
+        f = open(path, 'a', newline='')
+        if needs_newline:
+            f.write('\r\n')
+        return f
+
+    def update(self, file_key, rows, updates):
+        return self.save(file_key, rows)
+
+    def estimate(self, file_key, sample=64 * 1024):
+        """(row count, exact?) from the file size and the length of the first rows."""
+        path = self.files[file_key]
+        try:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                head = f.read(sample)
+        except OSError:
+            return 0, True
+        if len(head) >= size:
+            return sum(1 for _row in self.iter_rows(file_key)), True
+        lines = head.count(b'\n')
+        if lines < 2:
+            return 0, False
+        return max(0, round(size * lines / len(head)) - 1), False
+
+    def delete(self, file_key, rows, removed):
+        return self.save(file_key, rows)
+
+    def pk(self, file_key):
+        return 'id' if file_key in ('students', 'graduates') else 'code'
+
+    def page(self, file_key, limit, after=None):
+        """Rows in file order; a row's mark is the byte offset it starts at.
+
+        The next page seeks straight to the last row's offset and checks that
+        the same key is still there. If the file was rewritten since, the key
+        is looked up again, and if that row is gone the page resumes at its
+        old index, like the cached table does.
+        """
+        try:
+            f = open(self.files[file_key], 'rb')
+        except OSError:
+            return []
+        with f:
+            records = _records(f, 0)
+            header = next(records, (0, None))[1]
+            if not header:
+                return []
+            key_at = header.index(self.pk(file_key)) if self.pk(file_key) in header else None
+            if after is not None:
+                records = self._resume(f, after, key_at)
+            page = []
+            for start, cells in records:
+                if cells:
+                    page.append((start, {name: _cell(cells, i) for i, name in enumerate(header)}))
+                    if len(page) == limit:
+                        break
+            return page
+
+    def _resume(self, f, after, key_at):
+        """The records following the `after` row (see page())."""
+        index, mark, key = after
+        if mark:
+            resumed = _records(f, mark)
+            first = next(resumed, None)
+            if first is not None and _cell(first[1], key_at) == key:
+                return resumed
+        #no mark, or the file changed since: find the row by key ...
+        records = _records(f, 0)
+        next(records, None)
+        for _start, cells in records:
+            if cells and _cell(cells, key_at) == key:
+                return records
+        #... or, if it was deleted, go on from where it was
+        records = _records(f, 0)
+        next(records, None)
+        skipped = 0
+        for start, cells in records:
+            if not cells:
+                continue
+            if skipped == index:
+                return chain([(start, cells)], records)
+            skipped += 1
+        return iter(())
+
+    def rewrite(self, file_key, column, mapping, where=None, archive=None):
+        """Stream the file into a staged copy with csv.reader/writer, no dicts.
+
+        The archived rows are added to a staged copy of the archive table, and
+        both copies are swapped in together by commit(): through the open
+        transaction if there is one, else through one of its own.
+        """
+        own = self._staged is None
+        if own:
+            self.begin()
+        try:
+            result = self._rewrite(file_key, column, mapping, where, archive)
+        except OSError:
+            self._discard([self.files[file_key] + '.txn.new'])
+            result = None
+        if own:
+            if result is None:
+                self.rollback()
+            elif not self.commit():
+                return None
+        return result
+
+    def _rewrite(self, file_key, column, mapping, where, archive):
+        schema = self.headers[file_key]
+        self._stage_tail(file_key)
+        source = self._staged.get(file_key, self.files[file_key])
+        staged = self.files[file_key] + '.txn'
+        archive_values = archive[1] if archive else ()
+        changed, moved = 0, []
+        with open(source, 'r', newline='') as src, open(staged + '.new', 'w', newline='') as dst:
+            reader = csv.reader(src)
+            header = next(reader, None) or schema
+            index  = {name: i for i, name in enumerate(header)}
+            picks  = [index.get(name) for name in schema]
+            at     = schema.index(column)
+            tests  = [(schema.index(col), accepted) for col, accepted in (where or {}).items()]
+            reshape, width = header != schema, len(schema)
+
+            def rows():
+                nonlocal changed
+                for cells in reader:
+                    if not cells:
+                        continue
+                    if reshape or len(cells) != width:
+                        cells = [_cell(cells, i) for i in picks]
+                    if tests and not all(cells[i] in accepted for i, accepted in tests):
+                        yield cells
+                        continue
+                    value = cells[at]
+                    if value in archive_values:
+                        moved.append(cells)
+                        continue
+                    new = mapping.get(value)
+                    if new is not None:
+                        cells[at] = new
+                        changed += 1
+                    yield cells
+
+            writer = csv.writer(dst)
+            writer.writerow(schema)
+            writer.writerows(rows())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(staged + '.new', staged)
+        self._staged[file_key] = staged
+        if moved:
+            self._archive(file_key, moved, archive)
+        return changed, len(moved)
+
+    def _archive(self, file_key, moved, archive):
+        dest_key, _values, extra = archive
+        schema = self.headers[file_key]
+        columns = self.headers[dest_key]
+        staged = self.files[dest_key] + '.txn'
+        self._stage_tail(dest_key)
+        if self._staged.get(dest_key) != staged:
+            if self._header_matches(dest_key):
+                shutil.copyfile(self.files[dest_key], staged)
+            elif not self._write_copy(dest_key, self.load(dest_key), staged):
+                raise OSError(f"could not stage {dest_key}")
+            self._staged[dest_key] = staged
+        if columns[:len(schema)] == schema:
+            #the usual shape: the same columns plus the extra ones at the end
+            tail = [extra.get(name, '') for name in columns[len(schema):]]
+            rows = (cells + tail for cells in moved)
+        else:
+            index = {name: i for i, name in enumerate(schema)}
+            layout = [(index.get(name), extra.get(name, '')) for name in columns]
+            rows = ([cells[i] if i is not None else value for i, value in layout]
+                    for cells in moved)
+        with self._open_for_append(staged) as f:
+            csv.writer(f).writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _stage_tail(self, file_key):
+        """Fold rows appended in this transaction into a full staged copy."""
+        tail = self._tails.pop(file_key, None)
+        if tail is None:
+            return
+        staged = self.files[file_key] + '.txn'
+        shutil.copyfile(self.files[file_key], staged)
+        self._staged[file_key] = staged
+        _append_file(tail, staged)
+        self._discard([tail])
+
+    # -- transactions ----------------------------------------------------------
+
+    def begin(self):
+        self._staged = {}
+        self._tails  = {}
+
+    def commit(self):
+        staged, self._staged = self._staged, None
+        tails, self._tails = self._tails, {}
+        if not staged and not tails:
+            return True
+        #1. the journal is the commit point: once it is on disk the swaps
+        #   below will happen, even if we crash half way through them
+        moves = [[path, self.files[key]] for key, path in staged.items()]
+        try:
+            appends = [[path, self.files[key], os.path.getsize(self.files[key])]
+                       for key, path in tails.items()]
+            with open(self.journal_path, 'w') as f:
+                json.dump({"moves": moves, "appends": appends}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            _fsync_dir(self.data_dir)
+        except OSError:
+            self._discard(path for path, _target in moves)
+            self._discard(tails.values())
+            return False
+        #2. swap the staged copies in and add the tails, 3. forget the journal
+        self._replay(moves, appends)
+        return True
+
+    def rollback(self):
+        staged, self._staged = self._staged, None
+        tails, self._tails = self._tails, {}
+        self._discard((staged or {}).values())
+        self._discard(tails.values())
+
+    def recover(self):
+        """Finish a transaction that was committed but not fully applied."""
+        if self._staged is None:
+            try:
+                with open(self.journal_path) as f:
+                    journal = json.load(f)
+                moves, appends = journal["moves"], journal.get("appends", [])
+            except FileNotFoundError:
+                moves = None
+            except (OSError, ValueError, KeyError):
+                moves, appends = [], []    # torn journal: the commit never happened
+            if moves is not None:
+                self._replay(moves, appends)
+        #staged copies without a journal belong to a transaction that never committed
+        self._discard(path + suffix for path in self.files.values()
+                      for suffix in ('.txn', '.txn.new', '.txn.add'))
+
+    def _replay(self, moves, appends=()):
+        for staged_path, target in moves:
+            if os.path.exists(staged_path):
+                os.replace(staged_path, target)
+        for tail, target, size in appends:
+            if os.path.exists(tail):
+                #cut back to the size at commit first, so a replay after a
+                #crash half way through the append doesn't add rows twice
+                with open(target, 'r+b') as f:
+                    f.truncate(size)
+                _append_file(tail, target)
+                os.remove(tail)
+        _fsync_dir(self.data_dir)
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+
+    def _discard(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# ── SQLite ─────────────────────────────────────────────────────────────────
+
+#Foreign keys can't point at soft-deleted ("__deleted__BSCS") or otherwise
+#dangling codes, so each reference is split into a real foreign key column and
+#a "detached_*" column that keeps the original text. Rows are always read back
+#as COALESCE(fk, detached), so the CSV-shaped rows the rest of the app sees
+#don't change.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS colleges (
+    code  TEXT PRIMARY KEY,
+    name  TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS programs (
+    code             TEXT PRIMARY KEY,
+    name             TEXT NOT NULL DEFAULT '',
+    college_code     TEXT REFERENCES colleges(code),
+    detached_college TEXT
+);
+CREATE TABLE IF NOT EXISTS students (
+    id               TEXT PRIMARY KEY,
+    firstname        TEXT NOT NULL DEFAULT '',
+    lastname         TEXT NOT NULL DEFAULT '',
+    program_code     TEXT REFERENCES programs(code),
+    detached_program TEXT,
+    year             TEXT NOT NULL DEFAULT '',
+    gender           TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS graduates (
+    id               TEXT PRIMARY KEY,
+    firstname        TEXT NOT NULL DEFAULT '',
+    lastname         TEXT NOT NULL DEFAULT '',
+    program_code     TEXT NOT NULL DEFAULT '',
+    year             TEXT NOT NULL DEFAULT '',
+    gender           TEXT NOT NULL DEFAULT '',
+    graduated        TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS programs_college     ON programs(college_code);
+CREATE INDEX IF NOT EXISTS programs_name        ON programs(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS colleges_name        ON colleges(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS students_program     ON students(program_code);
+CREATE INDEX IF NOT EXISTS students_firstname   ON students(firstname COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS students_lastname    ON students(lastname COLLATE NOCASE);
+
+-- Deleting a parent detaches its children instead of breaking the FK,
+-- which is what a dangling code in the CSV files amounts to.
+CREATE TRIGGER IF NOT EXISTS colleges_detach BEFORE DELETE ON colleges BEGIN
+    UPDATE programs SET detached_college = college_code, college_code = NULL
+     WHERE college_code = OLD.code;
+    UPDATE meta SET value = value + 1 WHERE key = 'programs';
+END;
+CREATE TRIGGER IF NOT EXISTS programs_detach BEFORE DELETE ON programs BEGIN
+    UPDATE students SET detached_program = program_code, program_code = NULL
+     WHERE program_code = OLD.code;
+    UPDATE meta SET value = value + 1 WHERE key = 'students';
+END;
+
+-- One generation counter per table; it is what stamp() reports.
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('colleges', 0), ('programs', 0), ('students', 0),
+                                   ('graduates', 0);
+"""
+
+#column -> (fk column, detached column, parent table)
+_REFERENCES = {"students": ("program_code", "detached_program", "programs"),
+               "programs": ("college_code", "detached_college", "colleges")}
+
+
+class SqliteBackend:
+    """A single SQLite database with keys, foreign keys and indexes."""
+
+    name = "sqlite"
+
+    def __init__(self, path, headers):
+        self.path    = path
+        self.headers = headers
+        self.lock    = FileLock(path + '.lock')
+        self._conn   = None
+        self._in_transaction = False
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+        return self._conn
+
+    def initialize(self):
+        self.conn
+
+    def pk(self, file_key):
+        return 'id' if file_key in ('students', 'graduates') else 'code'
+
+    def stamp(self, file_key):
+        try:
+            return self.conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (file_key,)).fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def _select(self, file_key):
+        columns = []
+        for col in self.headers[file_key]:
+            ref = _REFERENCES.get(file_key)
+            if ref and col == ref[0]:
+                columns.append(f"COALESCE({ref[0]}, {ref[1]}, '') AS {col}")
+            else:
+                columns.append(col)
+        return f"SELECT {', '.join(columns)} FROM {file_key}"
+
+    def _to_dicts(self, cursor):
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, values)) for values in cursor]
+
+    def load(self, file_key):
+        try:
+            return self._to_dicts(self.conn.execute(self._select(file_key) + " ORDER BY rowid"))
+        except sqlite3.Error:
+            return []
+
+    def _expr(self, file_key, column):
+        ref = _REFERENCES.get(file_key)
+        return f"COALESCE({ref[0]}, {ref[1]}, '')" if ref and column == ref[0] else column
+
+    def _in(self, file_key, column, accepted):
+        """("<column> IN (?, ...)", params) over the row's CSV-shaped value."""
+        accepted = sorted(accepted)
+        return f"{self._expr(file_key, column)} IN ({', '.join('?' * len(accepted))})", accepted
+
+    def _where(self, file_key, where):
+        """(" WHERE ..." or "", params) for a column -> accepted values filter."""
+        clauses, params = [], []
+        for col, accepted in (where or {}).items():
+            clause, values = self._in(file_key, col, accepted)
+            clauses.append(clause)
+            params.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def iter_rows(self, file_key, columns=None, where=None):
+        columns = [c for c in (columns or self.headers[file_key]) if c in self.headers[file_key]]
+        if any(col not in self.headers[file_key] for col in (where or {})):
+            return
+        sql, params = self._where(file_key, where)
+        sql = (f"SELECT {', '.join(f'{self._expr(file_key, c)} AS {c}' for c in columns)} "
+               f"FROM {file_key}") + sql
+        try:
+            cursor = self.conn.execute(sql + " ORDER BY rowid", params)
+        except sqlite3.Error:
+            return
+        try:
+            for values in cursor:
+                yield dict(zip(columns, values))
+        finally:
+            cursor.close()
+
+    # -- writes ----------------------------------------------------------------
+
+    def _parent_codes(self, file_key):
+        ref = _REFERENCES.get(file_key)
+        if not ref:
+            return None
+        return {code for (code,) in self.conn.execute(f"SELECT code FROM {ref[2]}")}
+
+    def _encode(self, file_key, row, parents):
+        """Row dict -> column values, splitting the reference into fk/detached."""
+        values = {col: row.get(col, '') for col in self.headers[file_key]}
+        ref = _REFERENCES.get(file_key)
+        if ref:
+            code = values.pop(ref[0])
+            linked = code in parents
+            values[ref[0]] = code if linked else None
+            values[ref[1]] = None if linked else code
+        return values
+
+    def _write(self, file_key, statements):
+        """Run (sql, params) pairs in one transaction and bump the table's generation.
+
+        Inside begin()/commit() the statements join the open transaction (as
+        a savepoint, so a failed write doesn't undo the earlier ones).
+        """
+        conn = self.conn
+        outer = self._in_transaction
+        try:
+            conn.execute("SAVEPOINT write" if outer else "BEGIN IMMEDIATE")
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = ?", (file_key,))
+            conn.execute("RELEASE write" if outer else "COMMIT")
+            return True
+        except sqlite3.Error:
+            if outer:
+                conn.execute("ROLLBACK TO write")
+                conn.execute("RELEASE write")
+            elif conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return False
+
+    def begin(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._in_transaction = True
+
+    def commit(self):
+        self._in_transaction = False
+        try:
+            self.conn.execute("COMMIT")
+            return True
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            return False
+
+    def rollback(self):
+        self._in_transaction = False
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    def _upsert_sql(self, file_key, columns):
+        pk = self.pk(file_key)
+        assignments = ", ".join(f"{c} = excluded.{c}" for c in columns if c != pk)
+        return (f"INSERT INTO {file_key} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT({pk}) DO UPDATE SET {assignments}")
+
+    def _rows_params(self, file_key, rows):
+        parents = self._parent_codes(file_key)
+        encoded = [self._encode(file_key, row, parents) for row in rows]
+        columns = list(encoded[0]) if encoded else []
+        return columns, [tuple(e[c] for c in columns) for e in encoded]
+
+    def save(self, file_key, rows):
+        #Upsert what's there and drop what isn't, rather than DELETE + INSERT,
+        #so replacing a parent table doesn't detach every child row.
+        pk = self.pk(file_key)
+        columns, params = self._rows_params(file_key, rows)
+        keep = [(row.get(pk, ''),) for row in rows]
+        statements = [("CREATE TEMP TABLE IF NOT EXISTS keep_keys (k TEXT PRIMARY KEY)", ()),
+                      ("DELETE FROM keep_keys", ()),
+                      ("INSERT OR IGNORE INTO keep_keys VALUES (?)", keep),
+                      (f"DELETE FROM {file_key} WHERE {pk} NOT IN (SELECT k FROM keep_keys)", ())]
+        if params:
+            statements.append((self._upsert_sql(file_key, columns), params))
+        return self._write(file_key, statements)
+
+    def appendable(self, file_key):
+        return True
+
+    def append(self, file_key, rows):
+        #a duplicate key fails the INSERT; the caller reports it, it doesn't save()
+        columns, params = self._rows_params(file_key, rows)
+        sql = (f"INSERT INTO {file_key} ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        return self._write(file_key, [(sql, params)])
+
+    def update(self, file_key, rows, updates):
+        pk = self.pk(file_key)
+        parents = self._parent_codes(file_key)
+        statements = []
+        for _pos, old_row, new_row in updates:
+            values = self._encode(file_key, new_row, parents)
+            assignments = ", ".join(f"{c} = ?" for c in values)
+            statements.append((f"UPDATE {file_key} SET {assignments} WHERE {pk} = ?",
+                               tuple(values.values()) + (old_row.get(pk, ''),)))
+        return self._write(file_key, statements)
+
+    def delete(self, file_key, rows, removed):
+        pk = self.pk(file_key)
+        return self._write(file_key, [(f"DELETE FROM {file_key} WHERE {pk} = ?",
+                             [(row.get(pk, ''),) for row in removed])])
+
+    def rewrite(self, file_key, column, mapping, where=None, archive=None):
+        """The same pass as set-based SQL: INSERT ... SELECT, DELETE, one UPDATE.
+
+        column has to be a plain column (not a program/college reference).
+        """
+        conn = self.conn
+        where_sql, where_params = self._where(file_key, where)
+        joiner = " AND " if where_sql else " WHERE "
+        statements, counts = [], []
+        try:
+            if archive:
+                dest_key, values, extra = archive
+                match, params = self._in(file_key, column, values)
+                params = where_params + params
+                counts.append(conn.execute(f"SELECT COUNT(*) FROM {file_key}{where_sql}{joiner}{match}",
+                                           params).fetchone()[0])
+                columns = self.headers[dest_key]
+                select = ", ".join("?" if c in extra else
+                                   self._expr(file_key, c) if c in self.headers[file_key] else "''"
+                                   for c in columns)
+                statements += [(f"INSERT OR REPLACE INTO {dest_key} ({', '.join(columns)}) "
+                                f"SELECT {select} FROM {file_key}{where_sql}{joiner}{match}",
+                                tuple([extra[c] for c in columns if c in extra] + params)),
+                               (f"DELETE FROM {file_key}{where_sql}{joiner}{match}", tuple(params)),
+                               ("UPDATE meta SET value = value + 1 WHERE key = ?", (dest_key,))]
+            else:
+                counts.append(0)
+            if mapping:
+                match, params = self._in(file_key, column, mapping)
+                params = where_params + params
+                cases = " ".join("WHEN ? THEN ?" for _ in mapping)
+                counts.insert(0, conn.execute(f"SELECT COUNT(*) FROM {file_key}{where_sql}{joiner}{match}",
+                                              params).fetchone()[0])
+                statements.append((f"UPDATE {file_key} SET {column} = CASE {column} {cases} END"
+                                   f"{where_sql}{joiner}{match}",
+                                   tuple(v for pair in mapping.items() for v in pair) + tuple(params)))
+            else:
+                counts.insert(0, 0)
+        except sqlite3.Error:
+            return None
+        #archived rows are gone before the UPDATE runs, so they are never remapped too
+        return tuple(counts) if self._write(file_key, statements) else None
+
+    # -- indexed queries -------------------------------------------------------
+
+    def search(self, file_key, query, column=None):
+        """Case-insensitive substring search, same semantics as search_csv."""
+        pattern = "%" + query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        columns = [column] if column else self.headers[file_key]
+        ref = _REFERENCES.get(file_key)
+        exprs = [f"COALESCE({ref[0]}, {ref[1]}, '')" if ref and c == ref[0] else c
+                 for c in columns]
+        where = " OR ".join(f"lower({e}) LIKE ? ESCAPE '\\'" for e in exprs)
+        sql = f"{self._select(file_key)} WHERE {where} ORDER BY rowid"
+        return self._to_dicts(self.conn.execute(sql, [pattern] * len(exprs)))
+
+    def sort(self, file_key, column, reverse=False):
+        if column not in self.headers[file_key]:
+            raise KeyError(column)
+        ref = _REFERENCES.get(file_key)
+        expr = f"COALESCE({ref[0]}, {ref[1]}, '')" if ref and column == ref[0] else column
+        direction = "DESC" if reverse else "ASC"
+        sql = f"{self._select(file_key)} ORDER BY {expr} COLLATE NOCASE {direction}, rowid"
+        return self._to_dicts(self.conn.execute(sql))
+
+    def page(self, file_key, limit, after=None):
+        """Rows in rowid order (keyset); a row's mark is its rowid.
+
+        The rows after the `after` row's key, or after its mark once that row
+        is deleted; a cursor without a mark whose row is gone resumes at the
+        row's old index.
+        """
+        sql = self._select(file_key).replace(" FROM ", ", rowid AS _mark FROM ", 1)
+        try:
+            if after is None:
+                cursor = self.conn.execute(sql + " ORDER BY rowid LIMIT ?", (limit,))
+            else:
+                index, mark, key = after
+                found = self.conn.execute(f"SELECT rowid FROM {file_key} WHERE {self.pk(file_key)} = ?",
+                                          (key,)).fetchone()
+                if found is not None or mark:
+                    cursor = self.conn.execute(sql + " WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                               (found[0] if found else mark, limit))
+                else:
+                    cursor = self.conn.execute(sql + " ORDER BY rowid LIMIT ? OFFSET ?",
+                                               (limit, index))
+            return [(row.pop("_mark"), row) for row in self._to_dicts(cursor)]
+        except sqlite3.Error:
+            return []
+
+    def estimate(self, file_key):
+        try:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {file_key}").fetchone()[0], True
+        except sqlite3.Error:
+            return 0, True
+
+    # -- CSV import / export ---------------------------------------------------
+
+    def import_csv(self, csv_backend):
+        """Load every table from a CsvBackend (parents first, so FKs resolve)."""
+        for file_key in ("colleges", "programs", "students", "graduates"):
+            if not self.save(file_key, csv_backend.load(file_key)):
+                return False
+        return True
+
+    def export_csv(self, csv_backend):
+        """Write every table out in the original CSV schema."""
+        return all(csv_backend.save(file_key, self.load(file_key))
+                   for file_key in ("colleges", "programs", "students", "graduates"))
+
+    def is_empty(self):
+        return not any(self.conn.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone()
+                       for t in ("colleges", "programs", "students"))
+
+
+if __name__ == "__main__":
+    #python -m modules.storage import   -> copy data/*.csv into the SQLite database
+    #python -m modules.storage export   -> write the SQLite database back out as CSV
+    import sys
+    from modules.database_io import FILES, Headers, SQLITE_PATH, data_dir
+
+    action = sys.argv[1] if len(sys.argv) > 1 else ""
+    sqlite_backend = SqliteBackend(SQLITE_PATH, Headers)
+    csv_backend    = CsvBackend(FILES, Headers, data_dir)
+    if action == "import":
+        ok = sqlite_backend.import_csv(csv_backend)
+    elif action == "export":
+        ok = sqlite_backend.export_csv(csv_backend)
+    else:
+        sys.exit("usage: python -m modules.storage import|export")
+    print(f"{action}: {'done' if ok else 'failed'} ({SQLITE_PATH})")
+    sys.exit(0 if ok else 1)
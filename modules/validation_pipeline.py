@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from modules.database_io import Headers, get_pk, iter_rows
+from modules.indexes import normalise_key
+from modules.validators import SCHEMAS, reference_sets, validate_rows
+
+#Validation spread over several processes, for very large imports and audits.
+#
+#The validators are plain regex/range checks once their lookups are served
+#from key sets, so rows are cut into shards and validated in a process pool.
+#The key sets go to each worker once (through the pool initializer), shards
+#travel as tuples rather than dicts, and results are handed back strictly in
+#input order, so the output is the same whatever the worker count. Only a
+#bounded number of shards is in flight at a time, so a multi-million-row file
+#is never held in memory whole.
+#
+#Workers are spawned, not forked: the store and the GUI run threads (the
+#background loader, the API server) whose locks a fork could copy mid-hold.
+
+SHARD_SIZE     = 20000
+SHARDS_PER_WORKER = 2   # in-flight shards per worker
+
+_worker = {}   # per worker process: file_key, keys, is_edit
+
+
+def _init_worker(file_key, keys, is_edit):
+    _worker.update(file_key=file_key, keys=keys, is_edit=is_edit)
+
+
+def _validate_shard(shard):
+    file_key, keys, is_edit = _worker["file_key"], _worker["keys"], _worker["is_edit"]
+    headers = Headers[file_key]
+    return validate_rows(file_key, [dict(zip(headers, values)) for values in shard], keys, is_edit)
+
+
+def _shards(rows, size):
+    rows = iter(rows)
+    while True:
+        shard = list(islice(rows, size))
+        if not shard:
+            return
+        yield shard
+
+
+def iter_validate(file_key, rows, keys=None, is_edit=False, workers=None, shard_size=SHARD_SIZE):
+    """Yield (row, ok, msg) for every row, in input order.
+
+    Input that fits in one shard (or workers=1) is validated in this process;
+    anything bigger is sharded across a pool of `workers` processes
+    (default: one per CPU).
+    """
+    keys    = keys if keys is not None else reference_sets(file_key)
+    workers = workers or os.cpu_count() or 1
+    headers = Headers[file_key]
+    shards  = _shards(rows, shard_size)
+    first   = next(shards, None)
+    if first is None:
+        return
+    if workers == 1 or len(first) < shard_size:
+        for shard in chain([first], shards):
+            for row, (ok, msg) in zip(shard, validate_rows(file_key, shard, keys, is_edit)):
+                yield row, ok, msg
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(file_key, keys, is_edit)) as pool:
+        pending = deque()
+        for shard in chain([first], shards):
+            packed = [tuple(str(row.get(h) or '') for h in headers) for row in shard]
+            pending.append((shard, pool.submit(_validate_shard, packed)))
+            if len(pending) >= workers * SHARDS_PER_WORKER:
+                shard, future = pending.popleft()
+                for row, (ok, msg) in zip(shard, future.result()):
+                    yield row, ok, msg
+        while pending:
+            shard, future = pending.popleft()
+            for row, (ok, msg) in zip(shard, future.result()):
+                yield row, ok, msg
+
+
+def audit(file_key, workers=None, shard_size=SHARD_SIZE):
+    """Re-validate every stored row of a table.
+
+    Returns (row number, key, message) for each row that breaks a rule,
+    including primary keys that appear more than once; row numbers count
+    from 1 in storage order.
+    """
+    pk     = get_pk(file_key)
+    keys   = reference_sets(file_key)
+    seen   = {}
+    errors = []
+    results = iter_validate(file_key, iter_rows(file_key), keys, is_edit=True,
+                            workers=workers, shard_size=shard_size)
+    for number, (row, ok, msg) in enumerate(results, start=1):
+        key = normalise_key(row.get(pk, ''))
+        if ok and key in seen:
+            ok, msg = False, f"Duplicate {pk} '{row.get(pk, '')}' (also row {seen[key]})."
+        seen.setdefault(key, number)
+        if not ok:
+            errors.append((number, row.get(pk, ''), msg))
+    return errors
+
+
+if __name__ == "__main__":
+    #python -m modules.validation_pipeline students [workers]  -> audit a table
+    import sys
+    import time
+
+    file_key = sys.argv[1] if len(sys.argv) > 1 else ""
+    if file_key not in SCHEMAS:
+        sys.exit("usage: python -m modules.validation_pipeline students|programs|colleges [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    started = time.perf_counter()
+    errors  = audit(file_key, workers=workers)
+    for number, key, msg in errors:
+        print(f"row {number} ({key}): {msg}")
+    print(f"{len(errors)} problem(s) found in {file_key} ({time.perf_counter() - started:.2f}s)")
+    sys.exit(1 if errors else 0)
@@ -1,9 +1,15 @@
 import re
 from datetime import datetime
-from modules.database_io import read_csv
+from modules.database_io import get_pk, iter_rows
+from modules.indexes import key_exists, normalise_key
+from modules.instrumentation import timed
+from modules.rules import (Schema, check, required, min_length, max_length, matches,
+                           rejects, one_of, exists, unique)
 
 MIN_YEAR = 2000  # Earliest valid enrollment year
 
+NAME_PATTERN = re.compile(r"^[a-zA-Z\s\-\.']+$")
+
 
 # ── Helpers ────────────────────────────────────────────────────────────────
 
@@ -15,192 +21,175 @@ def _name_invalid(value):
     Permits: letters, spaces, hyphens, apostrophes, periods.
     Covers names like O'Brien, De La Cruz, Mary-Jane, Jr.
     """
-    return not re.match(r"^[a-zA-Z\s\-\.']+$", str(value).strip())
+    return not NAME_PATTERN.match(str(value).strip())
 
 def id_already_exists(id_number):
     """Check if a student ID already exists."""
-    students = read_csv("students")
-    return any(str(s['id']) == str(id_number) for s in students)
+    return key_exists("students", id_number)
 
 def program_exists(program_code):
-    programs = read_csv("programs")
-    return any(p['code'].upper() == program_code.upper() for p in programs)
+    return key_exists("programs", program_code)
 
 def college_exists(college_code):
-    colleges = read_csv("colleges")
-    return any(c['code'].upper() == college_code.upper() for c in colleges)
+    return key_exists("colleges", college_code)
 
 def program_code_exists(code):
     """Check if a program code already exists."""
-    programs = read_csv("programs")
-    return any(p['code'].upper() == code.upper() for p in programs)
+    return key_exists("programs", code)
 
 def college_code_exists(code):
     """Check if a college code already exists."""
-    colleges = read_csv("colleges")
-    return any(c['code'].upper() == code.upper() for c in colleges)
+    return key_exists("colleges", code)
 
+def key_set(file_key):
+    """Every primary key of a table, normalised, for validating many rows at once."""
+    pk = get_pk(file_key)
+    return {normalise_key(r[pk]) for r in iter_rows(file_key, columns=[pk])}
 
-# ── Student Validator ──────────────────────────────────────────────────────
+def _id_year_ok(sid):
+    return MIN_YEAR <= int(sid.split('-')[0]) <= datetime.now().year
 
-def validate_student(student_data, skip_id_check=False):
-    current_year = datetime.now().year
+def _is_int(value):
+    try:
+        int(value)
+        return True
+    except ValueError:
+        return False
 
-    sid       = str(student_data.get('id', '')).strip()
-    firstname = str(student_data.get('firstname', '')).strip()
-    lastname  = str(student_data.get('lastname', '')).strip()
-    program   = str(student_data.get('program_code', '')).strip()
-    year      = str(student_data.get('year', '')).strip()
-    gender    = str(student_data.get('gender', '')).strip()
+def _name_rules(field, label):
+    return [required(field, f"{label} cannot be empty."),
+            min_length(field, 2, f"{label} must be at least 2 characters."),
+            max_length(field, 64, f"{label} must be under 64 characters."),
+            matches(field, NAME_PATTERN.pattern,
+                    f"{label} can only contain letters, spaces, hyphens, apostrophes, or periods.")]
 
-    # 1. ID format: YYYY-NNNN
-    if not re.match(r'^\d{4}-\d{4}$', sid):
-        return False, "ID must be in YYYY-NNNN format (e.g. 2024-0001)."
 
-    # 2. ID year must be realistic; sequence must not be 0000
-    id_year = int(sid.split('-')[0])
-    if id_year < MIN_YEAR or id_year > current_year:
-        return False, f"ID year must be between {MIN_YEAR} and {current_year}."
-    if sid.split('-')[1] == '0000':
-        return False, "ID sequence cannot be 0000."
+# ── Schemas ────────────────────────────────────────────────────────────────
+#The checks for each entity, in the order they are reported (see modules/rules.py).
 
+STUDENT_SCHEMA = Schema([
+    # 1. ID format: YYYY-NNNN
+    matches('id', r'^\d{4}-\d{4}$', "ID must be in YYYY-NNNN format (e.g. 2024-0001)."),
+    # 2. ID year must be realistic; sequence must not be 0000
+    check('id', _id_year_ok,
+          lambda v: f"ID year must be between {MIN_YEAR} and {datetime.now().year}."),
+    check('id', lambda v: v.split('-')[1] != '0000', "ID sequence cannot be 0000."),
     # 3. First name checks
-    if is_blank(firstname):
-        return False, "First name cannot be empty."
-    if len(firstname) < 2:
-        return False, "First name must be at least 2 characters."
-    if len(firstname) > 64:
-        return False, "First name must be under 64 characters."
-    if _name_invalid(firstname):
-        return False, "First name can only contain letters, spaces, hyphens, apostrophes, or periods."
-
+    *_name_rules('firstname', "First name"),
     # 4. Last name checks
-    if is_blank(lastname):
-        return False, "Last name cannot be empty."
-    if len(lastname) < 2:
-        return False, "Last name must be at least 2 characters."
-    if len(lastname) > 64:
-        return False, "Last name must be under 64 characters."
-    if _name_invalid(lastname):
-        return False, "Last name can only contain letters, spaces, hyphens, apostrophes, or periods."
-
+    *_name_rules('lastname', "Last name"),
     # 5. Year level
-    if is_blank(year):
-        return False, "Year level cannot be empty."
-    try:
-        year_int = int(year)
-        if not (1 <= year_int <= 4):
-            return False, "Year level must be between 1 and 4."
-    except ValueError:
-        return False, "Year level must be a number."
-
+    required('year', "Year level cannot be empty."),
+    check('year', _is_int, "Year level must be a number."),
+    check('year', lambda v: 1 <= int(v) <= 4, "Year level must be between 1 and 4."),
     # 6. Gender
-    if gender not in ("Male", "Female", "Other"):
-        return False, "Gender must be Male, Female, or Other."
-
+    one_of('gender', ("Male", "Female", "Other"), "Gender must be Male, Female, or Other."),
     # 7. Program code exists
-    if is_blank(program):
-        return False, "Program code cannot be empty."
-    if not program_exists(program):
-        return False, f"Program code '{program}' does not exist."
-
+    required('program_code', "Program code cannot be empty."),
+    exists('program_code', "programs", lambda v: f"Program code '{v}' does not exist."),
     # 8. Program is not unassigned
-    if program.lower() == "unassigned":
-        return False, "Please select a valid program."
-
+    check('program_code', lambda v: v.lower() != "unassigned", "Please select a valid program."),
     # 9. Duplicate ID check
-    if not skip_id_check:
-        if id_already_exists(sid):
-            return False, f"ID '{sid}' already exists."
-
-    return True, "Valid."
-
-
-# ── Program Validator ──────────────────────────────────────────────────────
-
-def validate_program(program_data, is_edit=False):
-    code    = str(program_data.get('code', '')).strip()
-    name    = str(program_data.get('name', '')).strip()
-    college = str(program_data.get('college_code', '')).strip()
+    unique('id', "students", lambda v: f"ID '{v}' already exists."),
+])
 
+PROGRAM_SCHEMA = Schema([
     # 1. Code empty
-    if is_blank(code):
-        return False, "Program code cannot be empty."
-
+    required('code', "Program code cannot be empty."),
     # 2. Code length
-    if len(code) > 32:
-        return False, "Program code must be under 32 characters."
-
+    max_length('code', 32, "Program code must be under 32 characters."),
     # 3. Code format — only letters, numbers, hyphens, spaces
-    if not re.match(r'^[a-zA-Z0-9\s\-]+$', code):
-        return False, "Program code can only contain letters, numbers, hyphens, and spaces."
-
+    matches('code', r'^[a-zA-Z0-9\s\-]+$',
+            "Program code can only contain letters, numbers, hyphens, and spaces."),
     # 4. Name empty
-    if is_blank(name):
-        return False, "Program name cannot be empty."
-
+    required('name', "Program name cannot be empty."),
     # 5. Name length
-    if len(name) < 5:
-        return False, "Program name must be at least 5 characters."
-    if len(name) > 128:
-        return False, "Program name must be under 128 characters."
+    min_length('name', 5, "Program name must be at least 5 characters."),
+    max_length('name', 128, "Program name must be under 128 characters."),
+    # 6. Name must not be numbers only
+    rejects('name', r'^\d+$', "Program name cannot be numbers only."),
+    # 7. College must exist
+    check('college_code', lambda v: bool(v) and v.lower() != "unassigned",
+          "Please select a valid college."),
+    exists('college_code', "colleges", lambda v: f"College '{v}' does not exist."),
+    # 8. Duplicate code check (skip for edits)
+    unique('code', "programs", lambda v: f"Program code '{v}' already exists."),
+])
 
+COLLEGE_SCHEMA = Schema([
+    # 1. Code empty
+    required('code', "College code cannot be empty."),
+    # 2. Code length
+    min_length('code', 2, "College code must be at least 2 characters."),
+    max_length('code', 16, "College code must be under 16 characters."),
+    # 3. Code format — letters only
+    matches('code', r'^[a-zA-Z]+$', "College code can only contain letters (no spaces or symbols)."),
+    # 4. Name empty
+    required('name', "College name cannot be empty."),
+    # 5. Name length
+    min_length('name', 5, "College name must be at least 5 characters."),
+    max_length('name', 128, "College name must be under 128 characters."),
     # 6. Name must not be numbers only
-    if re.match(r'^\d+$', name):
-        return False, "Program name cannot be numbers only."
+    rejects('name', r'^\d+$', "College name cannot be numbers only."),
+    # 7. Duplicate code check (skip for edits)
+    unique('code', "colleges", lambda v: f"College code '{v}' already exists."),
+])
 
-    # 7. College must exist
-    if is_blank(college) or college.lower() == "unassigned":
-        return False, "Please select a valid college."
-    if not college_exists(college):
-        return False, f"College '{college}' does not exist."
+SCHEMAS = {"students": STUDENT_SCHEMA, "programs": PROGRAM_SCHEMA, "colleges": COLLEGE_SCHEMA}
 
-    # 8. Duplicate code check (skip for edits)
-    if not is_edit:
-        if program_code_exists(code):
-            return False, f"Program code '{code}' already exists."
 
-    return True, "Valid."
+def _context(is_edit, **keys):
+    return {"is_edit": is_edit,
+            "keys": {table: found for table, found in keys.items() if found is not None}}
 
 
-# ── College Validator ──────────────────────────────────────────────────────
+# ── Student Validator ──────────────────────────────────────────────────────
 
-def validate_college(college_data, is_edit=False):
-    code = str(college_data.get('code', '')).strip()
-    name = str(college_data.get('name', '')).strip()
+@timed()
+def validate_student(student_data, skip_id_check=False, program_codes=None, existing_ids=None):
+    # program_codes / existing_ids: prebuilt key sets (see reference_sets)
+    # that replace the per-row lookups when validating a batch.
+    return STUDENT_SCHEMA.validate(
+        student_data, _context(skip_id_check, programs=program_codes, students=existing_ids))
 
-    # 1. Code empty
-    if is_blank(code):
-        return False, "College code cannot be empty."
 
-    # 2. Code length
-    if len(code) < 2:
-        return False, "College code must be at least 2 characters."
-    if len(code) > 16:
-        return False, "College code must be under 16 characters."
+# ── Program Validator ──────────────────────────────────────────────────────
 
-    # 3. Code format — letters only
-    if not re.match(r'^[a-zA-Z]+$', code):
-        return False, "College code can only contain letters (no spaces or symbols)."
+@timed()
+def validate_program(program_data, is_edit=False, college_codes=None, program_codes=None):
+    return PROGRAM_SCHEMA.validate(
+        program_data, _context(is_edit, colleges=college_codes, programs=program_codes))
 
-    # 4. Name empty
-    if is_blank(name):
-        return False, "College name cannot be empty."
 
-    # 5. Name length
-    if len(name) < 5:
-        return False, "College name must be at least 5 characters."
-    if len(name) > 128:
-        return False, "College name must be under 128 characters."
+# ── College Validator ──────────────────────────────────────────────────────
 
-    # 6. Name must not be numbers only
-    if re.match(r'^\d+$', name):
-        return False, "College name cannot be numbers only."
+@timed()
+def validate_college(college_data, is_edit=False, college_codes=None):
+    return COLLEGE_SCHEMA.validate(college_data, _context(is_edit, colleges=college_codes))
 
-    # 7. Duplicate code check (skip for edits)
-    if not is_edit:
-        if college_code_exists(code):
-            return False, f"College code '{code}' already exists."
 
-    return True, "Valid."
-    
\ No newline at end of file
+# ── Batches ────────────────────────────────────────────────────────────────
+
+#Key sets each entity's validator looks things up in.
+REFERENCES = {"students": ("programs", "students"),
+              "programs": ("colleges", "programs"),
+              "colleges": ("colleges",)}
+
+def reference_sets(file_key):
+    """{table: key set} for validating file_key rows without per-row lookups."""
+    return {ref: key_set(ref) for ref in REFERENCES[file_key]}
+
+def validate_row(file_key, row, keys=None, is_edit=False, collect=False):
+    """Validate one row of any entity, optionally against prebuilt key sets.
+
+    collect=True reports every broken field instead of stopping at the
+    first (see Schema.validate).
+    """
+    return SCHEMAS[file_key].validate(row, {"is_edit": is_edit, "keys": keys}, collect=collect)
+
+@timed()
+def validate_rows(file_key, rows, keys=None, is_edit=False):
+    """Fail-fast (ok, msg) for each row, validated a column at a time."""
+    if keys is None:
+        keys = reference_sets(file_key)
+    return SCHEMAS[file_key].validate_batch(rows, {"is_edit": is_edit, "keys": keys})
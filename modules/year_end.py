@@ -0,0 +1,116 @@
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from modules.database_io import initialize_storage, iter_rows, rewrite_rows
+from modules.service import MAX_YEAR, STORAGE, Refusal, mutation, plural, stored_key
+
+#End-of-school-year rollover for the whole roster: every student moves up one
+#year level, and students finishing their last year graduate, i.e. move out
+#of students into the graduates table, stamped with the year they graduated.
+#
+#preview() is the dry run: one streaming pass that counts what would change
+#and shows a few of the affected rows. run() makes the change as a single
+#rewrite_rows() pass inside one transaction, so either every student is
+#rolled over or none is. Neither loads the students table into memory.
+#
+#  python -m modules.year_end [PROGRAM ...]                       dry run
+#  python -m modules.year_end --apply [--class-of=2026] [PROGRAM ...]
+
+PROMOTE = {str(year): str(year + 1) for year in range(1, MAX_YEAR)}
+
+
+def _options(program_codes, class_of):
+    """(where, class_of, None) for the job's options, or (None, None, error message)."""
+    class_of = str(class_of or datetime.now().year).strip()
+    if not (class_of.isdigit() and len(class_of) == 4):
+        return None, None, "The graduating year must be a year, e.g. 2026."
+    if not program_codes:
+        return None, class_of, None
+    codes = []
+    for code in program_codes:
+        stored = stored_key("programs", code)
+        if stored is None:
+            return None, None, f"Program '{code}' does not exist."
+        codes.append(stored)
+    return {"program_code": codes}, class_of, None
+
+
+def _change(year, class_of):
+    if year == str(MAX_YEAR):
+        return f"year {year} → graduated {class_of}"
+    if year in PROMOTE:
+        return f"year {year} → {PROMOTE[year]}"
+    return None
+
+
+def preview(program_codes=None, class_of=None, sample=20):
+    """Dry run: what run() would change, without writing anything.
+
+    Returns (ok, result or error message); result is {"promoted": {year:
+    count}, "graduating", "unchanged", "class_of", "examples": [(row,
+    change), ...]}.
+    """
+    where, class_of, error = _options(program_codes, class_of)
+    if error:
+        return False, error
+    years = Counter(row['year'] for row in iter_rows("students", columns=['year'], where=where))
+    affected = dict(where or {}, year=list(PROMOTE) + [str(MAX_YEAR)])
+    examples = [(row, _change(row['year'], class_of))
+                for row in islice(iter_rows("students", where=affected), sample)]
+    graduating = years.pop(str(MAX_YEAR), 0)
+    promoted = {year: years.pop(year, 0) for year in PROMOTE}
+    return True, {"promoted": promoted, "graduating": graduating,
+                  "unchanged": sum(years.values()), "class_of": class_of,
+                  "examples": examples}
+
+
+def format_preview(plan):
+    """The dry run as lines of text: the sample rows, then the totals."""
+    lines = [f"{row['id']:<11} {row['lastname'] + ', ' + row['firstname']:<28.28} "
+             f"{row['program_code']:<10.10} {change}" for row, change in plan["examples"]]
+    total = sum(plan["promoted"].values()) + plan["graduating"]
+    if total > len(lines):
+        lines.append(f"… and {total - len(lines):,} more")
+    lines.append("")
+    for year, n in plan["promoted"].items():
+        lines.append(f"year {year} → {PROMOTE[year]:<22} {n:>10,}")
+    lines.append(f"year {MAX_YEAR} → graduated {plan['class_of']:<12} {plan['graduating']:>10,}")
+    if plan["unchanged"]:
+        lines.append(f"{'left as is (year not 1–' + str(MAX_YEAR) + ')':<31} {plan['unchanged']:>10,}")
+    return lines
+
+
+@mutation
+def run(program_codes=None, class_of=None):
+    """Promote every (filtered) student one year and graduate the last-years."""
+    where, class_of, error = _options(program_codes, class_of)
+    if error:
+        return False, error
+    result = rewrite_rows("students", "year", PROMOTE, where=where,
+                          archive=("graduates", [str(MAX_YEAR)], {"graduated": class_of}))
+    if result is None:
+        return False, Refusal("Could not save the changes to storage.", STORAGE)
+    promoted, graduated = result
+    return True, (f"Promoted {plural(promoted, 'student')}; "
+                  f"{plural(graduated, 'student')} graduated (class of {class_of}).")
+
+
+if __name__ == "__main__":
+    args     = sys.argv[1:]
+    apply    = "--apply" in args
+    class_of = next((a.split("=", 1)[1] for a in args if a.startswith("--class-of=")), None)
+    programs = [a for a in args if not a.startswith("--")]
+    initialize_storage()
+    started = time.perf_counter()
+    if apply:
+        ok, msg = run(programs, class_of)
+        print(msg)
+    else:
+        ok, plan = preview(programs, class_of)
+        print("\n".join(format_preview(plan)) if ok else plan)
+        if ok:
+            print("\nDry run, nothing was changed. Add --apply to promote and graduate.")
+    print(f"({time.perf_counter() - started:.2f}s)")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate import generate
+from modules import database_io
+from modules.storage import CsvBackend, SqliteBackend
+
+
+def csv_backend(data_dir):
+    files = {key: os.path.join(data_dir, f"{key}.csv") for key in database_io.Headers}
+    backend = CsvBackend(files, database_io.Headers, data_dir)
+    backend.initialize()
+    return backend
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """make_store(students, sqlite=False, **generate_kwargs) -> data dir, installed as the live backend."""
+    original = database_io.get_backend()
+
+    def make(students=200, sqlite=False, **kwargs):
+        data_dir = str(tmp_path / "data")
+        generate(data_dir, students, **kwargs)
+        backend = csv_backend(data_dir)
+        if sqlite:
+            csv_files, backend = backend, SqliteBackend(os.path.join(data_dir, "sis.db"),
+                                                        database_io.Headers)
+            backend.import_csv(csv_files)
+        database_io.set_backend(backend)
+        return data_dir
+
+    yield make
+    database_io.set_backend(original)
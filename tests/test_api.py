@@ -0,0 +1,83 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from modules import api, service
+from modules.database_io import get_backend, iter_rows
+from modules.locking import LockTimeout
+
+
+@pytest.fixture
+def server(make_store):
+    make_store(50)
+    httpd = api.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(address, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        data = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode("utf-8")
+        conn.request(method, path, body=data, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def first_student():
+    return next(iter_rows("students"))
+
+
+def test_busy_lock_is_503(server, monkeypatch):
+    row = first_student()
+    def busy():
+        raise LockTimeout("locked by another process")
+    monkeypatch.setattr(get_backend().lock, "acquire", busy)
+    status, payload = request(server, "PUT", f"/api/students/{row['id']}", dict(row, lastname="Busy"))
+    assert status == 503
+    assert payload["ok"] is False
+
+
+def test_conflict_found_by_the_service_is_409(server):
+    row = first_student()
+    stale = service.record_version("students", row["id"])
+    ok, _ = service.update_student(row["id"], dict(row, lastname="First"), stale)
+    assert ok
+    # bypass the handler's own If-Match check so the service is the one to notice
+    ok, msg = service.update_student(row["id"], dict(row, lastname="Second"), stale)
+    assert not ok and msg.kind == service.CONFLICT
+    assert api._failure_status(msg) == 409
+
+
+def test_stubbed_service_conflict_reaches_the_client(server, monkeypatch):
+    row = first_student()
+    monkeypatch.setitem(service.UPDATE, "students",
+                        lambda key, data, expected: (False, service.Refusal("changed", service.CONFLICT)))
+    status, payload = request(server, "PUT", f"/api/students/{row['id']}", row)
+    assert status == 409
+    assert payload == {"ok": False, "error": "changed"}
+
+
+def test_unexpected_error_is_a_json_500(server, monkeypatch):
+    def broken(data):
+        raise RuntimeError("boom")
+    monkeypatch.setitem(service.ADD, "students", broken)
+    status, payload = request(server, "POST", "/api/students", {"id": "2024-0001"})
+    assert status == 500
+    assert payload == {"ok": False, "error": "Internal server error."}
+
+
+def test_bad_content_length_is_a_400(server):
+    row = first_student()
+    for length in ("abc", "-5"):
+        status, payload = request(server, "PUT", f"/api/students/{row['id']}", b"{}",
+                                  {"Content-Length": length})
+        assert status == 400
+        assert payload["error"] == "Invalid Content-Length."
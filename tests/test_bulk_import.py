@@ -0,0 +1,55 @@
+import csv
+
+from modules import bulk_import, database_io, validators
+from modules.validators import reference_sets
+
+
+def write_intake(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=database_io.Headers["students"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def new_student(sid, program_code):
+    return {'id': sid, 'firstname': "Ana", 'lastname': "Cruz",
+            'program_code': program_code, 'year': "1", 'gender': "Female"}
+
+
+def test_id_added_after_validation_is_rejected(make_store, tmp_path, monkeypatch):
+    make_store(100)
+    program = database_io.get_rows("programs")[0]['code']
+    intake = str(tmp_path / "intake.csv")
+    write_intake(intake, [new_student("2024-9001", program), new_student("2024-9002", program)])
+
+    def keys_then_race(file_key):
+        keys = reference_sets(file_key)
+        # someone else saves 2024-9002 while the file is being validated
+        database_io.add_csv("students", new_student("2024-9002", program))
+        return keys
+
+    monkeypatch.setattr(bulk_import, "reference_sets", keys_then_race)
+    ok, msg, errors = bulk_import.import_students(intake, workers=1)
+
+    assert ok
+    assert errors == [(3, "2024-9002", "ID '2024-9002' already exists.")]
+    ids = [row['id'] for row in database_io.get_rows("students")]
+    assert ids.count("2024-9001") == 1 and ids.count("2024-9002") == 1
+
+
+def test_recheck_reads_each_table_once(make_store, tmp_path, monkeypatch):
+    make_store(100)
+    program = database_io.get_rows("programs")[0]['code']
+    intake = str(tmp_path / "intake.csv")
+    write_intake(intake, [new_student(f"2024-{9000 + i}", program) for i in range(30)])
+    database_io.invalidate()
+
+    scans = []
+    iter_rows = validators.iter_rows
+    monkeypatch.setattr(validators, "iter_rows",
+                        lambda file_key, **kw: scans.append(file_key) or iter_rows(file_key, **kw))
+    ok, msg, errors = bulk_import.import_students(intake, workers=1)
+
+    assert ok and not errors
+    # once for validation, once for the recheck
+    assert sorted(scans) == ["programs", "programs", "students", "students"]
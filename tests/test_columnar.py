@@ -0,0 +1,47 @@
+import csv
+import os
+
+from modules import database_io
+from modules.columnar import ColumnarTable
+
+HEADERS = ['id', 'program_code', 'year', 'name']
+
+
+def make_rows(n, distinct):
+    return [{'id': str(i), 'program_code': f"P{i % distinct}", 'year': str(i % 4 + 1),
+             'name': f"Name {i}"} for i in range(n)]
+
+
+def test_round_trip():
+    rows = make_rows(50, 5)
+    table = ColumnarTable.from_rows(HEADERS, rows, categorical=('program_code', 'year'),
+                                    interned=('name',))
+    assert len(table) == 50
+    assert [dict(row) for row in table] == rows
+    assert dict(table[-1]) == rows[-1]
+    assert [dict(row) for row in table[10:13]] == rows[10:13]
+
+    table[3] = dict(rows[3], program_code="NEW", year="2")
+    assert table[3]['program_code'] == "NEW" and table[3]['year'] == "2"
+    assert table[4]['program_code'] == rows[4]['program_code']
+    assert sorted(table.positions_where('program_code', {"NEW"})) == [3]
+
+
+def test_widening_past_256_and_65536_values():
+    for distinct in (300, 70000):
+        rows = make_rows(distinct + 10, distinct)
+        table = ColumnarTable.from_rows(HEADERS, rows, categorical=('program_code',))
+        assert table.column('program_code') == [row['program_code'] for row in rows]
+    table.append(dict(rows[0], program_code="one more"))
+    assert table[-1]['program_code'] == "one more"
+
+
+def test_students_with_more_than_256_programs_load(make_store):
+    data_dir = make_store(2000, programs=300)
+    with open(os.path.join(data_dir, "students.csv"), newline='') as f:
+        expected = list(csv.DictReader(f))
+    assert len({row['program_code'] for row in expected}) > 256
+
+    rows = database_io.get_rows("students")
+    assert isinstance(rows, ColumnarTable)
+    assert [dict(row) for row in rows] == expected
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from modules import database_io
+
+
+def slow_loads(monkeypatch):
+    """Make the backend's load() wait until released; returns (started, release)."""
+    backend = database_io.get_backend()
+    load = backend.load
+    started, release = threading.Event(), threading.Event()
+
+    def slow_load(file_key):
+        started.set()
+        release.wait(5)
+        return load(file_key)
+
+    monkeypatch.setattr(backend, "load", slow_load)
+    return started, release
+
+
+def test_parse_does_not_hold_the_store_lock(make_store, monkeypatch):
+    make_store(500)
+    started, release = slow_loads(monkeypatch)
+    loader = threading.Thread(target=database_io.get_rows, args=("students",))
+    loader.start()
+    try:
+        assert started.wait(5)
+        t = time.perf_counter()
+        assert not database_io.is_cached("students")
+        assert time.perf_counter() - t < 1
+    finally:
+        release.set()
+        loader.join()
+    assert database_io.is_cached("students")
+
+
+def test_write_during_parse_is_not_lost(make_store, monkeypatch):
+    make_store(500)
+    started, release = slow_loads(monkeypatch)
+    result = {}
+    loader = threading.Thread(target=lambda: result.update(rows=database_io.get_rows("students")))
+    loader.start()
+    assert started.wait(5)
+    monkeypatch.undo()       # the write's own load (and the retry) run at full speed
+    row = dict(database_io.get_rows("students")[0], firstname="Changed")
+    database_io.update_csv("students", row['id'], row)
+    release.set()
+    loader.join()
+    assert database_io.get_rows("students")[0]['firstname'] == "Changed"
+    assert result["rows"][0]['firstname'] == "Changed"
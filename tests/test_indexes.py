@@ -0,0 +1,25 @@
+from modules import indexes
+from modules.database_io import delete_rows, get_rows
+
+
+def test_delete_updates_the_key_indexes_in_place(make_store):
+    make_store(300)
+    students = get_rows("students")
+    program = students[10]['program_code']
+    assert indexes.key_exists("students", students[0]['id'])
+    assert indexes.students_in_program(program)
+    pk_map = indexes._indexes[("students", "pk")]["map"]
+    fk_map = indexes._indexes[("students", "program_code")]["map"]
+
+    doomed = [students[pos]['id'] for pos in (0, 10, 11, 150, 299)]
+    assert delete_rows("students", doomed)
+
+    # same dicts, patched rather than dropped and rebuilt
+    assert indexes._indexes[("students", "pk")]["map"] is pk_map
+    assert indexes._indexes[("students", "program_code")]["map"] is fk_map
+    assert pk_map == indexes._build("students", "pk")
+    assert fk_map == indexes._build("students", "program_code")
+    assert not any(indexes.key_exists("students", sid) for sid in doomed)
+    rows = get_rows("students")
+    for pos in (0, 9, 10, 146, 294):
+        assert indexes.find_row("students", rows[pos]['id'])['id'] == rows[pos]['id']
@@ -0,0 +1,75 @@
+import pytest
+
+from modules import storage
+from modules.database_io import add_csv, delete_rows, get_rows, invalidate, is_cached, page_rows
+
+
+def walk(file_key, limit, order_by=None, reverse=False, between=None):
+    ids, cursor = [], None
+    while True:
+        page, cursor = page_rows(file_key, limit, cursor, order_by, reverse)
+        ids.extend(row['id'] for row in page)
+        if cursor is None:
+            return ids
+        if between:
+            between(ids)
+
+
+def test_streamed_pages_cover_the_table_once(make_store):
+    make_store(250)
+    assert not is_cached("students")
+    ids = walk("students", 37)
+    assert ids == [row['id'] for row in get_rows("students")]
+
+
+def test_cursor_survives_rows_added_and_deleted_behind_it(make_store):
+    make_store(250)
+    before = {row['id'] for row in get_rows("students")}
+    added = []
+
+    def churn(ids):
+        # drop a row already sent and add one that sorts ahead of the cursor
+        delete_rows("students", [ids[0]])
+        new_id = f"2030-{len(added):04d}"
+        add_csv("students", dict(get_rows("students")[0], id=new_id, lastname="Aaaa"))
+        added.append(new_id)
+
+    ids = walk("students", 40, order_by="lastname", between=churn)
+    assert len(ids) == len(set(ids))
+    assert before <= set(ids)      # nothing that was there all along is skipped
+    assert not set(added) & set(ids)    # rows added behind the cursor don't show up late
+
+
+def test_reverse_pages_match_the_reversed_order(make_store):
+    make_store(120)
+    forward = walk("students", 25, order_by="year")
+    assert walk("students", 25, order_by="year", reverse=True) == forward[::-1]
+
+
+@pytest.mark.parametrize("sqlite", [False, True])
+def test_streamed_cursor_resumes_after_its_row_is_deleted(make_store, sqlite):
+    make_store(100, sqlite=sqlite)
+    ids = [row['id'] for row in get_rows("students")]
+    invalidate()
+    first, cursor = page_rows("students", 10)
+    assert [row['id'] for row in first] == ids[:10]
+
+    delete_rows("students", [ids[9]])
+    invalidate()   # keep reading straight from storage
+    assert not is_cached("students")
+    second, _cursor = page_rows("students", 10, cursor)
+    assert [row['id'] for row in second] == ids[10:20]
+
+
+def test_streamed_csv_page_seeks_to_its_cursor(make_store, monkeypatch):
+    make_store(300)
+    ids = [row['id'] for row in get_rows("students")]
+    invalidate()
+    _page, cursor = page_rows("students", 150)
+
+    offsets = []
+    records = storage._records
+    monkeypatch.setattr(storage, "_records", lambda f, offset: offsets.append(offset) or records(f, offset))
+    page, _cursor = page_rows("students", 20, cursor)
+    assert [row['id'] for row in page] == ids[150:170]
+    assert offsets[0] == 0 and len(offsets) == 2 and offsets[1] > 0   # the header, then the mark
@@ -0,0 +1,20 @@
+from modules import search_engine
+from modules.database_io import delete_rows, get_rows
+
+
+def test_delete_updates_the_engine_in_place(make_store):
+    make_store(300)
+    students = get_rows("students")
+    target = dict(students[200])
+    search_engine.search_positions("students", target['lastname'])
+    engine = search_engine._engines["students"]
+
+    assert delete_rows("students", [students[pos]['id'] for pos in (0, 57, 58, 299)])
+
+    assert search_engine._engines["students"] is engine
+    fresh = search_engine._build("students")
+    for part in ("doc_words", "word_docs", "gram_words", "stamp"):
+        assert engine[part] == fresh[part]
+    rows = get_rows("students")
+    hits = search_engine.search_positions("students", f"{target['firstname']} {target['lastname']}")
+    assert rows[hits[0]]['id'] == target['id']
@@ -0,0 +1,57 @@
+import pytest
+
+from modules import database_io, service
+from modules.database_io import get_rows
+from modules.indexes import find_row
+
+TABLES = [("students", "id", "lastname"), ("programs", "code", "name"), ("colleges", "code", "name")]
+
+
+@pytest.mark.parametrize("file_key, pk, column", TABLES)
+def test_update_with_a_stale_version_is_refused(make_store, file_key, pk, column):
+    make_store(100)
+    row = dict(get_rows(file_key)[0])
+    key = row[pk]
+    stale = service.record_version(file_key, key)
+
+    ok, msg = service.UPDATE[file_key](key, dict(row, **{column: "Someone Else"}), stale)
+    assert ok, msg
+    ok, msg = service.UPDATE[file_key](key, dict(row, **{column: "Mine Again"}), stale)
+    assert not ok
+    assert msg.kind == service.CONFLICT
+    assert find_row(file_key, key)[column] == "Someone Else"
+
+    fresh = service.record_version(file_key, key)
+    ok, msg = service.UPDATE[file_key](key, dict(row, **{column: "Mine Again"}), fresh)
+    assert ok, msg
+    assert find_row(file_key, key)[column] == "Mine Again"
+
+
+@pytest.mark.parametrize("file_key, pk, column", TABLES)
+def test_delete_with_a_stale_version_is_refused(make_store, file_key, pk, column):
+    make_store(100)
+    row = dict(get_rows(file_key)[0])
+    key = row[pk]
+    stale = service.record_version(file_key, key)
+    assert service.UPDATE[file_key](key, dict(row, **{column: "Someone Else"}))[0]
+
+    ok, msg = service.DELETE[file_key](key, stale)
+    assert not ok and msg.kind == service.CONFLICT
+    assert find_row(file_key, key) is not None
+
+
+def test_edits_do_not_copy_the_table(make_store, monkeypatch):
+    make_store(100)
+    row = dict(get_rows("students")[0])
+    monkeypatch.setattr(database_io, "read_csv", lambda file_key: pytest.fail("table copied"))
+    assert service.update_student(row['id'], dict(row, lastname="Copied"))[0]
+    assert service.delete_student(row['id'])[0]
+
+
+def test_failed_write_is_reported(make_store, monkeypatch):
+    make_store(100)
+    row = dict(get_rows("students")[0])
+    monkeypatch.setattr(database_io.get_backend(), "update", lambda *args: False)
+    ok, msg = service.update_student(row['id'], dict(row, lastname="Lost"))
+    assert not ok and msg.kind == service.STORAGE
+    assert find_row("students", row['id'])['lastname'] == row['lastname']
@@ -0,0 +1,33 @@
+import os
+
+from modules import database_io
+
+
+def test_same_size_replace_in_one_mtime_tick_changes_the_stamp(make_store):
+    data_dir = make_store(50)
+    backend = database_io.get_backend()
+    path = os.path.join(data_dir, "colleges.csv")
+    before = backend.stamp("colleges")
+    st = os.stat(path)
+
+    # another process rewrites the file atomically: same size, same mtime
+    with open(path, newline='') as f:
+        text = f.read()
+    with open(path + ".new", 'w', newline='') as f:
+        f.write(text.replace("College of", "College Of"))
+    os.utime(path + ".new", ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(path + ".new", path)
+
+    assert os.path.getsize(path) == st.st_size
+    assert backend.stamp("colleges") != before
+
+
+def test_sqlite_duplicate_insert_fails_without_overwriting(make_store):
+    make_store(50, sqlite=True)
+    existing = dict(database_io.get_rows("students")[0])
+    assert not database_io.add_csv("students", dict(existing, firstname="Impostor"))
+
+    backend = database_io.get_backend()
+    stored = [row for row in backend.load("students") if row['id'] == existing['id']]
+    assert [row['firstname'] for row in stored] == [existing['firstname']]
+    assert len(database_io.get_rows("students")) == len(backend.load("students")) == 50
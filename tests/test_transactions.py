@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from conftest import csv_backend
+from modules import database_io, service
+from modules.database_io import add_csv, get_rows, transaction
+
+
+def read(path):
+    with open(path, newline='') as f:
+        return f.read()
+
+
+def test_committed_journal_is_replayed(make_store):
+    data_dir = make_store(50)
+    target = os.path.join(data_dir, "colleges.csv")
+    staged = target + ".txn"
+    with open(staged, "w", newline='') as f:
+        f.write("code,name\r\nNEW,New College\r\n")
+    # a crash after the journal was written but before the swap
+    with open(os.path.join(data_dir, ".journal.json"), "w") as f:
+        json.dump({"moves": [[staged, target]]}, f)
+
+    csv_backend(data_dir)   # initialize() recovers
+    assert read(target) == "code,name\r\nNEW,New College\r\n"
+    assert not os.path.exists(staged)
+    assert not os.path.exists(os.path.join(data_dir, ".journal.json"))
+
+
+def test_uncommitted_staged_copies_are_discarded(make_store):
+    data_dir = make_store(50)
+    target = os.path.join(data_dir, "colleges.csv")
+    original = read(target)
+    with open(target + ".txn", "w", newline='') as f:
+        f.write("code,name\r\n")
+    # a torn journal means the commit never happened
+    with open(os.path.join(data_dir, ".journal.json"), "w") as f:
+        f.write('{"moves": [[')
+
+    csv_backend(data_dir)
+    assert read(target) == original
+    assert not os.path.exists(target + ".txn")
+    assert not os.path.exists(os.path.join(data_dir, ".journal.json"))
+
+
+def test_failed_block_leaves_files_and_cache_unchanged(make_store):
+    data_dir = make_store(50)
+    path = os.path.join(data_dir, "students.csv")
+    original = read(path)
+    row = dict(get_rows("students")[0], id="2030-0001")
+    with pytest.raises(RuntimeError):
+        with transaction():
+            add_csv("students", row)
+            assert get_rows("students")[-1]['id'] == "2030-0001"
+            raise RuntimeError("cascade failed half way")
+    assert read(path) == original
+    assert "2030-0001" not in {r['id'] for r in get_rows("students")}
+    assert not [name for name in os.listdir(data_dir) if ".txn" in name]
+    assert database_io.get_backend()._staged is None
+
+
+def test_add_in_a_transaction_appends_instead_of_rewriting(make_store, monkeypatch):
+    data_dir = make_store(50)
+    path = os.path.join(data_dir, "students.csv")
+    original = read(path)
+    backend = database_io.get_backend()
+    monkeypatch.setattr(backend, "save", lambda file_key, rows: pytest.fail("table rewritten"))
+    student = dict(get_rows("students")[0], id="2024-9999")
+    ok, msg = service.add_student(student)
+    assert ok, msg
+    assert read(path).startswith(original)
+    assert read(path)[len(original):].startswith("2024-9999,")
+    assert not [name for name in os.listdir(data_dir) if ".txn" in name]
+
+
+def test_replayed_append_lands_once(make_store):
+    data_dir = make_store(50)
+    target = os.path.join(data_dir, "colleges.csv")
+    original = read(target)
+    tail = target + ".txn.add"
+    with open(tail, "w", newline='') as f:
+        f.write("NEW,New College\r\n")
+    # a crash after the tail was half appended
+    with open(target, "a", newline='') as f:
+        f.write("NEW,New Col")
+    with open(os.path.join(data_dir, ".journal.json"), "w") as f:
+        json.dump({"moves": [], "appends": [[tail, target, len(original.encode())]]}, f)
+
+    csv_backend(data_dir)
+    assert read(target) == original + "NEW,New College\r\n"
+    assert not os.path.exists(tail)
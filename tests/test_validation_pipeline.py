@@ -0,0 +1,13 @@
+from modules.database_io import iter_rows
+from modules.validation_pipeline import iter_validate
+
+
+def test_spawned_pool_matches_serial(make_store):
+    make_store(300)
+    rows = list(iter_rows("students"))
+    rows[7] = dict(rows[7], program_code="NOPE")
+    rows[150] = dict(rows[150], year="9")
+    serial = [(ok, msg) for _, ok, msg in iter_validate("students", rows, workers=1, shard_size=50)]
+    pooled = [(ok, msg) for _, ok, msg in iter_validate("students", rows, workers=2, shard_size=50)]
+    assert pooled == serial
+    assert not serial[7][0] and not serial[150][0]